@@ -23,8 +23,17 @@ def create_app():
 
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-    from utils.firestore_manager import startup_check
-    startup_check()
+    # Connectivity is checked on a background thread; Firestore itself is
+    # initialised lazily on first use, so the worker starts serving at once.
+    # The sqlite storage backend (STORAGE_BACKEND) needs no Firestore at all;
+    # writebehind serves locally and syncs to Firestore in the background.
+    from utils.storage import get_backend
+    if get_backend().name in ('firestore', 'writebehind'):
+        from utils.firestore_manager import startup_check
+        startup_check()
+    if get_backend().name == 'writebehind':
+        from utils.sync_manager import start_worker
+        start_worker()
 
     from routes.resume import resume_bp
     from routes.jobs import jobs_bp
@@ -35,6 +44,8 @@ def create_app():
     from routes.job_board import job_board_bp
     from routes.setup import setup_bp
     from routes.report import report_bp
+    from routes.health import health_bp
+    from routes.metrics import metrics_bp
 
     app.register_blueprint(resume_bp, url_prefix='/api/resume')
     app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
@@ -45,6 +56,12 @@ def create_app():
     app.register_blueprint(job_board_bp)
     app.register_blueprint(setup_bp)
     app.register_blueprint(report_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(metrics_bp)
+
+    from utils import metrics, profiler
+    metrics.init_app(app)
+    profiler.init_app(app)
 
     @app.route('/')
     def index():
@@ -201,6 +218,7 @@ def create_app():
             "Disallow: /api/\n"
             "Disallow: /julisunkan\n"
             "Disallow: /setup\n"
+            "Disallow: /metrics\n"
             "Disallow: /uploads/\n"
             "\n"
             f"Sitemap: {base_url}/sitemap.xml\n"
@@ -0,0 +1,175 @@
+"""
+In-memory stand-in for the parts of the Firestore client FirestoreBackend uses.
+
+Documents are held as dicts and copied on every read and write, as the real
+client builds fresh dicts from each RPC response. No network and no latency
+are simulated, so benchmarks measure the app's own work per document.
+"""
+import itertools
+import threading
+
+from google.api_core.exceptions import NotFound
+
+from utils.firestore_backend import FirestoreBackend
+
+
+class _Snapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data.get(field)
+
+
+class _DocRef:
+    def __init__(self, store, collection, doc_id):
+        self._store = store
+        self.id = str(doc_id)
+        self.path = f'{collection}/{self.id}'
+        self._docs = store.setdefault(collection, {})
+
+    def get(self, transaction=None):
+        data = self._docs.get(self.id)
+        return _Snapshot(self, data)
+
+    def set(self, data):
+        self._docs[self.id] = dict(data)
+
+    def update(self, updates):
+        if self.id not in self._docs:
+            raise NotFound(self.path)
+        self._docs[self.id] = dict(self._docs[self.id], **updates)
+
+    def delete(self):
+        self._docs.pop(self.id, None)
+
+
+class _Aggregate:
+    def __init__(self, value):
+        self.value = value
+
+
+class _CountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    def get(self):
+        return [[_Aggregate(sum(1 for _ in self._query._matching()))]]
+
+
+class _Query:
+    def __init__(self, store, collection, filters=(), ordered=False, limit_to=None, after=None):
+        self._store = store
+        self._collection = collection
+        self._filters = filters
+        self._ordered = ordered
+        self._limit = limit_to
+        self._after = after
+
+    def _derive(self, **changes):
+        state = dict(filters=self._filters, ordered=self._ordered, limit_to=self._limit, after=self._after)
+        state.update(changes)
+        return _Query(self._store, self._collection, **state)
+
+    def where(self, field, op, value):
+        if op != '==':
+            raise NotImplementedError(op)
+        return self._derive(filters=self._filters + ((field, value),))
+
+    def order_by(self, field):
+        if field != '__name__':
+            raise NotImplementedError(field)
+        return self._derive(ordered=True)
+
+    def limit(self, n):
+        return self._derive(limit_to=n)
+
+    def start_after(self, snapshot):
+        return self._derive(after=snapshot.id)
+
+    def count(self):
+        return _CountQuery(self)
+
+    def _matching(self):
+        docs = self._store.get(self._collection, {})
+        ids = sorted(docs) if self._ordered else list(docs)
+        if self._after is not None:
+            ids = [i for i in ids if i > self._after]
+        for doc_id in ids:
+            data = docs[doc_id]
+            if all(data.get(f) == v for f, v in self._filters):
+                yield doc_id, data
+
+    def stream(self):
+        matching = self._matching()
+        if self._limit is not None:
+            matching = itertools.islice(matching, self._limit)
+        for doc_id, data in matching:
+            yield _Snapshot(_DocRef(self._store, self._collection, doc_id), dict(data))
+
+
+class _Collection(_Query):
+    def document(self, doc_id):
+        return _DocRef(self._store, self._collection, doc_id)
+
+
+class _Batch:
+    def __init__(self):
+        self._ops = []
+
+    def set(self, ref, data):
+        self._ops.append(lambda: ref.set(data))
+
+    def update(self, ref, updates):
+        self._ops.append(lambda: ref.update(updates))
+
+    def delete(self, ref):
+        self._ops.append(ref.delete)
+
+    def commit(self):
+        for op in self._ops:
+            op()
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.store = {}
+
+    def collection(self, name):
+        return _Collection(self.store, name)
+
+    def get_all(self, refs):
+        for ref in refs:
+            yield ref.get()
+
+    def batch(self):
+        return _Batch()
+
+
+class FakeFirestoreBackend(FirestoreBackend):
+    """FirestoreBackend running against FakeFirestore; ids come from a local counter."""
+
+    def __init__(self):
+        self.client = FakeFirestore()
+        self._counters = {}
+        self._counter_lock = threading.Lock()
+
+    def _client(self):
+        return self.client
+
+    def next_id(self, collection):
+        with self._counter_lock:
+            self._counters[collection] = self._counters.get(collection, 0) + 1
+            return self._counters[collection]
+
+    def load(self, collection, docs):
+        """Bulk-load ``{id: data}`` without going through the backend."""
+        self.client.store.setdefault(collection, {}).update((str(k), dict(v)) for k, v in docs.items())
+        with self._counter_lock:
+            self._counters[collection] = max([self._counters.get(collection, 0)] + [int(k) for k in docs])
@@ -0,0 +1,81 @@
+"""
+Worker cold-start profile: import time and baseline RSS of create_app().
+
+    python benchmarks/importtime.py [--top N] [--budget-ms MS]
+
+Runs ``python -X importtime`` on a fresh interpreter that builds the app (as a
+gunicorn worker does), then prints the slowest top-level packages by
+cumulative import time, the total, and the child's peak RSS. The background
+Firebase check is disabled in the child: its imports would interleave with
+the main thread's and garble the -X importtime tree. Exits non-zero
+when the total exceeds --budget-ms, so it can guard the import budget in CI.
+Heavy libraries (groq, reportlab, pdfplumber, pypdfium2, python-docx) are
+expected to be absent from the report — they load on first use.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+_CHILD = (
+    'import resource, time\n'
+    'import utils.firestore_manager as fm\n'
+    'fm.startup_check = lambda *a, **k: None\n'
+    't = time.perf_counter()\n'
+    'from app import create_app\n'
+    'create_app()\n'
+    'elapsed = time.perf_counter() - t\n'
+    'rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n'
+    'print(f"{elapsed:.4f} {rss_kb}")\n'
+)
+_LINE_RE = re.compile(r'^import time:\s+(-?\d+) \|\s+(\d+) \|( *)(\S+)')
+
+HEAVY = ('groq', 'reportlab', 'pdfplumber', 'pypdfium2', 'docx')
+
+
+def profile():
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    top_level = {}
+    seen = set()
+    elapsed, rss_kb = proc.stdout.split()[-2:]
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            seen.add(m.group(4))
+        # Depth-1 entries are imported directly by the child; their cumulative
+        # time covers everything beneath them
+        if m and len(m.group(3)) == 1:
+            name = m.group(4)
+            top_level[name] = top_level.get(name, 0) + int(m.group(2))
+    return top_level, seen, float(elapsed), int(rss_kb)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--top', type=int, default=15)
+    ap.add_argument('--budget-ms', type=float, default=None)
+    args = ap.parse_args()
+
+    top_level, seen, elapsed, rss_kb = profile()
+    total_ms = sum(top_level.values()) / 1000
+    print(f'{"module":<40} {"cumulative":>12}')
+    for name, us in sorted(top_level.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f'{name:<40} {us / 1000:>9.1f} ms')
+    print(f'\nimports total {total_ms:.1f} ms, create_app() {elapsed * 1000:.1f} ms, peak RSS {rss_kb / 1024:.1f} MB')
+    loaded = [m for m in HEAVY if m in seen]
+    if loaded:
+        print('heavy libraries imported at startup: ' + ', '.join(loaded))
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f'over budget: {total_ms:.1f} ms > {args.budget_ms:.1f} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
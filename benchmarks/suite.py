@@ -0,0 +1,310 @@
+"""
+Benchmark suite for the data_layer, clean_text, search and export hot paths.
+
+    python benchmarks/suite.py [--sizes 1000,10000,100000] [--backends firestore,sqlite]
+                               [--rounds N] [--only SUBSTR] [--output results.json]
+    python benchmarks/suite.py --compare base.json head.json [--threshold 1.15]
+
+Storage runs against an in-memory Firestore fake (benchmarks/fake_firestore.py)
+and a temporary SQLite database. The provider benchmarks replay recorded
+Remotive responses from benchmarks/fixtures/, so no network access is needed.
+
+Each benchmark reports the median, min, mean and standard deviation of its
+rounds, in seconds. --output writes them as JSON together with the commit and
+interpreter. --compare diffs two result files and exits non-zero when any
+median got slower by more than --threshold.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+# The mirror would attach a real listener to the fake's "firestore" backend
+os.environ['JOBPOST_MIRROR'] = '0'
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def _bench(results, name, fn, rounds, **extra):
+    fn()  # warm-up: imports, caches, style sheets
+    times = []
+    for _ in range(rounds):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    median = statistics.median(times)
+    results[name] = dict(
+        median_s=median, min_s=min(times), mean_s=statistics.fmean(times),
+        stdev_s=statistics.stdev(times) if len(times) > 1 else 0.0, rounds=rounds,
+        **{k: (v(median) if callable(v) else v) for k, v in extra.items()},
+    )
+    print(f'{name:<44} median {median * 1000:10.2f} ms   min {min(times) * 1000:10.2f} ms   ({rounds} rounds)')
+
+
+def _rounds_for(size, rounds):
+    # Keep the large collections from dominating the run time
+    return max(2, rounds * 1000 // max(size, 1000))
+
+
+# ── Fixtures ──────────────────────────────────────────────────────────────────
+
+def _remotive_fixture():
+    with open(os.path.join(FIXTURES, 'remotive_jobs.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _posts(n, descriptions, seed=42):
+    """``n`` stored job post documents, as the aggregator would have saved them."""
+    from utils.job_aggregator import clean_text
+    rng = random.Random(seed)
+    cleaned = [clean_text(d)[:900] for d in descriptions]
+    words = ['Python', 'Data', 'Platform', 'Senior', 'Backend', 'Cloud', 'Mobile', 'Security']
+    docs = {}
+    for i in range(1, n + 1):
+        ts = f'2026-{1 + i % 9:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00'
+        docs[i] = {
+            'id': i, 'external_id': f'remotive-{i}', 'source': 'remotive',
+            'title': f'{rng.choice(words)} {rng.choice(words)} Engineer',
+            'company': f'Company {i % 997}', 'location': rng.choice(['Remote', 'Berlin', 'New York', 'Worldwide']),
+            'job_type': rng.choice(['full-time', 'contract', 'part-time']), 'salary': '',
+            'tags': ', '.join(rng.sample(['python', 'flask', 'aws', 'sql', 'react', 'go', 'k8s'], 3)),
+            'apply_url': f'https://example.com/jobs/{i}', 'original_description': rng.choice(cleaned),
+            'description': '', 'content_fingerprint': '', 'duplicate_of': None,
+            'ai_rewritten': i % 3 == 0, 'status': 'published' if i % 10 else 'draft',
+            'featured': i % 50 == 0, 'created_at': ts, 'updated_at': ts,
+        }
+    return docs
+
+
+def _make_backend(kind, docs, tmpdir):
+    if kind == 'firestore':
+        from fake_firestore import FakeFirestoreBackend
+        backend = FakeFirestoreBackend()
+        backend.load('job_posts', docs)
+        return backend
+    from utils.sqlite_backend import SQLiteBackend
+    backend = SQLiteBackend(os.path.join(tmpdir, f'bench-{len(docs)}.db'))
+    with backend._txn():
+        for doc_id, doc in docs.items():
+            backend.set('job_posts', doc_id, doc)
+    return backend
+
+
+# ── Benchmarks ────────────────────────────────────────────────────────────────
+
+def bench_data_layer(results, args, descriptions, tmpdir):
+    from utils import data_layer
+    from utils.storage import set_backend
+    for size in args.sizes:
+        docs = _posts(size, descriptions)
+        for kind in args.backends:
+            set_backend(_make_backend(kind, docs, tmpdir))
+            rounds = _rounds_for(size, args.rounds)
+            _bench(results, f'jobpost_list[{kind},{size}]',
+                   lambda: data_layer.jobpost_list(status='published'), rounds,
+                   posts_per_s=lambda m, n=size: n / m)
+            _bench(results, f'jobpost_count_by_status[{kind},{size}]',
+                   data_layer.jobpost_count_by_status, rounds)
+        del docs
+
+
+def bench_clean_text(results, args, fixture):
+    from utils.job_aggregator import clean_text
+    descriptions = [j['description'] for j in fixture['jobs']]
+    fields = [j['title'] for j in fixture['jobs']] + [j['company_name'] for j in fixture['jobs']]
+    chars = sum(map(len, descriptions))
+    reps = 50
+
+    def _multiline():
+        for _ in range(reps):
+            for d in descriptions:
+                clean_text(d, multiline=True)
+
+    def _single():
+        for _ in range(reps * 20):
+            for f in fields:
+                clean_text(f, multiline=False)
+
+    _bench(results, 'clean_text[multiline,html]', _multiline, args.rounds,
+           chars_per_s=lambda m: chars * reps / m, calls=reps * len(descriptions))
+    _bench(results, 'clean_text[single-line]', _single, args.rounds,
+           calls_per_s=lambda m: reps * 20 * len(fields) / m)
+
+
+def bench_provider_parse(results, args, fixture):
+    from utils import job_aggregator
+
+    class _Response:
+        status_code = 200
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return fixture
+
+    real_get = job_aggregator._get
+    job_aggregator._get = lambda provider, url, **kw: _Response()
+    try:
+        _bench(results, 'fetch_remotive[recorded]', lambda: job_aggregator.fetch_remotive(limit=20), args.rounds)
+    finally:
+        job_aggregator._get = real_get
+
+
+def _client(size, descriptions):
+    import utils.firestore_manager as fm
+    from fake_firestore import FakeFirestoreBackend
+    from utils.storage import set_backend
+    fm.startup_check = lambda *a, **k: None
+    backend = FakeFirestoreBackend()
+    backend.load('job_posts', _posts(size, descriptions))
+    set_backend(backend)
+    from app import create_app
+    app = create_app()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    return client
+
+
+def bench_routes(results, args, descriptions):
+    size = min(args.sizes)
+    client = _client(size, descriptions)
+
+    def _get(url):
+        resp = client.get(url)
+        assert resp.status_code == 200, (url, resp.status_code)
+        resp.get_data()
+
+    for label, query in (('browse', ''), ('search', 'q=python'), ('search+type', 'q=data&type=contract'),
+                         ('no-match', 'q=zzzz')):
+        _bench(results, f'public_list[{label},{size}]',
+               lambda q=query: _get(f'/api/jobboard/published?{q}'), args.rounds)
+
+    for fmt in ('txt', 'csv', 'ndjson'):
+        def _export(fmt=fmt):
+            resp = client.post('/api/jobboard/export', json={'format': fmt})
+            assert resp.status_code == 200, (fmt, resp.status_code)
+            return len(resp.get_data())
+        _bench(results, f'export_jobs[{fmt},{size}]', _export, args.rounds, bytes=_export())
+
+
+def bench_documents(results, args):
+    from bench_pdf import JOBS, RESUME
+    from utils import parser
+    from utils.pdf_exporter import generate_job_listings_pdf, generate_pdf
+
+    pdf_bytes = generate_pdf('Resume - Bench', RESUME).getvalue()
+    _bench(results, 'generate_pdf[resume]', lambda: generate_pdf('Resume - Bench', RESUME), args.rounds)
+    _bench(results, 'generate_job_listings_pdf[500]', lambda: generate_job_listings_pdf(JOBS),
+           max(2, args.rounds // 5))
+
+    from docx import Document
+    doc = Document()
+    for line in RESUME.splitlines():
+        doc.add_paragraph(line)
+    buf = io.BytesIO()
+    doc.save(buf)
+    docx_bytes = buf.getvalue()
+
+    _bench(results, 'extract_text[pdf,cold]', lambda: parser.extract_text_from_pdf(pdf_bytes), args.rounds)
+    _bench(results, 'extract_text[docx,cold]', lambda: parser.extract_text_from_docx(docx_bytes), args.rounds)
+    real_dir = parser._cache.directory
+    parser._cache.directory = tempfile.mkdtemp(prefix='bench-extract-')
+    try:
+        _bench(results, 'extract_text[pdf,cached]', lambda: parser.extract_text(pdf_bytes, 'resume.pdf'), args.rounds)
+    finally:
+        parser._cache.directory = real_dir
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(base_path, head_path, threshold):
+    with open(base_path) as f:
+        base = json.load(f)['results']
+    with open(head_path) as f:
+        head = json.load(f)['results']
+    regressions = []
+    print(f'{"benchmark":<44} {"base ms":>10} {"head ms":>10} {"ratio":>7}')
+    for name in sorted(set(base) & set(head)):
+        b, h = base[name]['median_s'], head[name]['median_s']
+        ratio = h / b if b else float('inf')
+        flag = '  SLOWER' if ratio > threshold else ('  faster' if ratio < 1 / threshold else '')
+        print(f'{name:<44} {b * 1000:>10.2f} {h * 1000:>10.2f} {ratio:>6.2f}x{flag}')
+        if ratio > threshold:
+            regressions.append(name)
+    for name in sorted(set(base) ^ set(head)):
+        print(f'{name:<44} only in {"base" if name in base else "head"}')
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) over {threshold:.2f}x')
+        sys.exit(1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    ap.add_argument('--backends', default='firestore,sqlite')
+    ap.add_argument('--rounds', type=int, default=10)
+    ap.add_argument('--only', default=None, help='run only groups whose name contains this '
+                                                 '(data_layer, clean_text, provider, routes, documents)')
+    ap.add_argument('--output', default=None)
+    ap.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'))
+    ap.add_argument('--threshold', type=float, default=1.15)
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare, args.threshold)
+        return
+
+    args.sizes = [int(s) for s in args.sizes.split(',') if s]
+    args.backends = [b for b in args.backends.split(',') if b]
+    fixture = _remotive_fixture()
+    descriptions = [j['description'] for j in fixture['jobs']]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench-') as tmpdir:
+        groups = [
+            ('data_layer', lambda: bench_data_layer(results, args, descriptions, tmpdir)),
+            ('clean_text', lambda: bench_clean_text(results, args, fixture)),
+            ('provider', lambda: bench_provider_parse(results, args, fixture)),
+            ('routes', lambda: bench_routes(results, args, descriptions)),
+            ('documents', lambda: bench_documents(results, args)),
+        ]
+        for name, run in groups:
+            if args.only is None or args.only in name:
+                run()
+
+    if args.output:
+        report = {
+            'commit': _commit(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {'sizes': args.sizes, 'backends': args.backends, 'rounds': args.rounds},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f'\nwrote {len(results)} results to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
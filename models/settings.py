@@ -1,5 +1,5 @@
 """
-settings.py — Firestore-backed key/value settings store.
+settings.py — Key/value settings store on the configured storage backend.
 
 Maintains the same API as the original SQLAlchemy model:
   Setting.get(key, default)
@@ -36,14 +36,10 @@ class _FakeQuery:
 
     def all(self):
         try:
-            from utils.firestore_manager import get_firestore_client
-            docs = get_firestore_client().collection('settings').stream()
+            from utils.storage import get_backend
             rows = []
-            for doc in docs:
-                d = doc.to_dict()
-                if not d:
-                    continue
-                key = d.get('key') or doc.id
+            for d in get_backend().query('settings'):
+                key = d.get('key') or str(d['id'])
                 value = d.get('value', '')
                 if self._filters:
                     match = all(str(d.get(k, '')) == str(v) for k, v in self._filters.items())
@@ -73,18 +69,18 @@ class Setting:
     query = _QueryDescriptor()
 
     @classmethod
-    def _col(cls):
-        from utils.firestore_manager import get_firestore_client
-        return get_firestore_client().collection('settings')
+    def _backend(cls):
+        from utils.storage import get_backend
+        return get_backend()
 
     @classmethod
     def get(cls, key, default=None):
         if key in _cache:
             return _cache[key]
         try:
-            doc = cls._col().document(key).get()
-            if doc.exists:
-                val = (doc.to_dict() or {}).get('value')
+            doc = cls._backend().get('settings', key)
+            if doc is not None:
+                val = doc.get('value')
                 _cache[key] = val
                 return val
         except Exception as e:
@@ -95,7 +91,7 @@ class Setting:
     def set(cls, key, value):
         _cache[key] = value
         try:
-            cls._col().document(key).set({'key': key, 'value': value or ''})
+            cls._backend().set('settings', key, {'key': key, 'value': value or ''})
         except Exception as e:
             logger.error('Setting.set(%s) failed: %s', key, e)
 
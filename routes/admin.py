@@ -3,7 +3,10 @@ import logging
 import os
 import datetime
 from functools import wraps
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, Response, abort
+from flask import (
+    Blueprint, render_template, request, jsonify, session, redirect, url_for, Response, abort,
+    stream_with_context,
+)
 
 from models.settings import Setting
 
@@ -77,7 +80,11 @@ def get_settings():
     defaults = {
         'groq_api_key': '',
         'ai_model': 'llama-3.3-70b-versatile',
+        'ai_fast_model': 'llama-3.1-8b-instant',
         'ai_max_tokens': '4096',
+        'ai_max_concurrency': '4',
+        'ai_rpm_limit': '30',
+        'ai_tpm_limit': '6000',
         'app_name': 'AI Resume & Cover Letter Creator',
         'app_tagline': 'Your intelligent job application assistant — from resume to offer letter.',
         'site_url': '',
@@ -137,6 +144,8 @@ def save_settings():
         if value is not None:
             Setting.set(key, str(value))
     Setting.invalidate_cache()
+    from utils.ai_engine import reset_governor
+    reset_governor()
     return jsonify({'success': True})
 
 
@@ -275,31 +284,58 @@ def save_ads_txt():
 
 # ── STATS ─────────────────────────────────────────────────────────────────────
 
+# Dashboard counts are served from a per-process snapshot this many seconds old at most
+STATS_SNAPSHOT_TTL = 15
+_stats_snapshot = {'at': 0.0, 'data': None}
+
+
 @admin_bp.route('/api/stats', methods=['GET'])
 @admin_required
 def get_stats():
+    import time
+    from utils.concurrent_fetch import fetch_all
     from utils.data_layer import (
         resume_count, job_count, job_count_by_status,
         message_count, message_count_unread, report_count,
     )
 
-    def _safe(fn, *args, **kwargs):
-        try:
-            return fn(*args, **kwargs)
-        except Exception:
-            return 0
+    snap = _stats_snapshot
+    if request.args.get('fresh') != '1' and snap['data'] is not None \
+            and time.monotonic() - snap['at'] < STATS_SNAPSHOT_TTL:
+        return jsonify(snap['data'])
 
-    by_status = _safe(job_count_by_status) or {}
-    return jsonify({
+    def _safe(fn, *args, **kwargs):
+        def _call():
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                return 0
+        return _call
+
+    # Independent collection reads — run them concurrently so the page waits
+    # only for the slowest one
+    r = fetch_all({
         'resumes': _safe(resume_count),
         'jobs': _safe(job_count),
-        'interviews': by_status.get('Interview', 0),
-        'offers': by_status.get('Offer', 0),
+        'by_status': _safe(job_count_by_status),
         'messages': _safe(message_count),
         'unread_messages': _safe(message_count_unread),
         'reports': _safe(report_count),
         'pending_reports': _safe(report_count, status='pending'),
     })
+    by_status = r.pop('by_status') or {}
+    data = {
+        'resumes': r['resumes'],
+        'jobs': r['jobs'],
+        'interviews': by_status.get('Interview', 0),
+        'offers': by_status.get('Offer', 0),
+        'messages': r['messages'],
+        'unread_messages': r['unread_messages'],
+        'reports': r['reports'],
+        'pending_reports': r['pending_reports'],
+    }
+    snap['data'], snap['at'] = data, time.monotonic()
+    return jsonify(data)
 
 
 # ── CONTACT MESSAGES API ──────────────────────────────────────────────────────
@@ -361,12 +397,16 @@ def bulk_delete_messages():
     return jsonify({'success': True, 'deleted': deleted})
 
 
-# ── DATABASE CONFIG (Firebase only) ──────────────────────────────────────────
+# ── DATABASE CONFIG ──────────────────────────────────────────────────────────
 
 @admin_bp.route('/api/database/config', methods=['GET'])
 @admin_required
 def get_db_config():
-    return jsonify({'db_type': 'firebase', 'active_db': 'firebase'})
+    from utils.storage import BACKENDS, get_backend
+    name = get_backend().name
+    db_type = 'firebase' if name == 'firestore' else name
+    return jsonify({'db_type': db_type, 'active_db': db_type, 'storage_backend': name,
+                    'available_backends': list(BACKENDS)})
 
 
 @admin_bp.route('/api/database/config', methods=['POST'])
@@ -388,36 +428,78 @@ def restart_app():
     return jsonify({'success': True})
 
 
+def _close_sections(sections):
+    """Stop any Prefetch producers among ``sections`` (idempotent)."""
+    for _, value in sections:
+        close = getattr(value, 'close', None)
+        if close is not None:
+            close()
+
+
+def _json_download(sections, basename, gzip=False):
+    """Stream ``sections`` as a JSON attachment (see utils.json_stream), optionally gzip-compressed."""
+    from utils.json_stream import encode_chunks, iter_json_object
+
+    def _generate():
+        try:
+            yield from encode_chunks(iter_json_object(sections), gzip=gzip)
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated file
+            logger.error('Streaming export %s failed: %s', basename, e)
+            raise
+        finally:
+            _close_sections(sections)
+
+    ts = datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    filename = f'{basename}_{ts}.json' + ('.gz' if gzip else '')
+    response = Response(
+        stream_with_context(_generate()),
+        mimetype='application/gzip' if gzip else 'application/json',
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
+    )
+    # A client that disconnects before the body starts never runs the
+    # generator's finally; collections prefetched ahead must stop either way
+    response.call_on_close(lambda: _close_sections(sections))
+    return response
+
+
+def _wants_gzip(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
 @admin_bp.route('/api/database/export/sqlite', methods=['GET'])
 @admin_bp.route('/api/database/export/mysql', methods=['GET'])
 @admin_required
 def export_db_sql():
-    """SQLite/MySQL export is not applicable — app uses Firebase only. Returns a JSON data dump instead."""
-    import json as _json
-    from utils.data_layer import resume_list, job_list, message_list
+    """
+    SQL dumps are not produced; this returns a streamed JSON dump of the
+    collections from whichever storage backend is active (Firestore, SQLite
+    or write-behind), plus non-sensitive settings.
+    """
+    from utils.concurrent_fetch import Prefetch
+    from utils.data_layer import collection_iter, ping
+    from utils.storage import backend_name
     from models.settings import Setting
     sensitive = {'admin_password', 'groq_api_key', 'bitly_access_token',
                  'tly_api_key', 'kutt_api_key', 'urlzli_api_key', 'picsee_api_key'}
     rows = Setting.query.all()
     settings_data = {r.key: r.value or '' for r in rows if r.key not in sensitive}
     try:
-        data = {
-            'note': 'This app uses Firebase/Firestore exclusively. SQL export is not available. '
-                    'This JSON file contains all your Firestore data.',
-            'exported_at': datetime.datetime.utcnow().isoformat() + 'Z',
-            'resumes': resume_list(),
-            'jobs': job_list(),
-            'contact_messages': message_list(),
-            'settings': settings_data,
-        }
+        ping()
     except Exception as e:
         return jsonify({'error': f'Export failed: {e}'}), 500
-    ts = datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-    return Response(
-        _json.dumps(data, indent=2, default=str),
-        mimetype='application/json',
-        headers={'Content-Disposition': f'attachment; filename=firebase_export_{ts}.json'}
-    )
+    sections = [
+        ('note', 'SQL export is not available. This JSON file contains all your data '
+                 f'from the {backend_name()} storage backend.'),
+        ('exported_at', datetime.datetime.utcnow().isoformat() + 'Z'),
+        # Prefetch starts every collection cursor now, so later collections are
+        # read while earlier ones are still being written to the client
+        ('resumes', Prefetch(collection_iter('resumes'))),
+        ('jobs', Prefetch(collection_iter('jobs'))),
+        ('contact_messages', Prefetch(collection_iter('contact_messages'))),
+        ('settings', settings_data),
+    ]
+    return _json_download(sections, 'firebase_export', gzip=_wants_gzip(request.args.get('gzip')))
 
 
 @admin_bp.route('/api/database/import-sql', methods=['POST'])
@@ -522,7 +604,7 @@ def firebase_save_credentials():
         return jsonify({'success': False, 'error': 'Failed to save credentials to database.'}), 500
 
     reset_firebase_app()
-    startup_check()
+    startup_check(wait=True)
     return jsonify({'success': True, 'message': f'Firebase credentials saved for project "{creds.get("project_id")}".'})
 
 
@@ -550,49 +632,33 @@ def firebase_test():
 @admin_bp.route('/api/firebase/export', methods=['POST'])
 @admin_required
 def firebase_export():
-    """Download all selected Firestore collections as a JSON file."""
-    import json as _json
-    from utils.data_layer import (
-        resume_list, job_list, message_list, jobpost_list,
-    )
+    """Download all selected Firestore collections as a JSON file (streamed, optionally gzipped)."""
+    from utils.concurrent_fetch import Prefetch
+    from utils.data_layer import collection_iter, jobpost_iter, ping
     data = request.get_json(silent=True) or {}
     collections = data.get('collections', ['resumes', 'jobs'])
+    sections = [('exported_at', datetime.datetime.utcnow().isoformat() + 'Z')]
     try:
-        results = {}
-        counts = {}
+        ping()
+        if 'settings' in collections:
+            sensitive = {'admin_password', 'groq_api_key'}
+            rows = Setting.query.all()
+            settings_data = {r.key: r.value or '' for r in rows if r.key not in sensitive}
+        # Collections are read concurrently (each a step ahead of the writer)
         if 'resumes' in collections:
-            rows = resume_list()
-            results['resumes'] = rows
-            counts['resumes'] = len(rows)
+            sections.append(('resumes', Prefetch(collection_iter('resumes'))))
         if 'jobs' in collections:
-            rows = job_list()
-            results['jobs'] = rows
-            counts['jobs'] = len(rows)
+            sections.append(('jobs', Prefetch(collection_iter('jobs'))))
         if 'messages' in collections:
-            rows = message_list()
-            results['contact_messages'] = rows
-            counts['contact_messages'] = len(rows)
+            sections.append(('contact_messages', Prefetch(collection_iter('contact_messages'))))
         if 'job_posts' in collections:
-            rows = jobpost_list()
-            results['job_posts'] = rows
-            counts['job_posts'] = len(rows)
+            sections.append(('job_posts', Prefetch(jobpost_iter())))
         if 'settings' in collections:
-            sensitive = {'admin_password', 'groq_api_key'}
-            rows = Setting.query.all()
-            results['settings'] = {r.key: r.value or '' for r in rows if r.key not in sensitive}
-            counts['settings'] = len(results['settings'])
-        export_data = {
-            'exported_at': datetime.datetime.utcnow().isoformat() + 'Z',
-            **results,
-        }
-        ts = datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        return Response(
-            _json.dumps(export_data, indent=2, default=str),
-            mimetype='application/json',
-            headers={'Content-Disposition': f'attachment; filename=firestore_export_{ts}.json'},
-        )
+            sections.append(('settings', settings_data))
     except Exception as e:
+        _close_sections(sections)
         return jsonify({'success': False, 'error': str(e)}), 500
+    return _json_download(sections, 'firestore_export', gzip=_wants_gzip(data.get('gzip')))
 
 
 @admin_bp.route('/api/firebase/import', methods=['POST'])
@@ -648,21 +714,63 @@ def delete_report(rid):
     return jsonify({'success': True})
 
 
-# ── SYNC API (Firebase is now primary — no sync needed) ───────────────────────
+# ── PROFILES ─────────────────────────────────────────────────────────────────
+
+@admin_bp.route('/api/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    from utils.profiler import list_profiles as _list_profiles
+    return jsonify(_list_profiles())
+
+
+@admin_bp.route('/api/profiles/<profile_id>/<kind>', methods=['GET'])
+@admin_required
+def download_profile(profile_id, kind):
+    from flask import send_file
+    from utils.profiler import KINDS, profile_path
+    path = profile_path(profile_id, kind)
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype=KINDS[kind], as_attachment=True, download_name=f'{profile_id}.{kind}')
+
+
+# ── SYNC API (write-behind backend) ─────────────────────────────────────────
 
 @admin_bp.route('/api/sync/status', methods=['GET'])
 @admin_required
 def sync_status():
-    return jsonify({'available': True, 'message': 'Firebase is the only database. All data is live in Firestore.'})
+    from utils.sync_manager import sync_status as _sync_status
+    status = _sync_status()
+    if not status['enabled']:
+        status['message'] = 'Sync is off: set STORAGE_BACKEND=writebehind to serve from a local store synced to Firestore.'
+    return jsonify(dict(status, available=status['enabled']))
 
 
 @admin_bp.route('/api/sync/push', methods=['POST'])
 @admin_required
 def sync_push():
-    return jsonify({'success': True, 'message': 'Firebase is the only database. All data is already in Firestore.'})
+    from utils.sync_manager import full_push_to_firebase, sync_status as _sync_status
+    if not _sync_status()['enabled']:
+        return jsonify({'success': True, 'message': 'Write-behind sync is off; all data is already in Firestore.'})
+    try:
+        pushed = full_push_to_firebase()
+    except Exception as e:
+        logger.error('Sync push failed: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, 'pushed': pushed, 'message': f'Pushed {pushed} document(s) to Firestore.'})
 
 
 @admin_bp.route('/api/sync/restore', methods=['POST'])
 @admin_required
 def sync_restore():
-    return jsonify({'success': True, 'message': 'Firebase is the only database. All data is already in Firestore.'})
+    from utils.sync_manager import restore_from_firebase, sync_status as _sync_status
+    if not _sync_status()['enabled']:
+        return jsonify({'success': True, 'message': 'Write-behind sync is off; all data is already in Firestore.'})
+    try:
+        restored = restore_from_firebase()
+    except Exception as e:
+        logger.error('Sync restore failed: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+    Setting.invalidate_cache()
+    return jsonify({'success': True, 'restored': restored,
+                    'message': f'Restored {restored} document(s) from Firestore.'})
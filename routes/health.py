@@ -0,0 +1,51 @@
+import os
+import time
+
+from flask import Blueprint, jsonify
+
+health_bp = Blueprint('health', __name__)
+
+_STARTED_AT = time.time()
+
+
+def _liveness():
+    return {'status': 'alive', 'pid': os.getpid(), 'uptime_s': round(time.time() - _STARTED_AT, 1)}
+
+
+@health_bp.route('/health/live', methods=['GET'])
+def live():
+    """Liveness: the worker is up and serving requests. Never touches Firestore."""
+    return jsonify(_liveness())
+
+
+@health_bp.route('/health', methods=['GET'])
+@health_bp.route('/health/ready', methods=['GET'])
+def ready():
+    """
+    Readiness: 200 once the background Firestore check has connected, 503
+    while it is still running or when Firestore is unavailable. The app keeps
+    serving static pages and /setup either way. With a non-Firestore storage
+    backend, readiness is a ping of that backend.
+    """
+    from utils.storage import get_backend
+    backend = get_backend()
+    if backend.name != 'firestore':
+        try:
+            backend.ping()
+            storage = {'backend': backend.name, 'state': 'ready'}
+        except Exception as e:
+            storage = {'backend': backend.name, 'state': 'unavailable', 'error': str(e)}
+        if backend.name == 'writebehind':
+            from utils.sync_manager import sync_status
+            storage['sync'] = sync_status()
+        is_ready = storage['state'] == 'ready'
+        body = dict(_liveness(), status=storage['state'], ready=is_ready, storage=storage)
+        return jsonify(body), 200 if is_ready else 503
+
+    from utils.collection_mirror import mirror_status
+    from utils.firestore_manager import health_status
+    firestore = health_status()
+    is_ready = firestore['state'] == 'ready'
+    body = dict(_liveness(), status='ready' if is_ready else firestore['state'], ready=is_ready,
+                firestore=firestore, mirrors=mirror_status())
+    return jsonify(body), 200 if is_ready else 503
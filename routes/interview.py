@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify
-from utils.ai_engine import generate_interview_questions
-from utils.analyzer import parse_json_safely
+from utils.ai_engine import generate_interview_questions, StructuredOutputError
 
 interview_bp = Blueprint('interview', __name__)
 
@@ -11,20 +10,10 @@ def generate_questions():
     job_description = data.get('job_description', '').strip()
     if not job_description:
         return jsonify({'error': 'job_description is required'}), 400
-    raw = ''
     try:
-        raw = generate_interview_questions(job_description)
-        questions = parse_json_safely(raw)
-        if not isinstance(questions, list):
-            raise ValueError('AI did not return a valid list of questions')
-        # Ensure each item has required keys
-        cleaned = []
-        for q in questions:
-            if isinstance(q, dict) and 'question' in q:
-                cleaned.append({
-                    'question': q.get('question', ''),
-                    'sample_answer': q.get('sample_answer', q.get('answer', 'No sample answer provided.')),
-                })
-        return jsonify({'questions': cleaned})
+        result = generate_interview_questions(job_description)
+        return jsonify({'questions': [q.model_dump() for q in result.questions]})
+    except StructuredOutputError as e:
+        return jsonify({'error': str(e), 'raw': e.raw[:500]}), 500
     except Exception as e:
-        return jsonify({'error': str(e), 'raw': raw[:500] if raw else ''}), 500
+        return jsonify({'error': str(e), 'raw': ''}), 500
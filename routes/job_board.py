@@ -1,11 +1,13 @@
 import io
+import itertools
 import logging
 from datetime import datetime
 from functools import wraps
 
-from flask import Blueprint, jsonify, request, send_file, session
+from flask import Blueprint, Response, jsonify, request, send_file, session, stream_with_context
 
 from models.settings import Setting
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 job_board_bp = Blueprint('job_board', __name__, url_prefix='/api/jobboard')
@@ -124,6 +126,7 @@ def shorten_url():
 
 
 @job_board_bp.get('/generate-ad/<int:post_id>')
+@metrics.scoped(metrics.ai_function)
 def generate_ad(post_id):
     """Generate AI social media job ad copy for a job post."""
     import concurrent.futures
@@ -178,7 +181,7 @@ def generate_ad(post_id):
             f"include 3-5 relevant hashtags at the end, and include the apply link ({short_url}). "
             "Return only the post text — no labels, no explanations."
         )
-        return ai_generate(system, prompt, max_tokens=400, temperature=0.8)
+        return ai_generate(system, prompt, max_tokens=400, temperature=0.8, task='ad_linkedin')
 
     def _twitter():
         prompt = (
@@ -187,7 +190,7 @@ def generate_ad(post_id):
             f"include 2-3 hashtags, and include the apply link ({short_url}). "
             "Return only the tweet text — no labels, no explanations."
         )
-        return ai_generate(system, prompt, max_tokens=120, temperature=0.8)
+        return ai_generate(system, prompt, max_tokens=120, temperature=0.8, task='ad_twitter')
 
     def _whatsapp():
         prompt = (
@@ -198,13 +201,13 @@ def generate_ad(post_id):
             "Do NOT use markdown formatting like ** or __. "
             "Return only the message text — no labels, no explanations."
         )
-        return ai_generate(system, prompt, max_tokens=350, temperature=0.8)
+        return ai_generate(system, prompt, max_tokens=350, temperature=0.8, task='ad_whatsapp')
 
     try:
         with concurrent.futures.ThreadPoolExecutor(max_workers=3) as ex:
-            f_li = ex.submit(_linkedin)
-            f_tw = ex.submit(_twitter)
-            f_wa = ex.submit(_whatsapp)
+            f_li = metrics.submit(ex, _linkedin)
+            f_tw = metrics.submit(ex, _twitter)
+            f_wa = metrics.submit(ex, _whatsapp)
             linkedin_text = f_li.result(timeout=30)
             twitter_text  = f_tw.result(timeout=30)
             whatsapp_text = f_wa.result(timeout=30)
@@ -273,6 +276,9 @@ def _ai_rewrite_job(post_dict: dict) -> str:
     src = (post_dict.get('original_description') or post_dict.get('description') or '').strip()
     if len(src) < 80:
         return src
+    shared = _shared_rewrite(post_dict)
+    if shared:
+        return shared
     try:
         return rewrite_job_description(
             title=post_dict.get('title', ''),
@@ -284,12 +290,44 @@ def _ai_rewrite_job(post_dict: dict) -> str:
         return src
 
 
+def _dedup_key(post_dict: dict) -> str:
+    """Near-duplicates must also share a (normalised) title to reuse a rewrite."""
+    from utils.fingerprint import normalize_text
+    return normalize_text(post_dict.get('title') or '')
+
+
+def _post_fingerprint(post_dict: dict) -> str:
+    from utils.fingerprint import fingerprint
+    return post_dict.get('content_fingerprint') or fingerprint(post_dict.get('original_description') or '')
+
+
+def _shared_rewrite(post_dict: dict):
+    """Return the rewrite of the post this one duplicates, if it already has one."""
+    from utils.data_layer import jobpost_get_raw
+    dup_of = post_dict.get('duplicate_of')
+    if not dup_of:
+        return None
+    try:
+        canonical = jobpost_get_raw(dup_of)
+    except Exception:
+        return None
+    if canonical and canonical.get('ai_rewritten') and canonical.get('description'):
+        return canonical['description']
+    return None
+
+
+# Seconds one auto-rewrite call waits for the AI before returning what finished
+AUTO_REWRITE_TIMEOUT = 90
+
+
 @job_board_bp.post('/auto-rewrite')
 @admin_required
 def auto_rewrite():
     import concurrent.futures
     from utils.data_layer import jobpost_list_raw, jobpost_count, jobpost_update
-    batch = min(int((request.get_json(silent=True) or {}).get('batch', 5)), 10)
+    payload = request.get_json(silent=True) or {}
+    batch = min(int(payload.get('batch', 5)), 10)
+    batched = bool(payload.get('batched', True))
 
     pending = jobpost_list_raw(status='published', ai_rewritten=False, limit=batch)
     total_remaining = jobpost_count(status='published', ai_rewritten=False)
@@ -305,26 +343,94 @@ def auto_rewrite():
             logger.warning('Auto-rewrite failed for job %s: %s', post_id, e)
             return post_id, None
 
+    def _call_ai_batch(group):
+        """Rewrite a group of short posts in one request; retry any missing ones singly."""
+        from utils.ai_engine import rewrite_job_descriptions_batch
+        try:
+            results = rewrite_job_descriptions_batch([
+                {'id': pid, 'title': t, 'company': c, 'raw_description': src}
+                for pid, t, c, src in group
+            ])
+        except Exception as e:
+            logger.warning('Batched rewrite of %d jobs failed, falling back to single calls: %s', len(group), e)
+            results = {}
+        pairs = [(pid, results[pid]) for pid, _, _, _ in group if pid in results]
+        pairs += [_call_ai(*task) for task in group if task[0] not in results]
+        return pairs
+
+    from utils.fingerprint import SimhashIndex
+
+    # Near-duplicate posts share one rewrite: reuse an existing rewrite of the
+    # post they duplicate, or send only the first copy in this batch to the AI.
     tasks = []
+    rewrite_map = {}
+    followers = {}
+    index = SimhashIndex()
     for p in pending:
         src = (p.get('original_description') or p.get('description') or '').strip()
-        if len(src) >= 80:
-            tasks.append((p['id'], p.get('title') or '', p.get('company') or '', src))
-
-    rewrite_map = {}
-    if tasks:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(tasks), 5)) as ex:
-            futures = {ex.submit(_call_ai, pid, t, c, src): pid for pid, t, c, src in tasks}
-            for f in concurrent.futures.as_completed(futures, timeout=60):
-                try:
-                    pid, rewritten = f.result()
+        if len(src) < 80:
+            continue
+        shared = _shared_rewrite(p)
+        if shared:
+            rewrite_map[p['id']] = shared
+            continue
+        fp = _post_fingerprint(p)
+        key = _dedup_key(p)
+        leader = index.find(fp, key)
+        if leader is not None:
+            followers.setdefault(leader, []).append(p['id'])
+            continue
+        index.add(p['id'], fp, key)
+        tasks.append((p['id'], p.get('title') or '', p.get('company') or '', src))
+
+    # Short posts are packed into shared requests so the long system prompt is
+    # paid once per group instead of once per post.
+    units = []
+    if batched:
+        from utils.ai_engine import BATCH_REWRITE_MAX_CHARS, BATCH_REWRITE_MAX_POSTS
+        short = [t for t in tasks if len(t[3]) <= BATCH_REWRITE_MAX_CHARS]
+        tasks = [t for t in tasks if len(t[3]) > BATCH_REWRITE_MAX_CHARS]
+        for i in range(0, len(short), BATCH_REWRITE_MAX_POSTS):
+            group = short[i:i + BATCH_REWRITE_MAX_POSTS]
+            if len(group) == 1:
+                tasks.append(group[0])
+            else:
+                units.append((_call_ai_batch, (group,), [t[0] for t in group]))
+    units += [(lambda *task: [_call_ai(*task)], task, [task[0]]) for task in tasks]
+
+    # Posts whose AI call has not finished in time are left unmarked, so the
+    # next call retries them instead of the whole request failing.
+    unfinished = set()
+    if units:
+        ex = concurrent.futures.ThreadPoolExecutor(max_workers=min(len(units), 5))
+        futures = {metrics.submit(ex, fn, *args): pids for fn, args, pids in units}
+        try:
+            concurrent.futures.wait(futures, timeout=AUTO_REWRITE_TIMEOUT)
+        finally:
+            ex.shutdown(wait=False, cancel_futures=True)
+        for f, pids in futures.items():
+            if f.cancelled() or not f.done():
+                unfinished.update(pids)
+                continue
+            try:
+                for pid, rewritten in f.result():
                     rewrite_map[pid] = rewritten
-                except Exception as e:
-                    logger.warning('Future failed: %s', e)
+            except Exception as e:
+                logger.warning('Future failed: %s', e)
+        if unfinished:
+            logger.warning('Auto-rewrite timed out; %d job(s) left for the next call', len(unfinished))
+    for leader, dup_ids in followers.items():
+        for pid in dup_ids:
+            if leader in unfinished:
+                unfinished.add(pid)
+            else:
+                rewrite_map[pid] = rewrite_map.get(leader)
 
     done = 0
     for post in pending:
         pid = post['id']
+        if pid in unfinished:
+            continue
         update_data = {'ai_rewritten': True}
         if pid in rewrite_map and rewrite_map[pid]:
             update_data['description'] = rewrite_map[pid]
@@ -459,145 +565,133 @@ def featured_posts():
 
 # ── Export API ──────────────────────────────────────────────────────────────
 
+def _export_tags(p):
+    tags = p.get('tags', [])
+    if isinstance(tags, list):
+        return ', '.join(tags)
+    return tags or ''
+
+
+def _export_txt(posts):
+    for i, p in enumerate(posts):
+        lines = ['=' * 60]
+        lines.append(f'Title:    {p.get("title", "")}')
+        lines.append(f'Company:  {p.get("company") or "N/A"}')
+        lines.append(f'Location: {p.get("location") or "N/A"}')
+        lines.append(f'Type:     {p.get("job_type") or "N/A"}')
+        if p.get('salary'):
+            lines.append(f'Salary:   {p["salary"]}')
+        if p.get('apply_url'):
+            lines.append(f'Apply:    {p["apply_url"]}')
+        tags = _export_tags(p)
+        if tags:
+            lines.append(f'Tags:     {tags}')
+        desc = (p.get('description') or p.get('original_description') or '').strip()
+        if desc:
+            lines.append('')
+            lines.append(desc[:800])
+        lines.append('')
+        yield ('\n' if i else '') + '\n'.join(lines)
+
+
+_CSV_COLUMNS = ('id', 'title', 'company', 'location', 'job_type', 'salary', 'tags', 'apply_url', 'description')
+
+
+def _export_csv(posts):
+    import csv
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(_CSV_COLUMNS)
+    for p in posts:
+        row = dict(p, tags=_export_tags(p),
+                   description=(p.get('description') or p.get('original_description') or '').strip())
+        writer.writerow([row.get(c) if row.get(c) is not None else '' for c in _CSV_COLUMNS])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+
+def _export_ndjson(posts):
+    import json as _json
+    for p in posts:
+        yield _json.dumps(p, ensure_ascii=False, default=str) + '\n'
+
+
+_STREAM_FORMATS = {
+    'txt': ('text/plain', _export_txt),
+    'csv': ('text/csv', _export_csv),
+    'ndjson': ('application/x-ndjson', _export_ndjson),
+}
+
+
 @job_board_bp.post('/export')
 @admin_required
 def export_jobs():
-    from utils.data_layer import jobpost_list
+    from utils.export_worker import (EXPORT_FORMATS, export_query, export_status,
+                                     iter_export_posts, submit_export)
+    from utils.json_stream import encode_chunks
     data = request.get_json(silent=True) or {}
-    ids = data.get('ids', [])
     fmt = data.get('format', 'txt').lower()
-    search = data.get('search', '').strip().lower()
-    job_type = data.get('job_type', '').strip().lower()
+    query = export_query(data.get('ids', []), data.get('search', ''), data.get('job_type', ''))
 
+    if fmt not in _STREAM_FORMATS and fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Invalid format'}), 400
+
+    # Only the first matching post is read here: text formats stream the rest
+    # from the paginated cursor, DOCX/PDF renders fetch them in the worker.
     try:
-        posts = jobpost_list(status='published')
+        posts_iter = iter_export_posts(query)
+        first = next(posts_iter, None)
     except Exception as e:
         logger.warning('export_jobs Firebase error: %s', e)
         return jsonify({'error': 'Database unavailable: ' + str(e)}), 503
+    if first is None:
+        return jsonify({'error': 'No jobs to export'}), 400
 
-    if ids:
-        id_set = {int(i) for i in ids if str(i).isdigit()}
-        posts = [p for p in posts if p.get('id') in id_set]
-    else:
-        if search:
-            posts = [p for p in posts if
-                     search in (p.get('title') or '').lower()
-                     or search in (p.get('company') or '').lower()
-                     or search in (p.get('location') or '').lower()
-                     or search in str(p.get('tags') or '').lower()
-                     or search in (p.get('description') or '').lower()
-                     or search in (p.get('original_description') or '').lower()]
-        if job_type:
-            posts = [p for p in posts if job_type in (p.get('job_type') or '').lower()]
+    if fmt in _STREAM_FORMATS:
+        mimetype, render = _STREAM_FORMATS[fmt]
+        body = encode_chunks(render(itertools.chain([first], posts_iter)))
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=job_listings.{fmt}'},
+        )
 
-    if not posts:
-        return jsonify({'error': 'No jobs to export'}), 400
+    # DOCX/PDF rendering is CPU-bound and can outlast the request timeout, so it
+    # runs in a worker process; the client polls the status URL and downloads.
+    try:
+        job_id = submit_export(fmt, query)
+    except Exception as e:
+        logger.error('export_jobs enqueue failed: %s', e)
+        return jsonify({'error': 'Could not start export: ' + str(e)}), 500
+    status = export_status(job_id) or {'job_id': job_id, 'status': 'pending'}
+    status.update(
+        status_url=f'/api/jobboard/export/{job_id}',
+        download_url=f'/api/jobboard/export/{job_id}/download',
+    )
+    return jsonify(status), 202
 
-    def _tags_str(p):
-        tags = p.get('tags', [])
-        if isinstance(tags, list):
-            return ', '.join(tags)
-        return tags or ''
-
-    if fmt == 'txt':
-        lines = []
-        for p in posts:
-            lines.append('=' * 60)
-            lines.append(f'Title:    {p.get("title", "")}')
-            lines.append(f'Company:  {p.get("company") or "N/A"}')
-            lines.append(f'Location: {p.get("location") or "N/A"}')
-            lines.append(f'Type:     {p.get("job_type") or "N/A"}')
-            if p.get('salary'):
-                lines.append(f'Salary:   {p["salary"]}')
-            if p.get('apply_url'):
-                lines.append(f'Apply:    {p["apply_url"]}')
-            tags = _tags_str(p)
-            if tags:
-                lines.append(f'Tags:     {tags}')
-            desc = (p.get('description') or p.get('original_description') or '').strip()
-            if desc:
-                lines.append('')
-                lines.append(desc[:800])
-            lines.append('')
-        content = '\n'.join(lines).encode('utf-8')
-        buf = io.BytesIO(content)
-        buf.seek(0)
-        return send_file(buf, mimetype='text/plain',
-                         as_attachment=True, download_name='job_listings.txt')
-
-    elif fmt == 'docx':
-        from docx import Document
-        from docx.shared import Pt, RGBColor
-        doc = Document()
-        doc.add_heading('Job Listings Export', 0)
-        for p in posts:
-            h = doc.add_heading(p.get('title', ''), level=1)
-            h.runs[0].font.color.rgb = RGBColor(0x4F, 0x46, 0xE5)
-            details = []
-            if p.get('company'):  details.append(f'Company: {p["company"]}')
-            if p.get('location'): details.append(f'Location: {p["location"]}')
-            if p.get('job_type'): details.append(f'Type: {p["job_type"]}')
-            if p.get('salary'):   details.append(f'Salary: {p["salary"]}')
-            if p.get('apply_url'): details.append(f'Apply: {p["apply_url"]}')
-            tags = _tags_str(p)
-            if tags: details.append(f'Tags: {tags}')
-            for d in details:
-                para = doc.add_paragraph(d)
-                para.runs[0].bold = True
-            desc = (p.get('description') or p.get('original_description') or '').strip()
-            if desc:
-                doc.add_paragraph(desc[:800])
-            doc.add_paragraph('')
-        buf = io.BytesIO()
-        doc.save(buf)
-        buf.seek(0)
-        return send_file(buf,
-                         mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                         as_attachment=True, download_name='job_listings.docx')
-
-    elif fmt == 'pdf':
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import mm
-        from reportlab.lib import colors
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
-        buf = io.BytesIO()
-        doc_pdf = SimpleDocTemplate(buf, pagesize=A4,
-                                    leftMargin=20*mm, rightMargin=20*mm,
-                                    topMargin=20*mm, bottomMargin=20*mm)
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle('jb_title', parent=styles['Heading1'],
-                                     textColor=colors.HexColor('#4F46E5'), fontSize=14, spaceAfter=4)
-        meta_style = ParagraphStyle('jb_meta', parent=styles['Normal'],
-                                    textColor=colors.HexColor('#475569'), fontSize=9, spaceAfter=2)
-        desc_style = ParagraphStyle('jb_desc', parent=styles['Normal'],
-                                    fontSize=9, leading=13, spaceAfter=6,
-                                    textColor=colors.HexColor('#334155'))
-        story = [Paragraph('Job Listings Export', styles['Title']), Spacer(1, 8*mm)]
-        for p in posts:
-            story.append(Paragraph(p.get('title') or 'Untitled', title_style))
-            meta_parts = []
-            if p.get('company'):   meta_parts.append(f'<b>Company:</b> {p["company"]}')
-            if p.get('location'):  meta_parts.append(f'<b>Location:</b> {p["location"]}')
-            if p.get('job_type'):  meta_parts.append(f'<b>Type:</b> {p["job_type"]}')
-            if p.get('salary'):    meta_parts.append(f'<b>Salary:</b> {p["salary"]}')
-            if p.get('apply_url'): meta_parts.append(f'<b>Apply:</b> {p["apply_url"]}')
-            tags = _tags_str(p)
-            if tags: meta_parts.append(f'<b>Tags:</b> {tags}')
-            for m in meta_parts:
-                story.append(Paragraph(m, meta_style))
-            desc = (p.get('description') or p.get('original_description') or '').strip()
-            if desc:
-                safe_desc = desc[:800].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                story.append(Paragraph(safe_desc, desc_style))
-            story.append(HRFlowable(width='100%', thickness=0.5, color=colors.HexColor('#E2E8F0')))
-            story.append(Spacer(1, 5*mm))
-        doc_pdf.build(story)
-        buf.seek(0)
-        return send_file(buf, mimetype='application/pdf',
-                         as_attachment=True, download_name='job_listings.pdf')
 
-    return jsonify({'error': 'Invalid format'}), 400
+@job_board_bp.get('/export/<job_id>')
+@admin_required
+def export_job_status(job_id):
+    from utils.export_worker import export_status
+    status = export_status(job_id)
+    if status is None:
+        return jsonify({'error': 'Export not found or expired'}), 404
+    status['download_url'] = f'/api/jobboard/export/{job_id}/download'
+    return jsonify(status)
+
+
+@job_board_bp.get('/export/<job_id>/download')
+@admin_required
+def export_job_download(job_id):
+    from utils.export_worker import export_artifact
+    artifact = export_artifact(job_id)
+    if artifact is None:
+        return jsonify({'error': 'Export not ready, failed or expired'}), 404
+    path, mimetype, download_name = artifact
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=download_name)
 
 
 # ── Admin API ───────────────────────────────────────────────────────────────
@@ -703,7 +797,7 @@ def admin_rewrite(post_id):
 @job_board_bp.post('/admin/fetch')
 @admin_required
 def admin_fetch():
-    from utils.data_layer import jobpost_find_by_external_id, jobpost_create, jobpost_count
+    from utils.data_layer import jobpost_find_by_external_id, jobpost_create, jobpost_count, jobpost_list_raw
     data = request.get_json(silent=True) or {}
     sources = data.get('sources', ['remotive', 'arbeitnow', 'remoteok'])
     search = data.get('search', '')
@@ -725,15 +819,29 @@ def admin_fetch():
         logger.error('Aggregation error: %s', e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+    from utils.fingerprint import SimhashIndex, fingerprint
+    index = SimhashIndex()
+    try:
+        for existing in jobpost_list_raw():
+            index.add(existing['id'], _post_fingerprint(existing), _dedup_key(existing))
+    except Exception as e:
+        logger.warning('Could not load fingerprints for duplicate detection: %s', e)
+
     added = 0
     skipped = 0
+    duplicates = 0
     for p in posts_data:
         ext_id = p.get('external_id', '')
         if ext_id and jobpost_find_by_external_id(ext_id):
             skipped += 1
             continue
         desc = p.get('original_description', '')
-        jobpost_create({
+        content_fp = fingerprint(desc)
+        key = _dedup_key(p)
+        duplicate_of = index.find(content_fp, key)
+        if duplicate_of is not None:
+            duplicates += 1
+        created = jobpost_create({
             'external_id': ext_id,
             'source': p.get('source', 'unknown'),
             'title': p.get('title', ''),
@@ -745,8 +853,12 @@ def admin_fetch():
             'apply_url': p.get('apply_url', ''),
             'original_description': desc,
             'description': desc,
+            'content_fingerprint': content_fp,
+            'duplicate_of': duplicate_of,
             'status': 'draft',
         })
+        if duplicate_of is None:
+            index.add(created['id'], content_fp, key)
         added += 1
 
     pending_rewrite = jobpost_count(status='published', ai_rewritten=False)
@@ -754,6 +866,7 @@ def admin_fetch():
         'success': True,
         'added': added,
         'skipped': skipped,
+        'duplicates': duplicates,
         'total': len(posts_data),
         'pending_rewrite': pending_rewrite,
     })
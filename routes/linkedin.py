@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify
-from utils.ai_engine import optimize_linkedin_profile
-from utils.analyzer import parse_json_safely
+from utils.ai_engine import optimize_linkedin_profile, StructuredOutputError
 
 linkedin_bp = Blueprint('linkedin', __name__)
 
@@ -14,15 +13,13 @@ def optimize():
     industry = data.get('industry', '').strip()
     if not headline and not about:
         return jsonify({'error': 'headline or about section is required'}), 400
-    raw = ''
     try:
-        raw = optimize_linkedin_profile(headline, about, job_title, industry)
-        result = parse_json_safely(raw)
-        if not isinstance(result, dict):
-            raise ValueError('AI did not return valid JSON')
+        result = optimize_linkedin_profile(headline, about, job_title, industry)
         return jsonify({
-            'headline': result.get('headline', headline),
-            'about': result.get('about', about),
+            'headline': result.headline or headline,
+            'about': result.about or about,
         })
+    except StructuredOutputError as e:
+        return jsonify({'error': str(e), 'raw': e.raw[:500]}), 500
     except Exception as e:
-        return jsonify({'error': str(e), 'raw': raw[:500] if raw else ''}), 500
+        return jsonify({'error': str(e), 'raw': ''}), 500
@@ -0,0 +1,24 @@
+import hmac
+import os
+
+from flask import Blueprint, Response, request, session
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _authorized():
+    """An admin session, or ``Authorization: Bearer $METRICS_TOKEN`` for Prometheus scrapers."""
+    if session.get('admin_logged_in'):
+        return True
+    token = os.environ.get('METRICS_TOKEN')
+    auth = request.headers.get('Authorization', '')
+    return bool(token) and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:], token)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Metrics of all workers in the Prometheus text format (see utils.metrics)."""
+    from utils.metrics import CONTENT_TYPE, render
+    if not _authorized():
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render(), content_type=CONTENT_TYPE)
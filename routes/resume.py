@@ -1,3 +1,4 @@
+import hashlib
 import json
 from flask import Blueprint, request, jsonify, send_file, abort
 from utils.data_layer import (
@@ -6,7 +7,7 @@ from utils.data_layer import (
 from utils.parser import extract_text
 from utils.ai_engine import optimize_resume, generate_cover_letter, rewrite_section, generate_resume_from_skills
 from utils.analyzer import get_match_analysis
-from utils.pdf_exporter import generate_pdf
+from utils.pdf_exporter import cached_pdf, pdf_cache_key
 
 resume_bp = Blueprint('resume', __name__)
 
@@ -22,7 +23,8 @@ def upload_resume():
     if not file.filename.lower().endswith(allowed):
         return jsonify({'error': 'Only PDF and DOCX files are supported'}), 400
     try:
-        text = extract_text(file.read(), file.filename)
+        # Hand the spooled upload stream to the parser instead of copying it into memory
+        text = extract_text(file.stream, file.filename)
         if not text.strip():
             return jsonify({'error': 'Could not extract text from the file. The file may be image-based.'}), 400
         return jsonify({'text': text, 'success': True})
@@ -161,8 +163,17 @@ def export_resume(resume_id, doc_type):
     if not content.strip():
         return jsonify({'error': 'No content available to export for this document'}), 400
 
+    # updated_at changes on every save; the content digest covers legacy rows without it
+    etag = pdf_cache_key(r['id'], doc_type, r.get('updated_at'),
+                         hashlib.sha256(f'{title}\0{content}'.encode('utf-8')).hexdigest())
+    if etag in request.if_none_match:
+        return '', 304, {'ETag': f'"{etag}"'}
+
     try:
-        pdf_buffer = generate_pdf(title, content)
-        return send_file(pdf_buffer, mimetype='application/pdf', as_attachment=True, download_name=filename)
+        pdf = cached_pdf(etag, title, content)
+        resp = send_file(pdf, mimetype='application/pdf', as_attachment=True, download_name=filename,
+                         etag=etag, max_age=0)
+        resp.headers['Cache-Control'] = 'private, no-cache'
+        return resp
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -13,7 +13,7 @@ def setup_page():
     import utils.firestore_manager as _fm
     from utils.credentials_store import is_firebase_configured
     configured = is_firebase_configured()
-    return render_template('setup.html', already_configured=configured, firebase_failed=_fm._firebase_failed)
+    return render_template('setup.html', already_configured=configured, firebase_failed=not _fm.is_firebase_available())
 
 
 @setup_bp.route('/setup', methods=['POST'])
@@ -46,7 +46,7 @@ def setup_submit():
         return jsonify({'success': False, 'error': 'Could not save credentials to the database. Check server logs.'}), 500
 
     reset_firebase_app()
-    startup_check()
+    startup_check(wait=True)
 
     return jsonify({
         'success': True,
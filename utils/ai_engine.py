@@ -1,5 +1,15 @@
+import json
+import logging
 import os
-from groq import Groq
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
 
 
 def _get_api_key():
@@ -35,6 +45,40 @@ def _get_model():
         return DEFAULT_MODEL
 
 
+DEFAULT_FAST_MODEL = 'llama-3.1-8b-instant'
+
+# Short or structured tasks routed to the fast tier by default. Any task can be
+# pinned to a specific model with an ``ai_model_<task>`` setting.
+FAST_TASKS = {
+    'analyze_match', 'analyze_job_description',
+    'ad_linkedin', 'ad_twitter', 'ad_whatsapp',
+}
+
+
+def _get_fast_model():
+    try:
+        from models.settings import Setting
+        model = Setting.get('ai_fast_model', DEFAULT_FAST_MODEL) or DEFAULT_FAST_MODEL
+        return DEFAULT_FAST_MODEL if model in DEPRECATED_MODELS else model
+    except Exception:
+        return DEFAULT_FAST_MODEL
+
+
+def _get_task_model(task):
+    """Resolve the model for a task: per-task override, then fast tier, then the main model."""
+    if task:
+        try:
+            from models.settings import Setting
+            override = Setting.get(f'ai_model_{task}', '')
+            if override and override not in DEPRECATED_MODELS:
+                return override
+        except Exception:
+            pass
+        if task in FAST_TASKS:
+            return _get_fast_model()
+    return _get_model()
+
+
 def _get_max_tokens():
     try:
         from models.settings import Setting
@@ -44,29 +88,381 @@ def _get_max_tokens():
         return 4096
 
 
+@lru_cache(maxsize=1)
+def _groq():
+    """The groq SDK, imported on first use — it is the slowest import in the app."""
+    import groq
+    return groq
+
+
 def get_client():
     api_key = _get_api_key()
     if not api_key:
         raise ValueError("No Groq API key configured. Please add it in the Admin Panel at /julisunkan")
-    return Groq(api_key=api_key)
+    # Retries are owned by the rate governor so 429s back off together
+    return _groq().Groq(api_key=api_key, max_retries=0)
+
+
+# ── Rate governor ─────────────────────────────────────────────────────────────
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_RPM = 30
+DEFAULT_TPM = 6000
+MAX_RATE_LIMIT_RETRIES = 4
+# Completion tokens reserved for a kind of call before any of its responses were seen
+DEFAULT_COMPLETION_ESTIMATE = 512
+# Weight of the newest response in the running average of completion tokens
+_COMPLETION_EWMA = 0.2
+
+_DURATION_RE = re.compile(r'([\d.]+)(ms|h|m|s)')
+
+
+def _parse_duration(value):
+    """Parse Groq reset headers such as '7.66s', '2m59.56s' or '120ms' into seconds."""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    total = 0.0
+    for num, unit in _DURATION_RE.findall(str(value)):
+        n = float(num)
+        total += {'ms': n / 1000, 's': n, 'm': n * 60, 'h': n * 3600}[unit]
+    return total
+
+
+def _estimate_tokens(messages, completion_tokens):
+    chars = sum(len(m.get('content') or '') for m in messages)
+    return chars // 4 + (completion_tokens or 0)
+
+
+class _RateGovernor:
+    """
+    Process-wide limiter shared by every Groq call.
+
+    Combines a concurrency cap with request and token buckets refilled per
+    minute. Callers are admitted strictly in arrival order (ticket queue) so a
+    burst from one endpoint cannot starve the others. Bucket levels are
+    re-synced from the x-ratelimit-* response headers, and a 429 pauses every
+    caller until the provider's reset time.
+
+    Each call reserves its prompt plus the completion length usually seen for
+    that kind of call (a running average, capped at ``max_tokens``) rather
+    than the full ``max_tokens``, which would admit only one call at a time
+    under the default limits. The reservation is settled against the actual
+    usage on release, charging the bucket if a response ran longer.
+    """
+
+    def __init__(self, max_concurrency, rpm, tpm):
+        self.max_concurrency = max(1, max_concurrency)
+        self.rpm = max(1, rpm)
+        self.tpm = max(1, tpm)
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._active = 0
+        self._req_budget = float(self.rpm)
+        self._tok_budget = float(self.tpm)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._completion_avg = {}
+        self.stats = {'calls': 0, 'rate_limited': 0, 'retries': 0, 'wait_seconds': 0.0}
+
+    def _refill(self, now):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._req_budget = min(self.rpm, self._req_budget + elapsed * self.rpm / 60.0)
+        self._tok_budget = min(self.tpm, self._tok_budget + elapsed * self.tpm / 60.0)
+
+    def _delay(self, now, est_tokens):
+        """Seconds until the head of the queue could be admitted (0 if now)."""
+        if self._active >= self.max_concurrency:
+            return None  # woken by release()
+        delay = max(0.0, self._paused_until - now)
+        if self._req_budget < 1:
+            delay = max(delay, (1 - self._req_budget) * 60.0 / self.rpm)
+        if self._tok_budget < est_tokens:
+            delay = max(delay, (est_tokens - self._tok_budget) * 60.0 / self.tpm)
+        return delay
+
+    def acquire(self, est_tokens):
+        est_tokens = min(est_tokens, self.tpm)
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._delay(now, est_tokens) if ticket == self._serving else None
+                    if delay == 0:
+                        break
+                    self._cond.wait(timeout=delay)
+            except BaseException:
+                if ticket == self._serving:
+                    self._serving += 1
+                    self._cond.notify_all()
+                raise
+            self._serving += 1
+            self._active += 1
+            self._req_budget -= 1
+            self._tok_budget -= est_tokens
+            self.stats['calls'] += 1
+            self.stats['wait_seconds'] += time.monotonic() - started
+            self._cond.notify_all()
+
+    def expected_completion(self, key, max_tokens):
+        """Completion tokens to reserve for a call of kind ``key`` limited to ``max_tokens``."""
+        with self._cond:
+            avg = self._completion_avg.get(key)
+        estimate = DEFAULT_COMPLETION_ESTIMATE if avg is None else int(avg * 1.2) + 1
+        return min(max_tokens, estimate) if max_tokens else estimate
+
+    def release(self, est_tokens, used_tokens=None, headers=None, key=None, completion_tokens=None):
+        with self._cond:
+            self._active -= 1
+            if used_tokens is not None:
+                # Settle the reservation: refund what was not used, charge any overrun
+                self._tok_budget = min(self.tpm, self._tok_budget + min(est_tokens, self.tpm) - used_tokens)
+            if key is not None and completion_tokens is not None:
+                avg = self._completion_avg.get(key)
+                self._completion_avg[key] = (
+                    completion_tokens if avg is None else avg + _COMPLETION_EWMA * (completion_tokens - avg)
+                )
+            if headers is not None:
+                self._sync_headers(headers)
+            self._cond.notify_all()
+
+    def _sync_headers(self, headers):
+        now = time.monotonic()
+        try:
+            limit_tokens = headers.get('x-ratelimit-limit-tokens')
+            if limit_tokens:
+                self.tpm = max(1, int(limit_tokens))
+            remaining_tokens = headers.get('x-ratelimit-remaining-tokens')
+            if remaining_tokens is not None:
+                self._tok_budget = min(self._tok_budget, float(remaining_tokens))
+            remaining_requests = headers.get('x-ratelimit-remaining-requests')
+            if remaining_requests is not None:
+                self._req_budget = min(self._req_budget, float(remaining_requests))
+                if float(remaining_requests) <= 0:
+                    reset = _parse_duration(headers.get('x-ratelimit-reset-requests'))
+                    self._paused_until = max(self._paused_until, now + reset)
+        except (TypeError, ValueError) as e:
+            logger.debug('Ignoring malformed rate-limit headers: %s', e)
+
+    def backoff(self, attempt, headers=None):
+        """Pause all callers after a 429 and return how long this caller should sleep."""
+        retry_after = _parse_duration((headers or {}).get('retry-after'))
+        delay = max(retry_after, min(30.0, 2.0 ** attempt)) * random.uniform(1.0, 1.5)
+        with self._cond:
+            self.stats['rate_limited'] += 1
+            self.stats['retries'] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._cond.notify_all()
+        return delay
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def _get_int_setting(key, default):
+    try:
+        from models.settings import Setting
+        val = Setting.get(key, '')
+        return int(val) if val else default
+    except Exception:
+        return default
+
+
+def get_governor():
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = _RateGovernor(
+                _get_int_setting('ai_max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                _get_int_setting('ai_rpm_limit', DEFAULT_RPM),
+                _get_int_setting('ai_tpm_limit', DEFAULT_TPM),
+            )
+        return _governor
+
 
+def reset_governor():
+    """Drop the governor so the next call picks up changed limit settings."""
+    global _governor
+    with _governor_lock:
+        _governor = None
 
-def ai_generate(system_prompt, user_prompt, max_tokens=None, temperature=0.7):
+
+def _chat_completion(messages, max_tokens, temperature, model=None, **kwargs):
+    """Run one chat completion through the rate governor, retrying 429s with jittered backoff."""
     client = get_client()
+    governor = get_governor()
+    model = model or _get_model()
+    function = metrics.ai_function.get() or '-'
+    key = (function, model, max_tokens)
+    est = _estimate_tokens(messages, governor.expected_completion(key, max_tokens))
+    attempt = 0
+    while True:
+        governor.acquire(est)
+        try:
+            with metrics.groq_request_duration.time(function=function, model=model):
+                raw = client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **kwargs,
+                )
+        except _groq().RateLimitError as e:
+            headers = getattr(e.response, 'headers', None)
+            governor.release(est, used_tokens=0, headers=headers)
+            if attempt >= MAX_RATE_LIMIT_RETRIES:
+                raise
+            delay = governor.backoff(attempt, headers)
+            logger.warning('Groq rate limited; retrying in %.1fs (attempt %d)', delay, attempt + 1)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except Exception:
+            governor.release(est)
+            raise
+        response = raw.parse()
+        usage = getattr(response, 'usage', None)
+        governor.release(est, used_tokens=getattr(usage, 'total_tokens', None), headers=raw.headers,
+                         key=key, completion_tokens=getattr(usage, 'completion_tokens', None))
+        for kind in ('prompt', 'completion'):
+            tokens = getattr(usage, f'{kind}_tokens', None)
+            if tokens:
+                metrics.groq_tokens.inc(tokens, function=function, model=model, kind=kind)
+        return response
+
+
+@metrics.scoped(metrics.ai_function)
+def ai_generate(system_prompt, user_prompt, max_tokens=None, temperature=0.7, task=None):
     if max_tokens is None:
         max_tokens = _get_max_tokens()
-    response = client.chat.completions.create(
-        model=_get_model(),
-        messages=[
+    response = _chat_completion(
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ],
         max_tokens=max_tokens,
         temperature=temperature,
+        model=_get_task_model(task),
+    )
+    return response.choices[0].message.content.strip()
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a JSON task cannot be coerced into its schema. ``raw`` holds the last output."""
+
+    def __init__(self, message, raw=''):
+        super().__init__(message)
+        self.raw = raw
+
+
+def _validate_structured(schema, text):
+    """Validate ``text`` against ``schema``, tolerating fences, prose and bare arrays."""
+    from pydantic import ValidationError
+    try:
+        return schema.model_validate_json(text)
+    except ValidationError as e:
+        error = e
+    from utils.analyzer import parse_json_safely
+    data = parse_json_safely(text)
+    if isinstance(data, list) and len(schema.model_fields) == 1:
+        data = {next(iter(schema.model_fields)): data}
+    if data is None:
+        raise error
+    return schema.model_validate(data)
+
+
+def _json_failed_generation(err):
+    """Extract the rejected output from a Groq json_validate_failed error, if present."""
+    body = getattr(err, 'body', None)
+    if isinstance(body, dict):
+        body = body.get('error', body)
+        if isinstance(body, dict) and body.get('code') == 'json_validate_failed':
+            return body.get('failed_generation') or ''
+    return None
+
+
+def _repair_json(schema, raw, error, max_tokens):
+    """Ask the fast model to fix malformed output instead of regenerating it from scratch."""
+    system = (
+        "You repair malformed JSON. Return ONLY a JSON object that matches this JSON schema, "
+        "keeping all of the original content:\n"
+        f"{json.dumps(schema.model_json_schema())}"
+    )
+    user = f"VALIDATION ERROR:\n{str(error)[:800]}\n\nBROKEN OUTPUT:\n{raw[:6000]}"
+    response = _chat_completion(
+        [{"role": "system", "content": system}, {"role": "user", "content": user}],
+        max_tokens=max_tokens, temperature=0, model=_get_fast_model(),
+        response_format={"type": "json_object"},
     )
     return response.choices[0].message.content.strip()
 
 
+@metrics.scoped(metrics.ai_function)
+def ai_generate_json(system_prompt, user_prompt, schema, max_tokens=None, temperature=0.7, task=None):
+    """
+    Generate a response in the provider's JSON mode and validate it with ``schema``.
+
+    Output that fails validation gets a cheap repair pass on the fast model;
+    only if that also fails (and the task was routed to a smaller model) is
+    the generation repeated on the main model. Output cut off at
+    ``max_tokens`` is never repaired: StructuredOutputError is raised at once.
+    Returns a ``schema`` instance.
+    """
+    from pydantic import ValidationError
+    if max_tokens is None:
+        max_tokens = _get_max_tokens()
+    system = (
+        f"{system_prompt}\n"
+        f"Respond with a JSON object matching this JSON schema:\n{json.dumps(schema.model_json_schema())}"
+    )
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user_prompt}
+    ]
+    main_model = _get_model()
+    models = [_get_task_model(task)]
+    if models[0] != main_model:
+        models.append(main_model)
+
+    raw = ''
+    for model in models:
+        try:
+            response = _chat_completion(
+                messages, max_tokens=max_tokens, temperature=temperature, model=model,
+                response_format={"type": "json_object"},
+            )
+            raw = response.choices[0].message.content.strip()
+            if response.choices[0].finish_reason == 'length':
+                # Repairing cut-off output would have the model make up the rest
+                raise StructuredOutputError('AI response was cut off before the JSON was complete.', raw=raw)
+        except _groq().BadRequestError as e:
+            failed = _json_failed_generation(e)
+            if failed is None:
+                raise
+            raw = failed
+        try:
+            return _validate_structured(schema, raw)
+        except (ValidationError, ValueError) as e:
+            error = e
+        try:
+            repaired = _repair_json(schema, raw, error, max_tokens)
+            return _validate_structured(schema, repaired)
+        except Exception as e:
+            logger.info('JSON repair failed for task %s on %s: %s', task, model, e)
+    raise StructuredOutputError('AI did not return valid JSON. Please try again.', raw=raw)
+
+
+@metrics.scoped(metrics.ai_function)
 def optimize_resume(resume_text, job_description):
     system = (
         "You are an expert ATS resume optimizer and career coach. "
@@ -78,6 +474,7 @@ def optimize_resume(resume_text, job_description):
     return ai_generate(system, user)
 
 
+@metrics.scoped(metrics.ai_function)
 def generate_cover_letter(resume_text, job_description):
     system = (
         "You are a professional cover letter writer. "
@@ -88,18 +485,20 @@ def generate_cover_letter(resume_text, job_description):
     return ai_generate(system, user)
 
 
+@metrics.scoped(metrics.ai_function)
 def analyze_match(resume_text, job_description):
+    from utils.schemas import MatchAnalysis
     system = (
         "You are a resume-job match analyzer. Analyze the resume against the job description and return a JSON object with these fields:\n"
         "- score: number from 0-100 (match percentage)\n"
         "- missing_keywords: array of important keywords from job description missing in resume\n"
-        "- suggestions: array of specific improvement suggestions\n"
-        "Return ONLY valid JSON, no markdown, no commentary."
+        "- suggestions: array of specific improvement suggestions"
     )
     user = f"RESUME:\n{resume_text[:2500]}\n\nJOB DESCRIPTION:\n{job_description[:1500]}\n\nAnalyze the match and return JSON."
-    return ai_generate(system, user, max_tokens=1000)
+    return ai_generate_json(system, user, MatchAnalysis, max_tokens=1000, task='analyze_match')
 
 
+@metrics.scoped(metrics.ai_function)
 def rewrite_section(section_text, section_name, job_description):
     system = (
         "You are an expert resume writer. Rewrite the given resume section to be more impactful, "
@@ -110,58 +509,76 @@ def rewrite_section(section_text, section_name, job_description):
     return ai_generate(system, user, max_tokens=800)
 
 
+@metrics.scoped(metrics.ai_function)
 def generate_interview_questions(job_description):
+    from utils.schemas import InterviewQuestions
     system = (
         "You are an interview preparation expert. Generate 10 likely interview questions based on the job description. "
         "For each question, also provide a sample answer. "
-        "Return a JSON array of objects with 'question' and 'sample_answer' fields. "
-        "Return ONLY valid JSON array."
+        "Return a JSON object with a 'questions' array of objects with 'question' and 'sample_answer' fields."
     )
     user = f"JOB DESCRIPTION:\n{job_description[:2000]}\n\nGenerate 10 interview questions with sample answers."
-    return ai_generate(system, user, max_tokens=3000)
+    return ai_generate_json(system, user, InterviewQuestions, max_tokens=3000, task='interview_questions')
 
 
+@metrics.scoped(metrics.ai_function)
 def analyze_job_description(job_description):
+    from utils.schemas import JobAnalysis
     system = (
         "You are a job description analyzer. Analyze the job description and return a JSON object with:\n"
         "- required_skills: array of required technical and soft skills\n"
         "- keywords: array of important ATS keywords\n"
         "- experience_level: string (entry/junior/mid/senior/lead)\n"
-        "- key_responsibilities: array of main responsibilities\n"
-        "Return ONLY valid JSON."
+        "- key_responsibilities: array of main responsibilities"
     )
     user = f"JOB DESCRIPTION:\n{job_description[:2500]}\n\nAnalyze and return JSON."
-    return ai_generate(system, user, max_tokens=1500)
+    return ai_generate_json(system, user, JobAnalysis, max_tokens=1500, task='analyze_job_description')
 
 
+@metrics.scoped(metrics.ai_function)
 def chat_with_career_assistant(messages):
     system = (
         "You are an expert AI career assistant. You help users with resume writing, job searching, "
         "interview preparation, career advice, salary negotiation, and professional development. "
         "Be helpful, specific, and encouraging."
     )
-    client = get_client()
     all_messages = [{"role": "system", "content": system}] + messages
-    response = client.chat.completions.create(
-        model=_get_model(),
-        messages=all_messages,
-        max_tokens=1500,
-        temperature=0.7,
-    )
+    response = _chat_completion(all_messages, max_tokens=1500, temperature=0.7)
     return response.choices[0].message.content.strip()
 
 
+@metrics.scoped(metrics.ai_function)
 def optimize_linkedin_profile(headline, about, job_title, industry):
+    from utils.schemas import LinkedInProfile
     system = (
         "You are a LinkedIn profile optimization expert. "
         "Improve the LinkedIn headline and About section to be more compelling and keyword-rich. "
-        "Return a JSON object with 'headline' and 'about' fields. "
-        "Return ONLY valid JSON."
+        "Return a JSON object with 'headline' and 'about' fields."
     )
     user = f"CURRENT HEADLINE: {headline}\nCURRENT ABOUT: {about[:1000]}\nTARGET JOB TITLE: {job_title}\nINDUSTRY: {industry}\n\nOptimize the LinkedIn profile."
-    return ai_generate(system, user, max_tokens=800)
+    return ai_generate_json(system, user, LinkedInProfile, max_tokens=800, task='linkedin')
+
+
+_JOB_REWRITE_RULES = (
+    "Rules:\n"
+    "- Preserve all factual details: requirements, responsibilities, salary, benefits, apply link\n"
+    "- Use fresh, original language — do not copy phrases verbatim\n"
+    "- Structure output with these sections (only include sections that have content):\n"
+    "  About the Role, Key Responsibilities, Requirements, Nice to Have, Benefits\n"
+    "- Use bullet points (• ) for list items\n"
+    "- Write in a professional, engaging tone — no fluff, no filler\n"
+    "- Output plain text only — no markdown, no HTML, no code fences\n"
+    "- Do NOT add any preamble or commentary — just the rewritten job post"
+)
 
+# Posts at or under this length may be packed into one batched rewrite request
+BATCH_REWRITE_MAX_CHARS = 1500
+BATCH_REWRITE_MAX_POSTS = 5
+# Same output budget per post as rewrite_job_description
+BATCH_REWRITE_TOKENS_PER_POST = 1200
 
+
+@metrics.scoped(metrics.ai_function)
 def rewrite_job_description(title: str, company: str, raw_description: str) -> str:
     """
     Rewrite a raw job description into a clean, structured, professional posting.
@@ -171,15 +588,7 @@ def rewrite_job_description(title: str, company: str, raw_description: str) -> s
     system = (
         "You are a professional job description writer. "
         "Your task is to rewrite raw job postings into clean, well-structured, engaging descriptions. "
-        "Rules:\n"
-        "- Preserve all factual details: requirements, responsibilities, salary, benefits, apply link\n"
-        "- Use fresh, original language — do not copy phrases verbatim\n"
-        "- Structure output with these sections (only include sections that have content):\n"
-        "  About the Role, Key Responsibilities, Requirements, Nice to Have, Benefits\n"
-        "- Use bullet points (• ) for list items\n"
-        "- Write in a professional, engaging tone — no fluff, no filler\n"
-        "- Output plain text only — no markdown, no HTML, no code fences\n"
-        "- Do NOT add any preamble or commentary — just the rewritten job post"
+        f"{_JOB_REWRITE_RULES}"
     )
     user = (
         f"Job Title: {title}\n"
@@ -190,6 +599,50 @@ def rewrite_job_description(title: str, company: str, raw_description: str) -> s
     return ai_generate(system, user, max_tokens=1200, temperature=0.6)
 
 
+@metrics.scoped(metrics.ai_function)
+def rewrite_job_descriptions_batch(posts):
+    """
+    Rewrite several short job descriptions in one request.
+
+    ``posts`` is a list of dicts with ``id``, ``title``, ``company`` and
+    ``raw_description``. Returns ``{id: rewritten_text}`` containing only the
+    posts that came back with a non-empty description; callers should rewrite
+    any missing ids individually with ``rewrite_job_description``, and all of
+    them if this raises (e.g. StructuredOutputError when the response was cut
+    off at the token limit).
+    """
+    from utils.schemas import RewrittenPostBatch
+    if not posts:
+        return {}
+    system = (
+        "You are a professional job description writer. "
+        "You will receive several raw job postings, each delimited by a '### JOB <id>' line. "
+        "Rewrite every posting into a clean, well-structured, engaging description. "
+        f"{_JOB_REWRITE_RULES}\n"
+        "Return a JSON object with a 'posts' array containing one {\"id\", \"description\"} entry per job, "
+        "where description is the rewritten plain-text posting."
+    )
+    blocks = [
+        f"### JOB {p['id']}\n"
+        f"Job Title: {p.get('title', '')}\n"
+        f"Company: {p.get('company', '')}\n"
+        f"Raw description:\n{p['raw_description'][:BATCH_REWRITE_MAX_CHARS]}"
+        for p in posts
+    ]
+    user = '\n\n'.join(blocks) + f"\n\nRewrite all {len(posts)} job postings following the rules above."
+    result = ai_generate_json(
+        system, user, RewrittenPostBatch,
+        max_tokens=BATCH_REWRITE_TOKENS_PER_POST * len(posts), temperature=0.6,
+    )
+    wanted = {p['id'] for p in posts}
+    return {
+        item.id: item.description.strip()
+        for item in result.posts
+        if item.id in wanted and item.description.strip()
+    }
+
+
+@metrics.scoped(metrics.ai_function)
 def generate_resume_from_skills(name, skills, education, experience_notes):
     system = (
         "You are an expert resume writer specializing in helping students and career changers. "
@@ -1,6 +1,6 @@
 import json
 import re
-from utils.ai_engine import analyze_match, analyze_job_description
+from utils.ai_engine import analyze_match, analyze_job_description, StructuredOutputError
 
 
 def parse_json_safely(text):
@@ -30,36 +30,27 @@ def parse_json_safely(text):
 
 
 def get_match_analysis(resume_text, job_description):
-    raw = analyze_match(resume_text, job_description)
-    data = parse_json_safely(raw)
-    if data and isinstance(data, dict):
+    try:
+        data = analyze_match(resume_text, job_description)
+    except StructuredOutputError as e:
         return {
-            'score': float(data.get('score', 0)),
-            'missing_keywords': data.get('missing_keywords', []),
-            'suggestions': data.get('suggestions', []),
+            'score': 0,
+            'missing_keywords': [],
+            'suggestions': ['Could not parse analysis. Please try again.'],
+            'raw': e.raw
         }
-    return {
-        'score': 0,
-        'missing_keywords': [],
-        'suggestions': ['Could not parse analysis. Please try again.'],
-        'raw': raw
-    }
+    return data.model_dump()
 
 
 def get_job_analysis(job_description):
-    raw = analyze_job_description(job_description)
-    data = parse_json_safely(raw)
-    if data and isinstance(data, dict):
+    try:
+        data = analyze_job_description(job_description)
+    except StructuredOutputError as e:
         return {
-            'required_skills': data.get('required_skills', []),
-            'keywords': data.get('keywords', []),
-            'experience_level': data.get('experience_level', 'Not specified'),
-            'key_responsibilities': data.get('key_responsibilities', []),
+            'required_skills': [],
+            'keywords': [],
+            'experience_level': 'Not specified',
+            'key_responsibilities': [],
+            'raw': e.raw
         }
-    return {
-        'required_skills': [],
-        'keywords': [],
-        'experience_level': 'Not specified',
-        'key_responsibilities': [],
-        'raw': raw
-    }
+    return data.model_dump()
@@ -0,0 +1,229 @@
+"""
+collection_mirror.py — In-memory mirror of a Firestore collection, kept hot by
+a real-time ``on_snapshot`` listener.
+
+Each worker process holds one listener per mirrored collection. The first
+snapshot loads every document; later snapshots carry only the changed
+documents, which are applied as deltas. While the listener is live, reads
+are answered from memory with no RPCs. The mirror implements the read half of
+StorageBackend, so data_layer can use it wherever it would query the backend.
+
+When the listener is still loading, has dropped, or Firestore is not the
+active backend, ``usable()`` is False and callers read the backend directly.
+A dropped listener is restarted on a later read, at most once every
+MIRROR_RESTART_DELAY seconds. Set JOBPOST_MIRROR=0 to disable the mirror.
+"""
+import logging
+import os
+import threading
+import time
+
+from utils.storage import StorageBackend, doc_id_value, matches, sort_docs
+
+logger = logging.getLogger(__name__)
+
+# Seconds between attempts to (re)start a listener that is not live
+MIRROR_RESTART_DELAY = 30
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+class CollectionMirror(StorageBackend):
+    name = 'mirror'
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._docs = {}
+        self._lock = threading.Lock()
+        self._watch = None
+        self._ready = False
+        self._started_at = None
+        self._last_snapshot = None
+        self._read_time = None
+        self._lag_ms = None
+        self._snapshots = 0
+        self._changes = 0
+        self._starts = 0
+        self._fallbacks = 0
+        self._last_error = None
+
+    # ── Listener ─────────────────────────────────────────────────────────────
+
+    def start(self):
+        """Attach the snapshot listener unless it is live or was tried recently."""
+        with self._lock:
+            if self._live() or (
+                    self._started_at is not None and time.monotonic() - self._started_at < MIRROR_RESTART_DELAY):
+                return
+            self._started_at = time.monotonic()
+            self._starts += 1
+            self._ready = False
+            old, self._watch = self._watch, None
+        if old is not None:
+            try:
+                old.unsubscribe()
+            except Exception:
+                pass
+        try:
+            from utils.firestore_manager import get_firestore_client
+            watch = get_firestore_client().collection(self.collection).on_snapshot(self._on_snapshot)
+        except Exception as e:
+            self._last_error = str(e)
+            logger.warning('Could not start %s mirror: %s', self.collection, e)
+            return
+        with self._lock:
+            self._watch = watch
+
+    def stop(self):
+        with self._lock:
+            watch, self._watch, self._ready = self._watch, None, False
+        if watch is not None:
+            watch.unsubscribe()
+
+    def _on_snapshot(self, docs, changes, read_time):
+        try:
+            with self._lock:
+                if not self._ready:
+                    # The first snapshot is the full collection
+                    self._docs = {}
+                    changes = [c for c in changes if c.type.name != 'REMOVED']
+                for change in changes:
+                    doc_id = change.document.id
+                    if change.type.name == 'REMOVED':
+                        self._docs.pop(doc_id, None)
+                    else:
+                        d = change.document.to_dict() or {}
+                        d['id'] = doc_id_value(doc_id)
+                        self._docs[doc_id] = d
+                self._changes += len(changes)
+                self._snapshots += 1
+                self._ready = True
+                self._last_snapshot = time.monotonic()
+                self._read_time = read_time
+                if read_time is not None and hasattr(read_time, 'timestamp'):
+                    self._lag_ms = round((time.time() - read_time.timestamp()) * 1000, 1)
+        except Exception as e:
+            self._last_error = str(e)
+            logger.error('%s mirror failed to apply a snapshot: %s', self.collection, e)
+
+    def _live(self):
+        return self._watch is not None and self._ready and self._watch.is_active
+
+    def usable(self):
+        """True when reads can be served from memory; otherwise counts a fallback."""
+        with self._lock:
+            live = self._live()
+            if not live:
+                self._fallbacks += 1
+        if not live:
+            self.start()
+        return live
+
+    # ── Local writes (read-your-writes until the listener confirms them) ─────
+
+    def put(self, doc):
+        with self._lock:
+            if self._ready and doc is not None:
+                self._docs[str(doc['id'])] = dict(doc)
+
+    def patch(self, ids, updates):
+        with self._lock:
+            for doc_id in ids:
+                d = self._docs.get(str(doc_id))
+                if d is not None:
+                    self._docs[str(doc_id)] = dict(d, **updates)
+
+    def remove(self, ids):
+        with self._lock:
+            for doc_id in ids:
+                self._docs.pop(str(doc_id), None)
+
+    # ── Reads (StorageBackend interface) ─────────────────────────────────────
+
+    def _rows(self, where=None):
+        with self._lock:
+            docs = list(self._docs.values())
+        return [dict(d) for d in docs if matches(d, where)]
+
+    def ping(self):
+        if not self._live():
+            raise RuntimeError(f'{self.collection} mirror is not live')
+
+    def get(self, collection, doc_id):
+        with self._lock:
+            d = self._docs.get(str(doc_id))
+        return dict(d) if d is not None else None
+
+    def query(self, collection, where=None, order_by=None, limit=None):
+        rows = sort_docs(self._rows(where), order_by)
+        return rows[:limit] if limit else rows
+
+    def iter_pages(self, collection, where=None, page_size=200):
+        # Same order as the backends: document ID as a string
+        yield from sorted(self._rows(where), key=lambda d: str(d['id']))
+
+    def count(self, collection, where=None):
+        with self._lock:
+            return sum(1 for d in self._docs.values() if matches(d, where))
+
+    def snapshot(self):
+        """Staleness and listener metrics for health and admin endpoints."""
+        with self._lock:
+            now = time.monotonic()
+            if self._live():
+                state = 'live'
+            elif self._watch is not None and not self._ready:
+                state = 'loading'
+            elif self._starts:
+                state = 'dropped'
+            else:
+                state = 'idle'
+            return {
+                'collection': self.collection,
+                'state': state,
+                'docs': len(self._docs),
+                'snapshots': self._snapshots,
+                'changes_applied': self._changes,
+                'last_snapshot_age_s': round(now - self._last_snapshot, 1) if self._last_snapshot else None,
+                'read_time': self._read_time.isoformat() if hasattr(self._read_time, 'isoformat') else None,
+                'delivery_lag_ms': self._lag_ms,
+                'starts': self._starts,
+                'fallback_reads': self._fallbacks,
+                'last_error': self._last_error,
+            }
+
+
+def mirror_enabled():
+    if os.environ.get('JOBPOST_MIRROR', '1').strip().lower() in ('0', 'false', 'no', 'off'):
+        return False
+    from utils.storage import get_backend
+    # The other backends are already local
+    return get_backend().name == 'firestore'
+
+
+def get_mirror(collection):
+    """The process-wide mirror of ``collection`` (listener started on first use), or None if disabled."""
+    if not mirror_enabled():
+        return None
+    mirror = _mirrors.get(collection)
+    if mirror is None:
+        with _mirrors_lock:
+            mirror = _mirrors.setdefault(collection, CollectionMirror(collection))
+    return mirror
+
+
+def mirror_status():
+    return {name: m.snapshot() for name, m in list(_mirrors.items())}
+
+
+def reset_mirrors():
+    """Stop every listener; used when Firestore credentials change."""
+    with _mirrors_lock:
+        mirrors = list(_mirrors.values())
+        _mirrors.clear()
+    for m in mirrors:
+        try:
+            m.stop()
+        except Exception:
+            pass
@@ -0,0 +1,117 @@
+"""
+concurrent_fetch.py — Run independent Firestore reads concurrently.
+
+Dashboard counts and backup exports read several collections that do not
+depend on each other. Each read is network-bound, so issuing them one after
+another makes the wall time the sum of all round trips. fetch_all runs them
+on a bounded thread pool; Prefetch reads an iterator ahead on a background
+thread so several streamed collections are fetched while earlier ones are
+still being written out.
+"""
+import concurrent.futures
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+FETCH_WORKERS = 8
+# Rows buffered ahead per prefetched collection (about two cursor pages)
+PREFETCH_DEPTH = 1000
+# A producer gives up if the consumer has not taken a row for this long
+PREFETCH_IDLE_TIMEOUT = 120.0
+
+_DONE = object()
+
+
+def fetch_all(calls, max_workers=FETCH_WORKERS):
+    """
+    Run ``{name: zero-arg callable}`` concurrently and return ``{name: result}``.
+    Exceptions propagate from the first failing call, as in a sequential loop.
+    """
+    if not calls:
+        return {}
+    workers = max(1, min(max_workers, len(calls)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(fn) for name, fn in calls.items()}
+        return {name: f.result() for name, f in futures.items()}
+
+
+class Prefetch:
+    """
+    Iterate ``iterable`` on a background thread, buffering up to ``depth``
+    items ahead of the consumer. Fetching starts on construction. Errors raised
+    by the source are re-raised in the consumer.
+
+    Call close() once the items are no longer wanted (consumer gone, response
+    aborted): the producer stops before its next item and closes the source,
+    releasing its cursor, instead of reading on until PREFETCH_IDLE_TIMEOUT.
+    Exhausting the iterator closes it too.
+    """
+
+    def __init__(self, iterable, depth=PREFETCH_DEPTH, name='prefetch'):
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(iterable,), name=name, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        waited = 0.0
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=1.0)
+                return True
+            except queue.Full:
+                waited += 1.0
+                if waited >= PREFETCH_IDLE_TIMEOUT:
+                    logger.warning('%s: consumer stalled, abandoning prefetch', self._thread.name)
+                    return False
+        return False
+
+    def _run(self, iterable):
+        it = iter(iterable)
+        try:
+            for item in it:
+                if self._stop.is_set() or not self._put((item, None)):
+                    return
+        except Exception as e:
+            self._put((_DONE, e))
+            return
+        finally:
+            # Runs the source's own cleanup (e.g. a paginated cursor) on this thread
+            close = getattr(it, 'close', None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.debug('%s: closing source failed: %s', self._thread.name, e)
+        self._put((_DONE, None))
+
+    def __iter__(self):
+        try:
+            while True:
+                try:
+                    item, error = self._queue.get(timeout=1.0)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        return
+                    continue
+                if item is _DONE:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop the producer and drop anything buffered. Safe to call more than once."""
+        self._stop.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def __del__(self):
+        self._stop.set()
@@ -2,28 +2,78 @@ import json
 import logging
 import os
 import sqlite3
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 _DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'instance', 'credentials.db')
 _CREDENTIAL_KEY = "firebase_service_account"
+# Other worker processes may save/clear credentials; after this many seconds a
+# lookup re-checks PRAGMA data_version (a header read, no table scan)
+CACHE_RECHECK_SECONDS = 5.0
+
+_conn = None
+_lock = threading.RLock()
+_MISSING = object()
+_cache = {'creds': _MISSING, 'data_version': None, 'checked_at': 0.0}
 
 
 def _get_conn():
-    os.makedirs(os.path.dirname(os.path.abspath(_DB_PATH)), exist_ok=True)
-    conn = sqlite3.connect(_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Shared WAL-mode connection, opened and migrated once per process."""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(_DB_PATH)), exist_ok=True)
+        conn = sqlite3.connect(_DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS credentials (
+                key   TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _data_version(conn):
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
 
+def _invalidate():
+    _cache.update(creds=_MISSING, data_version=None, checked_at=0.0)
 
-def _ensure_table(conn):
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS credentials (
-            key   TEXT PRIMARY KEY,
-            value TEXT NOT NULL
-        )
-    """)
-    conn.commit()
+
+def _valid(creds):
+    return bool(creds and creds.get('private_key') and creds.get('client_email'))
+
+
+def _load_env_credentials():
+    env_creds = os.environ.get('FIREBASE_CREDENTIALS', '').strip()
+    if not env_creds:
+        return None
+    try:
+        creds = json.loads(env_creds)
+        if _valid(creds):
+            logger.info("Using Firebase credentials from FIREBASE_CREDENTIALS env var.")
+            return creds
+    except Exception as e:
+        logger.error("Failed to parse FIREBASE_CREDENTIALS env var: %s", e)
+    return None
+
+
+def _load_db_credentials(conn):
+    row = conn.execute(
+        "SELECT value FROM credentials WHERE key = ?", (_CREDENTIAL_KEY,)
+    ).fetchone()
+    if row:
+        creds = json.loads(row["value"])
+        if _valid(creds):
+            return creds
+    return None
 
 
 def get_firebase_credentials() -> dict | None:
@@ -31,68 +81,62 @@ def get_firebase_credentials() -> dict | None:
     Returns Firebase service account credentials dict, or None if not configured.
     Priority: 1. FIREBASE_CREDENTIALS env var  2. SQLite credentials.db
     Never falls back to hardcoded credentials.
+
+    The result is cached per process; save/clear invalidate it, and writes from
+    other processes are picked up within CACHE_RECHECK_SECONDS.
     """
-    env_creds = os.environ.get('FIREBASE_CREDENTIALS', '').strip()
-    if env_creds:
+    with _lock:
+        creds = _cache['creds']
+        now = time.monotonic()
+        if creds is not _MISSING and now - _cache['checked_at'] < CACHE_RECHECK_SECONDS:
+            return dict(creds) if creds else None
+
         try:
-            creds = json.loads(env_creds)
-            if creds.get('private_key') and creds.get('client_email'):
-                logger.info("Using Firebase credentials from FIREBASE_CREDENTIALS env var.")
-                return creds
+            conn = _get_conn()
+            version = _data_version(conn)
+            if creds is _MISSING or version != _cache['data_version']:
+                creds = _load_env_credentials() or _load_db_credentials(conn)
+            _cache.update(creds=creds, data_version=version, checked_at=now)
         except Exception as e:
-            logger.error("Failed to parse FIREBASE_CREDENTIALS env var: %s", e)
-
-    conn = _get_conn()
-    try:
-        _ensure_table(conn)
-        row = conn.execute(
-            "SELECT value FROM credentials WHERE key = ?", (_CREDENTIAL_KEY,)
-        ).fetchone()
-        if row:
-            creds = json.loads(row["value"])
-            if creds.get('private_key') and creds.get('client_email'):
-                return creds
-    except Exception as e:
-        logger.error("credentials_store read error: %s", e)
-    finally:
-        conn.close()
-
-    return None
+            logger.error("credentials_store read error: %s", e)
+            if creds is _MISSING:
+                creds = _load_env_credentials()
+        return dict(creds) if creds else None
 
 
 def save_firebase_credentials(creds: dict) -> bool:
     """Save Firebase service account credentials to SQLite. Returns True on success."""
-    conn = _get_conn()
-    try:
-        _ensure_table(conn)
-        conn.execute(
-            "INSERT OR REPLACE INTO credentials (key, value) VALUES (?, ?)",
-            (_CREDENTIAL_KEY, json.dumps(creds))
-        )
-        conn.commit()
-        logger.info("Firebase credentials saved to credentials.db")
-        return True
-    except Exception as e:
-        logger.error("credentials_store save error: %s", e)
-        return False
-    finally:
-        conn.close()
+    with _lock:
+        try:
+            conn = _get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO credentials (key, value) VALUES (?, ?)",
+                (_CREDENTIAL_KEY, json.dumps(creds))
+            )
+            conn.commit()
+            logger.info("Firebase credentials saved to credentials.db")
+            return True
+        except Exception as e:
+            logger.error("credentials_store save error: %s", e)
+            return False
+        finally:
+            _invalidate()
 
 
 def clear_firebase_credentials() -> bool:
     """Remove Firebase credentials from SQLite. Returns True on success."""
-    conn = _get_conn()
-    try:
-        _ensure_table(conn)
-        conn.execute("DELETE FROM credentials WHERE key = ?", (_CREDENTIAL_KEY,))
-        conn.commit()
-        logger.info("Firebase credentials cleared from credentials.db")
-        return True
-    except Exception as e:
-        logger.error("credentials_store clear error: %s", e)
-        return False
-    finally:
-        conn.close()
+    with _lock:
+        try:
+            conn = _get_conn()
+            conn.execute("DELETE FROM credentials WHERE key = ?", (_CREDENTIAL_KEY,))
+            conn.commit()
+            logger.info("Firebase credentials cleared from credentials.db")
+            return True
+        except Exception as e:
+            logger.error("credentials_store clear error: %s", e)
+            return False
+        finally:
+            _invalidate()
 
 
 def is_firebase_configured() -> bool:
@@ -1,13 +1,26 @@
 """
-data_layer.py — Firebase/Firestore-only storage backend.
+data_layer.py — Storage-agnostic data access for the app's collections.
 
-All reads and writes go directly to Firestore. SQLite and MySQL have been
-removed. Every collection uses auto-incremented integer IDs via a _counters
-document in Firestore.
+Every read and write goes through the backend selected in utils.storage
+(Firestore by default, or a local SQLite database). This module owns the
+domain rules: field whitelists, defaults, normalisation and the API shape of
+job posts. Every collection uses auto-incremented integer IDs allocated by
+the backend.
+
+Within a Flask request, reads are memoised per request (an identity map on
+``flask.g``): the same document or query is fetched at most once, and any
+write to a collection drops that collection's memoised reads.
 """
+import copy
+import functools
 import logging
 from datetime import datetime
 
+from flask import g, has_request_context
+
+from utils import metrics
+from utils.storage import get_backend
+
 logger = logging.getLogger(__name__)
 
 _RESUME_FIELDS = {
@@ -23,8 +36,11 @@ _JOBPOST_FIELDS = {
     'title', 'company', 'location', 'job_type', 'salary', 'tags',
     'apply_url', 'description', 'original_description', 'status',
     'featured', 'ai_rewritten', 'source', 'external_id',
+    'content_fingerprint', 'duplicate_of',
 }
 
+_NEWEST_FIRST = [('created_at', True)]
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
@@ -32,27 +48,77 @@ def _now():
     return datetime.utcnow().isoformat()
 
 
-def _next_id(collection_name):
-    from utils.firestore_manager import get_firestore_client
-    from google.cloud import firestore as _gfs
-
-    db = get_firestore_client()
-    counter_ref = db.collection('_counters').document(collection_name)
+def _request_memo():
+    """The current request's {collection: {call: result}} map, or None outside a request."""
+    if not has_request_context():
+        return None
+    memo = getattr(g, '_data_layer_memo', None)
+    if memo is None:
+        memo = g._data_layer_memo = {}
+    return memo
 
-    @_gfs.transactional
-    def _txn(transaction, ref):
-        snap = ref.get(transaction=transaction)
-        current = int(snap.get('value')) if snap.exists else 0
-        nv = current + 1
-        transaction.set(ref, {'value': nv})
-        return nv
 
-    return _txn(db.transaction(), counter_ref)
+def _call(fn, args, kwargs):
+    """Run a data_layer function, timing it and attributing its Firestore RPCs to it."""
+    token = metrics.data_layer_function.set(fn.__name__)
+    try:
+        with metrics.data_layer_duration.time(function=fn.__name__, backend=get_backend().name):
+            return fn(*args, **kwargs)
+    finally:
+        metrics.data_layer_function.reset(token)
+
+
+def _shallow_copy(value):
+    if isinstance(value, list):
+        return [dict(v) if isinstance(v, dict) else v for v in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def _memoized(collection):
+    """Memoise a read of ``collection`` for the rest of the request."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            memo = _request_memo()
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                memo = None
+            if memo is None:
+                return _call(fn, args, kwargs)
+            entries = memo.setdefault(collection, {})
+            if key in entries:
+                metrics.data_layer_memo_hits.inc(function=fn.__name__)
+                # Callers may mutate what they get back; the memoised value stays intact
+                return copy.deepcopy(entries[key])
+            result = entries[key] = _call(fn, args, kwargs)
+            # First read: shallow per-row copies are enough to keep top-level
+            # edits (the common case) out of the memo, at a fraction of the cost
+            return _shallow_copy(result)
+        return wrapper
+    return decorator
+
+
+def _invalidates(collection):
+    """Drop the request's memoised reads of ``collection`` after a write."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return _call(fn, args, kwargs)
+            finally:
+                memo = _request_memo()
+                if memo is not None:
+                    memo.pop(collection, None)
+        return wrapper
+    return decorator
 
 
-def _fs_col(collection_name):
-    from utils.firestore_manager import get_firestore_client
-    return get_firestore_client().collection(collection_name)
+def _next_id(collection_name):
+    return get_backend().next_id(collection_name)
 
 
 def _parse_json_field(value, default):
@@ -68,14 +134,6 @@ def _parse_json_field(value, default):
     return default
 
 
-def _doc_to_dict(doc):
-    d = doc.to_dict()
-    if d is None:
-        return None
-    d['id'] = int(doc.id) if str(doc.id).isdigit() else doc.id
-    return d
-
-
 def _normalize_resume(d):
     """Ensure list fields stored as JSON strings are returned as proper lists."""
     if d is None:
@@ -90,23 +148,37 @@ def get_firestore_client():
     return _gfc()
 
 
+def ping():
+    """Raise if the storage backend cannot be reached."""
+    get_backend().ping()
+
+
+def collection_iter(collection_name, page_size=500):
+    """
+    Yield every document of a collection as a dict without loading the whole
+    collection. Order is by document ID; resumes are normalised as in
+    resume_list. Use jobpost_iter for API-formatted job posts.
+    """
+    for d in get_backend().iter_pages(collection_name, page_size=page_size):
+        if collection_name == 'resumes':
+            d = _normalize_resume(d)
+        yield d
+
+
 # ── RESUME ────────────────────────────────────────────────────────────────────
 
+@_memoized('resumes')
 def resume_list():
-    docs = _fs_col('resumes').stream()
-    rows = [_normalize_resume(_doc_to_dict(d)) for d in docs if d.to_dict()]
-    rows = [r for r in rows if r is not None]
-    rows.sort(key=lambda r: r.get('created_at') or '', reverse=True)
-    return rows
+    rows = get_backend().query('resumes', order_by=_NEWEST_FIRST)
+    return [_normalize_resume(r) for r in rows]
 
 
+@_memoized('resumes')
 def resume_get(resume_id):
-    doc = _fs_col('resumes').document(str(resume_id)).get()
-    if not doc.exists:
-        return None
-    return _normalize_resume(_doc_to_dict(doc))
+    return _normalize_resume(get_backend().get('resumes', resume_id))
 
 
+@_invalidates('resumes')
 def resume_create(data):
     new_id = _next_id('resumes')
     now = _now()
@@ -122,61 +194,47 @@ def resume_create(data):
         'created_at': now,
         'updated_at': now,
     }
-    _fs_col('resumes').document(str(new_id)).set(doc)
+    get_backend().set('resumes', new_id, doc)
     return dict(doc)
 
 
+@_invalidates('resumes')
 def resume_update(resume_id, data):
-    ref = _fs_col('resumes').document(str(resume_id))
-    doc = ref.get()
-    if not doc.exists:
-        return None
     updates = {k: v for k, v in data.items() if k in _RESUME_FIELDS}
     updates['updated_at'] = _now()
-    ref.update(updates)
-    return _doc_to_dict(ref.get())
+    return get_backend().update('resumes', resume_id, updates)
 
 
+@_invalidates('resumes')
 def resume_delete(resume_id):
-    ref = _fs_col('resumes').document(str(resume_id))
-    if not ref.get().exists:
-        return False
-    ref.delete()
-    return True
+    return get_backend().delete('resumes', resume_id)
 
 
+@_invalidates('resumes')
 def resume_bulk_delete(ids):
-    from utils.firestore_manager import get_firestore_client as _gfc
-    col = _fs_col('resumes')
-    batch = _gfc().batch()
-    count = 0
-    for rid in ids:
-        batch.delete(col.document(str(rid)))
-        count += 1
-    batch.commit()
-    return count
+    ids = list(ids)
+    get_backend().delete_many('resumes', ids)
+    return len(ids)
 
 
+@_memoized('resumes')
 def resume_count():
-    return len(list(_fs_col('resumes').stream()))
+    return get_backend().count('resumes')
 
 
 # ── JOB ───────────────────────────────────────────────────────────────────────
 
+@_memoized('jobs')
 def job_list():
-    docs = _fs_col('jobs').stream()
-    rows = [_doc_to_dict(d) for d in docs if d.to_dict()]
-    rows.sort(key=lambda r: r.get('created_at') or '', reverse=True)
-    return rows
+    return get_backend().query('jobs', order_by=_NEWEST_FIRST)
 
 
+@_memoized('jobs')
 def job_get(job_id):
-    doc = _fs_col('jobs').document(str(job_id)).get()
-    if not doc.exists:
-        return None
-    return _doc_to_dict(doc)
+    return get_backend().get('jobs', job_id)
 
 
+@_invalidates('jobs')
 def job_create(data):
     new_id = _next_id('jobs')
     now = _now()
@@ -191,69 +249,58 @@ def job_create(data):
         'created_at': now,
         'updated_at': now,
     }
-    _fs_col('jobs').document(str(new_id)).set(doc)
+    get_backend().set('jobs', new_id, doc)
     return dict(doc)
 
 
+@_invalidates('jobs')
 def job_update(job_id, data):
-    ref = _fs_col('jobs').document(str(job_id))
-    doc = ref.get()
-    if not doc.exists:
-        return None
     updates = {k: v for k, v in data.items() if k in _JOB_FIELDS}
     updates['updated_at'] = _now()
-    ref.update(updates)
-    return _doc_to_dict(ref.get())
+    return get_backend().update('jobs', job_id, updates)
 
 
+@_invalidates('jobs')
 def job_delete(job_id):
-    ref = _fs_col('jobs').document(str(job_id))
-    if not ref.get().exists:
-        return False
-    ref.delete()
-    return True
+    return get_backend().delete('jobs', job_id)
 
 
+@_invalidates('jobs')
 def job_bulk_delete(ids):
-    from utils.firestore_manager import get_firestore_client as _gfc
-    col = _fs_col('jobs')
-    batch = _gfc().batch()
-    for jid in ids:
-        batch.delete(col.document(str(jid)))
-    batch.commit()
+    ids = list(ids)
+    get_backend().delete_many('jobs', ids)
     return len(ids)
 
 
+@_memoized('jobs')
 def job_count():
-    return len(list(_fs_col('jobs').stream()))
+    return get_backend().count('jobs')
 
 
+@_memoized('jobs')
 def job_count_by_status():
-    rows = [_doc_to_dict(d) for d in _fs_col('jobs').stream() if d.to_dict()]
+    by_status = get_backend().count_by('jobs', 'status')
     counts = {'Applied': 0, 'Interview': 0, 'Offer': 0, 'Rejected': 0}
-    for r in rows:
-        s = r.get('status', 'Applied')
+    for s, n in by_status.items():
+        s = s or 'Applied'
         if s in counts:
-            counts[s] += 1
+            counts[s] += n
     return counts
 
 
 # ── CONTACT MESSAGE ────────────────────────────────────────────────────────────
 
+@_memoized('contact_messages')
 def message_list():
-    docs = _fs_col('contact_messages').stream()
-    rows = [_doc_to_dict(d) for d in docs if d.to_dict()]
-    rows.sort(key=lambda r: r.get('created_at') or '', reverse=True)
-    return rows
+    return get_backend().query('contact_messages', order_by=_NEWEST_FIRST)
 
 
+@_memoized('contact_messages')
 def message_get(msg_id):
-    doc = _fs_col('contact_messages').document(str(msg_id)).get()
-    if not doc.exists:
-        return None
-    return _doc_to_dict(doc)
+    return get_backend().get('contact_messages', msg_id)
 
 
+@_invalidates('contact_messages')
 def message_create(data):
     new_id = _next_id('contact_messages')
     now = _now()
@@ -266,43 +313,35 @@ def message_create(data):
         'is_read': False,
         'created_at': now,
     }
-    _fs_col('contact_messages').document(str(new_id)).set(doc)
+    get_backend().set('contact_messages', new_id, doc)
     return dict(doc)
 
 
+@_invalidates('contact_messages')
 def message_set_read(msg_id, is_read):
-    ref = _fs_col('contact_messages').document(str(msg_id))
-    if not ref.get().exists:
-        return False
-    ref.update({'is_read': bool(is_read)})
-    return True
+    return get_backend().update('contact_messages', msg_id, {'is_read': bool(is_read)}) is not None
 
 
+@_invalidates('contact_messages')
 def message_delete(msg_id):
-    ref = _fs_col('contact_messages').document(str(msg_id))
-    if not ref.get().exists:
-        return False
-    ref.delete()
-    return True
+    return get_backend().delete('contact_messages', msg_id)
 
 
+@_invalidates('contact_messages')
 def message_bulk_delete(ids):
-    from utils.firestore_manager import get_firestore_client as _gfc
-    col = _fs_col('contact_messages')
-    batch = _gfc().batch()
-    for mid in ids:
-        batch.delete(col.document(str(mid)))
-    batch.commit()
+    ids = list(ids)
+    get_backend().delete_many('contact_messages', ids)
     return len(ids)
 
 
+@_memoized('contact_messages')
 def message_count():
-    return len(list(_fs_col('contact_messages').stream()))
+    return get_backend().count('contact_messages')
 
 
+@_memoized('contact_messages')
 def message_count_unread():
-    docs = _fs_col('contact_messages').stream()
-    return sum(1 for d in docs if not (d.to_dict() or {}).get('is_read', False))
+    return get_backend().count('contact_messages', where={'is_read': False})
 
 
 # ── JOB POST ──────────────────────────────────────────────────────────────────
@@ -327,14 +366,6 @@ def _cleanm(v):
         return v
 
 
-def _jobpost_doc_to_dict(doc):
-    d = doc.to_dict()
-    if d is None:
-        return None
-    d['id'] = int(doc.id) if str(doc.id).isdigit() else doc.id
-    return d
-
-
 def _jobpost_to_api(d):
     """Convert a raw Firestore dict to the API dict format (tags as list)."""
     if d is None:
@@ -359,6 +390,7 @@ def _jobpost_to_api(d):
         'description': desc,
         'original_description': d.get('original_description') or '',
         'ai_rewritten': bool(d.get('ai_rewritten', False)),
+        'duplicate_of': d.get('duplicate_of'),
         'status': d.get('status') or 'draft',
         'featured': bool(d.get('featured', False)),
         'created_at': d.get('created_at'),
@@ -366,69 +398,99 @@ def _jobpost_to_api(d):
     }
 
 
+def _jobpost_source():
+    """
+    Where job post reads go: the live on_snapshot mirror (no RPCs) when it is
+    usable, otherwise the storage backend. See utils.collection_mirror.
+    """
+    from utils.collection_mirror import get_mirror
+    mirror = get_mirror('job_posts')
+    if mirror is not None and mirror.usable():
+        return mirror
+    return get_backend()
+
+
+def _mirror_apply(method, *args):
+    """Reflect a write in the mirror right away, ahead of the listener's own delta."""
+    from utils.collection_mirror import get_mirror
+    mirror = get_mirror('job_posts')
+    if mirror is not None:
+        getattr(mirror, method)(*args)
+
+
+def _jobpost_where(status=None, featured=None, ai_rewritten=None):
+    where = {}
+    if status is not None:
+        where['status'] = status
+    if featured is not None:
+        where['featured'] = featured
+    if ai_rewritten is not None:
+        where['ai_rewritten'] = ai_rewritten
+    return where
+
+
+@_memoized('job_posts')
 def jobpost_list(status=None, featured=None, limit=None, ai_rewritten=None):
-    docs = list(_fs_col('job_posts').stream())
-    rows = []
-    for doc in docs:
-        d = _jobpost_doc_to_dict(doc)
-        if d is None:
-            continue
-        if status is not None and d.get('status') != status:
-            continue
-        if featured is not None and bool(d.get('featured', False)) != featured:
-            continue
-        if ai_rewritten is not None and bool(d.get('ai_rewritten', False)) != ai_rewritten:
-            continue
-        rows.append(d)
-    rows.sort(key=lambda r: (
-        0 if r.get('featured') else 1,
-        r.get('updated_at') or '',
-    ), reverse=True)
-    if limit:
-        rows = rows[:limit]
+    rows = _jobpost_source().query(
+        'job_posts',
+        where=_jobpost_where(status, featured, ai_rewritten),
+        # Historical order: reverse of (0 if featured else 1, updated_at)
+        order_by=[('featured', False), ('updated_at', True)],
+        limit=limit,
+    )
     return [_jobpost_to_api(r) for r in rows]
 
 
+@_memoized('job_posts')
 def jobpost_list_raw(status=None, ai_rewritten=None, limit=None):
-    """Return raw Firestore dicts (not API-formatted) for internal use."""
-    docs = list(_fs_col('job_posts').stream())
-    rows = []
-    for doc in docs:
-        d = _jobpost_doc_to_dict(doc)
-        if d is None:
-            continue
-        if status is not None and d.get('status') != status:
-            continue
-        if ai_rewritten is not None and bool(d.get('ai_rewritten', False)) != ai_rewritten:
-            continue
-        rows.append(d)
-    rows.sort(key=lambda r: r.get('updated_at') or '', reverse=True)
-    if limit:
-        rows = rows[:limit]
-    return rows
-
-
+    """Return raw stored dicts (not API-formatted) for internal use."""
+    return _jobpost_source().query(
+        'job_posts',
+        where=_jobpost_where(status, ai_rewritten=ai_rewritten),
+        order_by=[('updated_at', True)],
+        limit=limit,
+    )
+
+
+def jobpost_iter(status=None, ids=None, page_size=200):
+    """
+    Yield API-formatted job posts page by page instead of loading the whole
+    collection. Pages are cursor-paginated by document ID, so order is by ID
+    rather than the featured/updated_at order of jobpost_list. With ``ids``,
+    only those documents are fetched (in batches of ``page_size``).
+    """
+    source = _jobpost_source()
+    if ids is not None:
+        for d in source.get_many('job_posts', ids):
+            if status is None or d.get('status') == status:
+                yield _jobpost_to_api(d)
+        return
+    for d in source.iter_pages('job_posts', where=_jobpost_where(status), page_size=page_size):
+        yield _jobpost_to_api(d)
+
+
+@_memoized('job_posts')
 def jobpost_get(post_id):
-    doc = _fs_col('job_posts').document(str(post_id)).get()
-    if not doc.exists:
-        return None
-    d = _jobpost_doc_to_dict(doc)
-    return _jobpost_to_api(d)
+    return _jobpost_to_api(_jobpost_source().get('job_posts', post_id))
 
 
+@_memoized('job_posts')
 def jobpost_get_raw(post_id):
-    doc = _fs_col('job_posts').document(str(post_id)).get()
-    if not doc.exists:
-        return None
-    return _jobpost_doc_to_dict(doc)
+    return get_backend().get('job_posts', post_id)
 
 
+@_invalidates('job_posts')
 def jobpost_create(data):
     new_id = _next_id('job_posts')
     now = _now()
     tags = data.get('tags', '')
     if isinstance(tags, list):
         tags = ', '.join(tags)
+    original = data.get('original_description') or ''
+    content_fp = data.get('content_fingerprint')
+    if content_fp is None:
+        from utils.fingerprint import fingerprint
+        content_fp = fingerprint(original)
     doc = {
         'id': new_id,
         'external_id': data.get('external_id') or '',
@@ -440,23 +502,23 @@ def jobpost_create(data):
         'salary': data.get('salary') or '',
         'tags': tags,
         'apply_url': data.get('apply_url') or '',
-        'original_description': data.get('original_description') or '',
+        'original_description': original,
         'description': data.get('description') or '',
+        'content_fingerprint': content_fp,
+        'duplicate_of': data.get('duplicate_of'),
         'ai_rewritten': bool(data.get('ai_rewritten', False)),
         'status': data.get('status') or 'draft',
         'featured': bool(data.get('featured', False)),
         'created_at': now,
         'updated_at': now,
     }
-    _fs_col('job_posts').document(str(new_id)).set(doc)
+    get_backend().set('job_posts', new_id, doc)
+    _mirror_apply('put', doc)
     return _jobpost_to_api(doc)
 
 
+@_invalidates('job_posts')
 def jobpost_update(post_id, data):
-    ref = _fs_col('job_posts').document(str(post_id))
-    doc = ref.get()
-    if not doc.exists:
-        return None
     updates = {}
     for k, v in data.items():
         if k in _JOBPOST_FIELDS:
@@ -468,72 +530,54 @@ def jobpost_update(post_id, data):
                 v = bool(v)
             updates[k] = v
     updates['updated_at'] = _now()
-    ref.update(updates)
-    d = _jobpost_doc_to_dict(ref.get())
-    return _jobpost_to_api(d)
+    doc = get_backend().update('job_posts', post_id, updates)
+    _mirror_apply('put', doc)
+    return _jobpost_to_api(doc)
 
 
+@_invalidates('job_posts')
 def jobpost_delete(post_id):
-    ref = _fs_col('job_posts').document(str(post_id))
-    if not ref.get().exists:
-        return False
-    ref.delete()
-    return True
+    found = get_backend().delete('job_posts', post_id)
+    _mirror_apply('remove', [post_id])
+    return found
 
 
+@_invalidates('job_posts')
 def jobpost_bulk(ids, action):
-    from utils.firestore_manager import get_firestore_client as _gfc
-    col = _fs_col('job_posts')
-    fs = _gfc()
-    batch = fs.batch()
-    affected = 0
-    for pid in ids:
-        ref = col.document(str(pid))
-        if action == 'delete':
-            batch.delete(ref)
-        else:
-            batch.update(ref, {'status': action, 'updated_at': _now()})
-        affected += 1
-    batch.commit()
-    return affected
+    ids = list(ids)
+    if action == 'delete':
+        get_backend().delete_many('job_posts', ids)
+        _mirror_apply('remove', ids)
+    else:
+        updates = {'status': action, 'updated_at': _now()}
+        get_backend().update_many('job_posts', ids, updates)
+        _mirror_apply('patch', ids, updates)
+    return len(ids)
 
 
+@_memoized('job_posts')
 def jobpost_count_by_status():
-    docs = list(_fs_col('job_posts').stream())
+    by_status = _jobpost_source().count_by('job_posts', 'status')
     counts = {'draft': 0, 'published': 0, 'archived': 0}
-    for doc in docs:
-        d = doc.to_dict()
-        if d:
-            s = d.get('status', 'draft')
-            if s in counts:
-                counts[s] += 1
+    for s, n in by_status.items():
+        s = s or 'draft'
+        if s in counts:
+            counts[s] += n
     counts['total'] = sum(counts.values())
     return counts
 
 
+@_memoized('job_posts')
 def jobpost_count(status=None, ai_rewritten=None):
-    docs = list(_fs_col('job_posts').stream())
-    count = 0
-    for doc in docs:
-        d = doc.to_dict()
-        if not d:
-            continue
-        if status is not None and d.get('status') != status:
-            continue
-        if ai_rewritten is not None and bool(d.get('ai_rewritten', False)) != ai_rewritten:
-            continue
-        count += 1
-    return count
+    return _jobpost_source().count('job_posts', where=_jobpost_where(status, ai_rewritten=ai_rewritten))
 
 
+@_memoized('job_posts')
 def jobpost_find_by_external_id(external_id):
     if not external_id:
         return None
-    docs = list(_fs_col('job_posts').where('external_id', '==', external_id).limit(1).stream())
-    if docs:
-        d = _jobpost_doc_to_dict(docs[0])
-        return _jobpost_to_api(d)
-    return None
+    rows = _jobpost_source().query('job_posts', where={'external_id': external_id}, limit=1)
+    return _jobpost_to_api(rows[0]) if rows else None
 
 
 # ── CONTENT REPORTS ───────────────────────────────────────────────────────────
@@ -541,6 +585,7 @@ def jobpost_find_by_external_id(external_id):
 _REPORT_STATUSES = {'pending', 'reviewed', 'dismissed'}
 
 
+@_invalidates('content_reports')
 def report_create(data):
     new_id = _next_id('content_reports')
     now = _now()
@@ -555,45 +600,34 @@ def report_create(data):
         'created_at': now,
         'reviewed_at': None,
     }
-    _fs_col('content_reports').document(str(new_id)).set(doc)
+    get_backend().set('content_reports', new_id, doc)
     return dict(doc)
 
 
+@_memoized('content_reports')
 def report_list(status=None):
-    docs = _fs_col('content_reports').stream()
-    rows = [_doc_to_dict(d) for d in docs if d.to_dict()]
-    rows = [r for r in rows if r is not None]
-    if status:
-        rows = [r for r in rows if r.get('status') == status]
-    rows.sort(key=lambda r: r.get('created_at') or '', reverse=True)
-    return rows
+    where = {'status': status} if status else None
+    return get_backend().query('content_reports', where=where, order_by=_NEWEST_FIRST)
 
 
+@_memoized('content_reports')
 def report_get(report_id):
-    doc = _fs_col('content_reports').document(str(report_id)).get()
-    if not doc.exists:
-        return None
-    return _doc_to_dict(doc)
+    return get_backend().get('content_reports', report_id)
 
 
+@_invalidates('content_reports')
 def report_update_status(report_id, status):
     if status not in _REPORT_STATUSES:
         return None
-    ref = _fs_col('content_reports').document(str(report_id))
-    if not ref.get().exists:
-        return None
-    ref.update({'status': status, 'reviewed_at': _now()})
-    return _doc_to_dict(ref.get())
+    return get_backend().update('content_reports', report_id, {'status': status, 'reviewed_at': _now()})
 
 
+@_invalidates('content_reports')
 def report_delete(report_id):
-    ref = _fs_col('content_reports').document(str(report_id))
-    if not ref.get().exists:
-        return False
-    ref.delete()
-    return True
+    return get_backend().delete('content_reports', report_id)
 
 
+@_memoized('content_reports')
 def report_count(status=None):
-    rows = report_list(status=status)
-    return len(rows)
+    where = {'status': status} if status else None
+    return get_backend().count('content_reports', where=where)
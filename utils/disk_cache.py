@@ -0,0 +1,89 @@
+"""
+disk_cache.py — Size-bounded file cache shared by gunicorn workers.
+
+Entries are plain files named ``<key><suffix>`` in one directory, so every
+worker process (and a restart) sees the same cache. Writes go to a temporary
+file that is renamed into place, so a reader never sees a partial entry. A
+file's mtime doubles as its LRU clock: hits bump it, and after each write the
+least recently used entries are deleted until the directory fits in
+``max_bytes``.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes, suffix):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.abspath(os.path.join(self.directory, f'{key}{self.suffix}'))
+
+    def lookup(self, key):
+        """Path of the entry for ``key`` (marking it recently used), or None on a miss."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning('%s cache read failed: %s', os.path.basename(self.directory), e)
+            return None
+
+    def read_text(self, key):
+        path = self.lookup(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError as e:
+            # Evicted between lookup and read, or unreadable
+            logger.warning('%s cache read failed: %s', os.path.basename(self.directory), e)
+            return None
+
+    def write(self, key, data):
+        """Store ``data`` (bytes-like or str) under ``key``; return its path. Raises OSError."""
+        path = self.path(key)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        if isinstance(data, str):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(data)
+        else:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in ``max_bytes``."""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.suffix):
+                        continue
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
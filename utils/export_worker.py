@@ -0,0 +1,281 @@
+"""
+export_worker.py — Background rendering of DOCX/PDF job listing exports.
+
+Rendering hundreds of posts can take longer than a gunicorn worker timeout,
+so the request only validates the query and enqueues the job. Each render
+runs in its own spawned process, which fetches the matching posts itself and
+writes the document to instance/exports/, where it is kept for EXPORT_TTL
+seconds. A render that outlives RENDER_TIMEOUT is killed and the job marked
+failed; at most EXPORT_WORKERS renders run at once per gunicorn worker.
+
+Job ids hash (format, query) together with the EXPORT_REUSE_SECONDS window
+the request fell in, so repeated clicks share one render while a later
+export sees fresh data.
+
+All state lives on disk (artifact, .pending and .error files), so status and
+download requests work whichever gunicorn worker they land on.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_EXPORT_DIR = os.path.join(os.path.dirname(__file__), '..', 'instance', 'exports')
+EXPORT_TTL = 60 * 60
+# A pending marker older than this means the rendering worker died
+PENDING_TIMEOUT = 10 * 60
+# A render still running after this is killed and reported as failed
+RENDER_TIMEOUT = 5 * 60
+EXPORT_REUSE_SECONDS = 60
+EXPORT_WORKERS = 2
+
+EXPORT_FORMATS = {
+    'pdf': ('application/pdf', 'job_listings.pdf'),
+    'docx': ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'job_listings.docx'),
+}
+
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+_slots = threading.BoundedSemaphore(EXPORT_WORKERS)
+
+
+def _path(job_id, suffix):
+    return os.path.join(_EXPORT_DIR, f'{job_id}.{suffix}')
+
+
+def _age(path):
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ── Query ─────────────────────────────────────────────────────────────────────
+
+def export_query(ids=None, search='', job_type=''):
+    """Normalise export filters into the picklable dict handed to the render process."""
+    id_list = [int(i) for i in ids if str(i).isdigit()] if ids else None
+    return {'ids': id_list, 'search': (search or '').strip().lower(),
+            'job_type': (job_type or '').strip().lower()}
+
+
+def _matches(p, query):
+    # Explicit ids select exactly those posts; the text filters apply otherwise
+    if query['ids'] is not None:
+        return True
+    search, job_type = query['search'], query['job_type']
+    if search and not (
+            search in (p.get('title') or '').lower()
+            or search in (p.get('company') or '').lower()
+            or search in (p.get('location') or '').lower()
+            or search in str(p.get('tags') or '').lower()
+            or search in (p.get('description') or '').lower()
+            or search in (p.get('original_description') or '').lower()):
+        return False
+    if job_type and job_type not in (p.get('job_type') or '').lower():
+        return False
+    return True
+
+
+def iter_export_posts(query):
+    """Yield the published posts selected by ``query``, page by page."""
+    from utils.data_layer import jobpost_iter
+    return (p for p in jobpost_iter(status='published', ids=query['ids']) if _matches(p, query))
+
+
+# ── Rendering (runs in the worker process) ────────────────────────────────────
+
+def _render_docx(posts, buffer):
+    from docx import Document
+    from docx.shared import RGBColor
+    doc = Document()
+    doc.add_heading('Job Listings Export', 0)
+    for p in posts:
+        h = doc.add_heading(p.get('title', ''), level=1)
+        h.runs[0].font.color.rgb = RGBColor(0x4F, 0x46, 0xE5)
+        details = []
+        if p.get('company'):  details.append(f'Company: {p["company"]}')
+        if p.get('location'): details.append(f'Location: {p["location"]}')
+        if p.get('job_type'): details.append(f'Type: {p["job_type"]}')
+        if p.get('salary'):   details.append(f'Salary: {p["salary"]}')
+        if p.get('apply_url'): details.append(f'Apply: {p["apply_url"]}')
+        tags = p.get('tags', [])
+        tags = ', '.join(tags) if isinstance(tags, list) else (tags or '')
+        if tags: details.append(f'Tags: {tags}')
+        for d in details:
+            para = doc.add_paragraph(d)
+            para.runs[0].bold = True
+        desc = (p.get('description') or p.get('original_description') or '').strip()
+        if desc:
+            doc.add_paragraph(desc[:800])
+        doc.add_paragraph('')
+    doc.save(buffer)
+
+
+def _render_to_file(fmt, posts, path):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        if fmt == 'pdf':
+            from utils.pdf_exporter import generate_job_listings_pdf
+            generate_job_listings_pdf(posts, buffer=f)
+        else:
+            _render_docx(posts, f)
+    os.replace(tmp, path)
+    return path
+
+
+def _render_job(job_id, fmt, query):
+    """Render process entry point: fetch the posts for ``query`` and write the artifact."""
+    # A short-lived process has no use for the Firestore snapshot listener
+    os.environ['JOBPOST_MIRROR'] = '0'
+    try:
+        posts = list(iter_export_posts(query))
+        if not posts:
+            raise ValueError('No jobs to export')
+        # Same order as the job board: featured first, then most recently updated
+        posts.sort(key=lambda p: (p.get('featured', False), p.get('updated_at') or ''), reverse=True)
+        _render_to_file(fmt, posts, _path(job_id, fmt))
+    except Exception as e:
+        _write_error(job_id, str(e) or e.__class__.__name__)
+        raise
+
+
+# ── Public API (request process) ──────────────────────────────────────────────
+
+def export_key(fmt, query, now=None):
+    window = int((time.time() if now is None else now) // EXPORT_REUSE_SECONDS)
+    payload = json.dumps([fmt, query, window], sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def sweep_expired():
+    """Delete artifacts past EXPORT_TTL and stale markers."""
+    try:
+        entries = list(os.scandir(_EXPORT_DIR))
+    except FileNotFoundError:
+        return
+    now = time.time()
+    for entry in entries:
+        try:
+            if now - entry.stat().st_mtime > max(EXPORT_TTL, PENDING_TIMEOUT):
+                _remove(entry.path)
+        except OSError:
+            pass
+
+
+def _write_error(job_id, message):
+    try:
+        with open(_path(job_id, 'error'), 'w', encoding='utf-8') as f:
+            f.write(message)
+    except OSError:
+        pass
+
+
+def _run_job(job_id, fmt, query):
+    """Supervise one render: wait for a slot, spawn it, kill it past RENDER_TIMEOUT."""
+    import multiprocessing
+    try:
+        with _slots:
+            # Time spent queued for a slot doesn't count against PENDING_TIMEOUT
+            try:
+                os.utime(_path(job_id, 'pending'))
+            except OSError:
+                pass
+            proc = multiprocessing.get_context('spawn').Process(
+                target=_render_job, args=(job_id, fmt, query), daemon=True)
+            proc.start()
+            proc.join(RENDER_TIMEOUT)
+            timed_out = proc.is_alive()
+            if timed_out:
+                # Kill the stuck render so its slot goes to the next job
+                proc.terminate()
+                proc.join(5)
+                if proc.is_alive():
+                    proc.kill()
+                    proc.join()
+        if os.path.exists(_path(job_id, fmt)):
+            logger.info('Export %s (%s) ready', job_id, fmt)
+        elif timed_out:
+            logger.error('Export %s (%s) killed after %ds', job_id, fmt, RENDER_TIMEOUT)
+            _write_error(job_id, 'Export timed out.')
+        elif not os.path.exists(_path(job_id, 'error')):
+            # The child died without reporting (e.g. a crash inside a native library)
+            logger.error('Export %s (%s) render exited with code %s', job_id, fmt, proc.exitcode)
+            _write_error(job_id, f'Export failed (exit code {proc.exitcode}).')
+        else:
+            logger.error('Export %s (%s) failed', job_id, fmt)
+    except Exception as e:
+        logger.error('Export %s (%s) failed: %s', job_id, fmt, e)
+        _write_error(job_id, str(e) or e.__class__.__name__)
+    finally:
+        _remove(_path(job_id, 'pending'))
+
+
+def submit_export(fmt, query):
+    """Enqueue a render of the posts selected by ``query`` as ``fmt`` (or reuse a stored one). Returns the job id."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Unsupported export format: {fmt}')
+    os.makedirs(_EXPORT_DIR, exist_ok=True)
+    sweep_expired()
+    job_id = export_key(fmt, query)
+    artifact = _path(job_id, fmt)
+    age = _age(artifact)
+    if age is not None and age < EXPORT_TTL:
+        return job_id
+    pending_age = _age(_path(job_id, 'pending'))
+    if pending_age is not None and pending_age < PENDING_TIMEOUT:
+        return job_id
+    _remove(_path(job_id, 'error'))
+    with open(_path(job_id, 'pending'), 'w', encoding='utf-8') as f:
+        f.write(fmt)
+    try:
+        threading.Thread(target=_run_job, args=(job_id, fmt, query),
+                         name=f'export-{job_id[:8]}', daemon=True).start()
+    except BaseException:
+        # Nothing is rendering; don't leave the job reported as pending
+        _remove(_path(job_id, 'pending'))
+        raise
+    return job_id
+
+
+def export_status(job_id):
+    """Return {'job_id', 'status', ...} for a job, or None if unknown/expired."""
+    if not _JOB_ID_RE.match(job_id or ''):
+        return None
+    for fmt in EXPORT_FORMATS:
+        age = _age(_path(job_id, fmt))
+        if age is not None and age < EXPORT_TTL:
+            return {'job_id': job_id, 'status': 'ready', 'format': fmt,
+                    'expires_in': int(EXPORT_TTL - age)}
+    try:
+        with open(_path(job_id, 'error'), encoding='utf-8') as f:
+            return {'job_id': job_id, 'status': 'failed', 'error': f.read()}
+    except OSError:
+        pass
+    pending_age = _age(_path(job_id, 'pending'))
+    if pending_age is not None:
+        if pending_age < PENDING_TIMEOUT:
+            return {'job_id': job_id, 'status': 'pending'}
+        return {'job_id': job_id, 'status': 'failed', 'error': 'Export timed out.'}
+    return None
+
+
+def export_artifact(job_id):
+    """Return (path, mimetype, download_name) for a ready export, or None."""
+    status = export_status(job_id)
+    if not status or status['status'] != 'ready':
+        return None
+    fmt = status['format']
+    mimetype, download_name = EXPORT_FORMATS[fmt]
+    return os.path.abspath(_path(job_id, fmt)), mimetype, download_name
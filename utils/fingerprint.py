@@ -0,0 +1,109 @@
+"""
+fingerprint.py — Near-duplicate detection for job descriptions.
+
+The same job is often imported from several aggregators with only cosmetic
+differences (tracking links, whitespace, a reordered benefits line). A 64-bit
+simhash over word shingles of the normalised text maps such copies to
+fingerprints a few bits apart, so they can share a single AI rewrite.
+"""
+import hashlib
+import re
+
+FINGERPRINT_BITS = 64
+# Max differing bits for two descriptions to count as the same posting
+NEAR_DUPLICATE_DISTANCE = 3
+_SHINGLE = 3
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_NON_WORD_RE = re.compile(r'[^\w]+')
+
+
+def normalize_text(text):
+    """Lower-case, drop URLs and punctuation, collapse whitespace."""
+    if not text:
+        return ''
+    text = _URL_RE.sub(' ', text.lower())
+    return ' '.join(_NON_WORD_RE.sub(' ', text).split())
+
+
+def simhash(text):
+    """Return the 64-bit simhash of ``text`` as an int (0 for empty text)."""
+    words = normalize_text(text).split()
+    if not words:
+        return 0
+    if len(words) < _SHINGLE:
+        shingles = [' '.join(words)]
+    else:
+        shingles = [' '.join(words[i:i + _SHINGLE]) for i in range(len(words) - _SHINGLE + 1)]
+    weights = [0] * FINGERPRINT_BITS
+    for sh in shingles:
+        h = int.from_bytes(hashlib.blake2b(sh.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    fp = 0
+    for bit, w in enumerate(weights):
+        if w > 0:
+            fp |= 1 << bit
+    return fp
+
+
+def fingerprint(text):
+    """Hex-encoded simhash suitable for storing on a document ('' for empty text)."""
+    fp = simhash(text)
+    return f'{fp:016x}' if fp else ''
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _as_int(fp):
+    if isinstance(fp, int):
+        return fp
+    try:
+        return int(fp, 16) if fp else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+class SimhashIndex:
+    """
+    In-memory index of fingerprints for near-duplicate lookups.
+
+    Fingerprints are split into ``max_distance + 1`` bands; two
+    fingerprints within that distance must share at least one band exactly
+    (pigeonhole), so only bucket-mates need a full Hamming comparison.
+    Entries are additionally scoped by ``key`` (e.g. normalised job title) so
+    boilerplate-heavy descriptions of different roles are not merged.
+    """
+
+    def __init__(self, max_distance=NEAR_DUPLICATE_DISTANCE):
+        if not 0 <= max_distance < FINGERPRINT_BITS:
+            raise ValueError(f'max_distance must be between 0 and {FINGERPRINT_BITS - 1}')
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        # (shift, mask) per band; widths differ by at most one bit and cover all bits
+        edges = [i * FINGERPRINT_BITS // bands for i in range(bands + 1)]
+        self._band_masks = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        self._buckets = {}
+
+    def _bands(self, fp):
+        return [(i, (fp >> shift) & mask) for i, (shift, mask) in enumerate(self._band_masks)]
+
+    def add(self, item_id, fp, key=''):
+        fp = _as_int(fp)
+        if not fp:
+            return
+        for band in self._bands(fp):
+            self._buckets.setdefault((key, band), []).append((fp, item_id))
+
+    def find(self, fp, key=''):
+        """Return the id of the first indexed near-duplicate of ``fp``, or None."""
+        fp = _as_int(fp)
+        if not fp:
+            return None
+        for band in self._bands(fp):
+            for other, item_id in self._buckets.get((key, band), ()):
+                if hamming(fp, other) <= self.max_distance:
+                    return item_id
+        return None
@@ -0,0 +1,209 @@
+"""
+firestore_backend.py — Google Cloud Firestore storage backend.
+
+Equality filters on string fields are pushed down to Firestore; boolean
+filters and ordering are applied in Python so that documents missing a field
+behave as they always have (a missing flag is False, and Firestore's
+order_by would silently drop documents without the field).
+"""
+from contextlib import contextmanager
+
+from utils import metrics
+from utils.storage import BOOL_FIELDS, StorageBackend, doc_id_value, matches, sort_docs
+
+# Firestore rejects write batches larger than 500 operations
+_BATCH_LIMIT = 400
+
+
+def _to_dict(doc):
+    d = doc.to_dict()
+    if not d:
+        return None
+    d['id'] = doc_id_value(doc.id)
+    return d
+
+
+def _is_transport_error(error):
+    """True for failures to reach Firestore, as opposed to errors about the request itself."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    from google.api_core import exceptions as api_exceptions
+    from google.auth.exceptions import TransportError
+    return isinstance(error, (api_exceptions.ServiceUnavailable, api_exceptions.DeadlineExceeded,
+                              api_exceptions.RetryError, TransportError))
+
+
+@contextmanager
+def _rpc(op):
+    """
+    Time one Firestore round trip, labelled with the data_layer function that
+    caused it, and report its outcome to the circuit breaker.
+    """
+    from utils.firestore_manager import record_rpc_failure, record_rpc_success
+
+    with metrics.firestore_rpc_duration.time(function=metrics.data_layer_function.get() or '-', op=op):
+        try:
+            yield
+        except Exception as e:
+            if _is_transport_error(e):
+                record_rpc_failure(e)
+            raise
+    record_rpc_success()
+
+
+class FirestoreBackend(StorageBackend):
+    name = 'firestore'
+
+    def _client(self):
+        from utils.firestore_manager import get_firestore_client
+        return get_firestore_client()
+
+    def _col(self, collection):
+        return self._client().collection(collection)
+
+    def _filtered(self, collection, where):
+        """Return (query with string filters applied, remaining Python-side filters)."""
+        query = self._col(collection)
+        local = {}
+        for field, value in (where or {}).items():
+            if field in BOOL_FIELDS:
+                local[field] = value
+            else:
+                query = query.where(field, '==', value)
+        return query, local
+
+    def ping(self):
+        self._client()
+
+    def next_id(self, collection):
+        from google.cloud import firestore as _gfs
+
+        db = self._client()
+        counter_ref = db.collection('_counters').document(collection)
+
+        @_gfs.transactional
+        def _txn(transaction, ref):
+            snap = ref.get(transaction=transaction)
+            current = int(snap.get('value')) if snap.exists else 0
+            nv = current + 1
+            transaction.set(ref, {'value': nv})
+            return nv
+
+        with _rpc('next_id'):
+            return _txn(db.transaction(), counter_ref)
+
+    def get(self, collection, doc_id):
+        with _rpc('get'):
+            doc = self._col(collection).document(str(doc_id)).get()
+        if not doc.exists:
+            return None
+        d = doc.to_dict() or {}
+        d['id'] = doc_id_value(doc.id)
+        return d
+
+    def get_many(self, collection, ids, page_size=200):
+        col = self._col(collection)
+        ids = list(ids)
+        for i in range(0, len(ids), page_size):
+            refs = [col.document(str(doc_id)) for doc_id in ids[i:i + page_size]]
+            with _rpc('get_all'):
+                docs = list(self._client().get_all(refs))
+            for doc in docs:
+                if doc.exists:
+                    d = _to_dict(doc)
+                    if d is not None:
+                        yield d
+
+    def set(self, collection, doc_id, data):
+        with _rpc('set'):
+            self._col(collection).document(str(doc_id)).set(data)
+
+    def update(self, collection, doc_id, updates):
+        from google.api_core.exceptions import NotFound
+
+        ref = self._col(collection).document(str(doc_id))
+        try:
+            # update() fails on a missing document, so no existence read is needed
+            with _rpc('update'):
+                ref.update(updates)
+        except NotFound:
+            return None
+        with _rpc('get'):
+            doc = ref.get()
+        d = doc.to_dict() or {}
+        d['id'] = doc_id_value(doc.id)
+        return d
+
+    def delete(self, collection, doc_id):
+        ref = self._col(collection).document(str(doc_id))
+        with _rpc('get'):
+            exists = ref.get().exists
+        if not exists:
+            return False
+        with _rpc('delete'):
+            ref.delete()
+        return True
+
+    def _batched(self, collection, ids, op):
+        db = self._client()
+        col = db.collection(collection)
+        batch = db.batch()
+        pending = 0
+        for doc_id in ids:
+            op(batch, col.document(str(doc_id)))
+            pending += 1
+            if pending == _BATCH_LIMIT:
+                with _rpc('batch_commit'):
+                    batch.commit()
+                batch = db.batch()
+                pending = 0
+        if pending:
+            with _rpc('batch_commit'):
+                batch.commit()
+
+    def delete_many(self, collection, ids):
+        self._batched(collection, ids, lambda batch, ref: batch.delete(ref))
+
+    def update_many(self, collection, ids, updates):
+        self._batched(collection, ids, lambda batch, ref: batch.update(ref, updates))
+
+    def query(self, collection, where=None, order_by=None, limit=None):
+        query, local = self._filtered(collection, where)
+        rows = []
+        with _rpc('query'):
+            docs = list(query.stream())
+        for doc in docs:
+            d = _to_dict(doc)
+            if d is not None and matches(d, local):
+                rows.append(d)
+        sort_docs(rows, order_by)
+        return rows[:limit] if limit else rows
+
+    def iter_pages(self, collection, where=None, page_size=200):
+        query, local = self._filtered(collection, where)
+        query = query.order_by('__name__').limit(page_size)
+        last = None
+        while True:
+            page = query.start_after(last) if last is not None else query
+            with _rpc('query_page'):
+                docs = list(page.stream())
+            for doc in docs:
+                d = _to_dict(doc)
+                if d is not None and matches(d, local):
+                    yield d
+            if len(docs) < page_size:
+                return
+            last = docs[-1]
+
+    def count(self, collection, where=None):
+        query, local = self._filtered(collection, where)
+        if not local:
+            # Server-side aggregation: one round trip, no documents transferred
+            try:
+                with _rpc('count'):
+                    return int(query.count().get()[0][0].value)
+            except AttributeError:
+                pass
+        with _rpc('query'):
+            docs = list(query.stream())
+        return sum(1 for doc in docs if (d := _to_dict(doc)) is not None and matches(d, local))
@@ -1,69 +1,252 @@
 import logging
+import random
 import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 _firebase_app = None
-_firebase_failed = False
 _firebase_lock = threading.Lock()
 _startup_checked = False
+# Seconds the background check waits for the first Firestore round trip
+STARTUP_TIMEOUT = 15
+# Seconds a half-open recovery probe may take before it counts as a failure
+PROBE_TIMEOUT = 10
+# Recovery probes back off exponentially from BASE to MAX seconds (with jitter)
+BREAKER_BASE_DELAY = 2.0
+BREAKER_MAX_DELAY = 120.0
+# Failed RPCs in normal traffic open the circuit only after this many
+# consecutive transport errors within RPC_FAILURE_WINDOW seconds
+RPC_FAILURE_THRESHOLD = 3
+RPC_FAILURE_WINDOW = 30.0
+# Bumped by reset_firebase_app so a check still running for old credentials
+# cannot overwrite the state of a newer one
+_generation = 0
+_check_thread = None
+_probe_timer = None
+_health = {'state': 'starting', 'error': None, 'checked_at': None, 'latency_ms': None}
 
 
-def _do_startup_check():
+class CircuitBreaker:
     """
-    Runs once at startup in a background thread with a short timeout.
-    Marks Firebase as unavailable if credentials are invalid or connection fails.
+    Guards Firestore access after a connectivity or initialisation failure.
+
+    closed     normal operation; calls go through.
+    open       calls fail fast; a probe is scheduled after an exponential,
+               jittered backoff.
+    half_open  a single background probe is in flight; calls still fail fast.
+               Success closes the circuit, failure re-opens it with a longer delay.
     """
-    global _firebase_app, _firebase_failed, _startup_checked
-    import firebase_admin
-    from firebase_admin import credentials, firestore
-    from utils.credentials_store import get_firebase_credentials
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, base_delay=BREAKER_BASE_DELAY, max_delay=BREAKER_MAX_DELAY):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.last_error = None
+        self.retry_at = None
+        self._entered_at = time.monotonic()
+        self._time_in_state = {self.CLOSED: 0.0, self.OPEN: 0.0, self.HALF_OPEN: 0.0}
+        self._transitions = {self.CLOSED: 0, self.OPEN: 0, self.HALF_OPEN: 0}
+        self._rejected = 0
+        self._probes = 0
+        self._call_failures = []
+
+    def _transition(self, state):
+        now = time.monotonic()
+        self._time_in_state[self.state] += now - self._entered_at
+        self._entered_at = now
+        if state != self.state:
+            self._transitions[state] += 1
+        self.state = state
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            self._rejected += 1
+            return False
+
+    def retry_in(self):
+        with self._lock:
+            if self.retry_at is None:
+                return 0.0
+            return max(0.0, self.retry_at - time.monotonic())
+
+    def record_call_success(self):
+        """A regular call completed; resets the failure count while closed (probes handle the rest)."""
+        with self._lock:
+            self._call_failures.clear()
+            if self.state == self.CLOSED:
+                self.failures = 0
+                self.last_error = None
+
+    def record_call_failure(self, error):
+        """
+        Count a failed regular call. Returns True once RPC_FAILURE_THRESHOLD
+        consecutive failures fall within RPC_FAILURE_WINDOW, i.e. when the
+        circuit should open; one blip in otherwise healthy traffic does not.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.last_error = str(error)
+            self._call_failures = [t for t in self._call_failures if now - t <= RPC_FAILURE_WINDOW] + [now]
+            if len(self._call_failures) < RPC_FAILURE_THRESHOLD:
+                return False
+            self._call_failures.clear()
+            return True
+
+    def begin_probe(self):
+        with self._lock:
+            self._probes += 1
+            self._transition(self.HALF_OPEN)
+
+    def record_success(self):
+        with self._lock:
+            self._call_failures.clear()
+            self.failures = 0
+            self.last_error = None
+            self.retry_at = None
+            self._transition(self.CLOSED)
+
+    def record_failure(self, error):
+        """Open the circuit and return the delay until the next probe."""
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            delay = min(self.max_delay, self.base_delay * 2 ** (self.failures - 1))
+            delay *= random.uniform(0.8, 1.2)
+            self.retry_at = time.monotonic() + delay
+            self._transition(self.OPEN)
+            return delay
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            time_in_state = dict(self._time_in_state)
+            time_in_state[self.state] += now - self._entered_at
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'last_error': self.last_error,
+                'retry_in_s': round(max(0.0, self.retry_at - now), 1) if self.retry_at else None,
+                'rejected_calls': self._rejected,
+                'probes': self._probes,
+                'transitions': dict(self._transitions),
+                'time_in_state_s': {k: round(v, 1) for k, v in time_in_state.items()},
+            }
+
 
-    result = [None]
+_breaker = CircuitBreaker()
+
+
+def _set_health(state, error=None, latency_ms=None):
+    _health.update(state=state, error=error, latency_ms=latency_ms, checked_at=time.time())
+
+
+def _ping(timeout):
+    """Initialise Firebase if needed and read _ping, giving up after ``timeout`` seconds."""
     error = [None]
 
-    def _init():
+    def _run():
         try:
-            try:
-                app = firebase_admin.get_app()
-            except ValueError:
-                cred_dict = get_firebase_credentials()
-                if not cred_dict:
-                    raise ValueError("No Firebase credentials configured. Visit /setup to add them.")
-                cred = credentials.Certificate(cred_dict)
-                app = firebase_admin.initialize_app(cred)
-            result[0] = app
-            db = firestore.client()
-            list(db.collection('_ping').limit(1).stream())
+            _init_app()
+            from firebase_admin import firestore
+            list(firestore.client().collection('_ping').limit(1).stream())
         except Exception as e:
             error[0] = e
 
-    t = threading.Thread(target=_init, daemon=True)
+    t = threading.Thread(target=_run, name='firebase-ping', daemon=True)
     t.start()
-    t.join(timeout=15)
+    t.join(timeout=timeout)
+    if t.is_alive():
+        raise TimeoutError("timed out")
+    if error[0] is not None:
+        raise error[0]
+
+
+def _schedule_probe(delay, generation):
+    global _probe_timer
+    if _probe_timer is not None:
+        _probe_timer.cancel()
+    _probe_timer = threading.Timer(delay, _run_probe, args=(generation, PROBE_TIMEOUT, True))
+    _probe_timer.daemon = True
+    _probe_timer.start()
+
 
+def _run_probe(generation, timeout, half_open):
+    """
+    Check connectivity and record the result on the breaker. Used for the
+    startup check and, with ``half_open=True``, for timed recovery probes.
+    """
+    global _startup_checked
     with _firebase_lock:
+        if generation != _generation:
+            return
+    if half_open:
+        _breaker.begin_probe()
+    started = time.monotonic()
+    try:
+        _ping(timeout)
+        error = None
+    except Exception as e:
+        error = e
+
+    with _firebase_lock:
+        if generation != _generation:
+            return
         _startup_checked = True
-        if t.is_alive() or error[0] is not None:
-            msg = "timed out" if t.is_alive() else str(error[0])
-            logger.warning("Firebase unavailable at startup: %s. Running without database.", msg)
-            _firebase_failed = True
+        if error is not None:
+            delay = _breaker.record_failure(error)
+            logger.warning("Firebase unavailable: %s. Failing fast; next probe in %.1fs.", error, delay)
+            _set_health('unavailable', error=str(error))
+            _schedule_probe(delay, generation)
         else:
-            _firebase_app = result[0]
-            logger.info("Firebase connected successfully at startup.")
+            latency_ms = round((time.monotonic() - started) * 1000, 1)
+            if half_open:
+                logger.info("Firebase connectivity restored (%.0f ms probe).", latency_ms)
+            else:
+                logger.info("Firebase connected successfully at startup (%.0f ms).", latency_ms)
+            _breaker.record_success()
+            _set_health('ready', latency_ms=latency_ms)
 
 
-def startup_check():
-    """Call this once during app initialization to pre-check Firebase connectivity."""
-    global _startup_checked
+def startup_check(wait=False):
+    """
+    Start the Firebase connectivity check on a background thread (once per
+    credentials generation) and return immediately, so app startup never waits
+    on the network. Pass ``wait=True`` to block until the check has finished,
+    e.g. right after new credentials were saved.
+    """
+    global _check_thread
     with _firebase_lock:
-        if _startup_checked:
-            return
-    _do_startup_check()
+        if not _startup_checked and (_check_thread is None or not _check_thread.is_alive()):
+            _set_health('starting')
+            _check_thread = threading.Thread(
+                target=_run_probe, args=(_generation, STARTUP_TIMEOUT, False),
+                name='firebase-startup-check', daemon=True,
+            )
+            _check_thread.start()
+        thread = _check_thread
+    if wait and thread is not None:
+        thread.join(timeout=STARTUP_TIMEOUT + 1)
+
+
+def is_firebase_available():
+    """False while the circuit is open or half-open (Firestore calls fail fast)."""
+    return _breaker.state == CircuitBreaker.CLOSED
+
+
+def health_status():
+    """Snapshot of the Firestore connectivity state and breaker metrics for the health endpoint."""
+    with _firebase_lock:
+        return dict(_health, startup_checked=_startup_checked, circuit=_breaker.snapshot())
 
 
 def reset_firebase_app():
-    global _firebase_app, _firebase_failed, _startup_checked
+    global _firebase_app, _startup_checked, _check_thread, _generation, _breaker, _probe_timer
     with _firebase_lock:
         try:
             import firebase_admin
@@ -71,19 +254,24 @@ def reset_firebase_app():
                 firebase_admin.delete_app(_firebase_app)
         except Exception:
             pass
+        if _probe_timer is not None:
+            _probe_timer.cancel()
+            _probe_timer = None
         _firebase_app = None
-        _firebase_failed = False
+        _breaker = CircuitBreaker()
         _startup_checked = False
+        _check_thread = None
+        _generation += 1
+        _set_health('starting')
+    # Listeners hold the old client; they restart on the next read
+    from utils.collection_mirror import reset_mirrors
+    reset_mirrors()
 
 
-def get_firebase_app():
-    global _firebase_app, _firebase_failed
-
+def _init_app():
+    """Initialise (once) and return the firebase_admin app, without consulting the breaker."""
+    global _firebase_app
     with _firebase_lock:
-        if _firebase_failed:
-            raise RuntimeError(
-                "Firebase is unavailable. Please update your Firebase credentials in the admin panel."
-            )
         if _firebase_app is not None:
             return _firebase_app
 
@@ -100,7 +288,6 @@ def get_firebase_app():
             pass
         cred_dict = get_firebase_credentials()
         if not cred_dict:
-            _firebase_failed = True
             raise RuntimeError("No Firebase credentials configured. Visit /setup to add them.")
         cred = credentials.Certificate(cred_dict)
         try:
@@ -108,10 +295,50 @@ def get_firebase_app():
             _firebase_app = app
             return app
         except Exception as e:
-            _firebase_failed = True
             raise RuntimeError(f"Firebase initialization failed: {e}") from e
 
 
+def get_firebase_app():
+    if not _breaker.allow():
+        raise RuntimeError(
+            "Firebase is unavailable (retrying in %.0fs). If this persists, update your "
+            "Firebase credentials in the admin panel." % _breaker.retry_in()
+        )
+    try:
+        return _init_app()
+    except Exception as e:
+        with _firebase_lock:
+            generation = _generation
+            if _breaker.state == CircuitBreaker.CLOSED:
+                delay = _breaker.record_failure(e)
+                _set_health('unavailable', error=str(e))
+                _schedule_probe(delay, generation)
+        raise
+
+
+def record_rpc_failure(error):
+    """
+    Open the circuit after a Firestore RPC failed at the transport level
+    (unavailable, deadline exceeded, connection error) RPC_FAILURE_THRESHOLD
+    times in a row, so later calls fail fast instead of each waiting out the
+    network timeout.
+    """
+    if not _breaker.record_call_failure(error):
+        logger.info("Firestore RPC failed: %s", error)
+        return
+    with _firebase_lock:
+        generation = _generation
+        if _breaker.state == CircuitBreaker.CLOSED:
+            delay = _breaker.record_failure(error)
+            logger.warning("Firestore RPC failed: %s. Failing fast; next probe in %.1fs.", error, delay)
+            _set_health('unavailable', error=str(error))
+            _schedule_probe(delay, generation)
+
+
+def record_rpc_success():
+    _breaker.record_call_success()
+
+
 def get_firestore_client():
     get_firebase_app()
     from firebase_admin import firestore
@@ -1,9 +1,12 @@
 import html as html_mod
 import logging
 import re
+import time
 import unicodedata
 import requests
 
+from utils import metrics
+
 logger = logging.getLogger(__name__)
 
 HEADERS = {
@@ -27,7 +30,14 @@ def clean_text(text: str, multiline: bool = True) -> str:
     """
     if not text:
         return ''
+    start = time.perf_counter()
+    try:
+        return _clean_text(text, multiline)
+    finally:
+        metrics.clean_text_duration.observe(time.perf_counter() - start, multiline=str(bool(multiline)).lower())
+
 
+def _clean_text(text, multiline):
     # 1. Decode HTML entities iteratively (some content is double-escaped)
     prev = None
     while prev != text:
@@ -104,13 +114,26 @@ def clean_job(data: dict) -> dict:
     return result
 
 
+def _get(provider, url, **kwargs):
+    """requests.get with latency and error metrics for ``provider``."""
+    try:
+        with metrics.provider_request_duration.time(provider=provider):
+            resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT, **kwargs)
+    except Exception:
+        metrics.provider_errors.inc(provider=provider)
+        raise
+    if resp.status_code >= 400:
+        metrics.provider_errors.inc(provider=provider)
+    return resp
+
+
 def fetch_remotive(search='', limit=20):
     posts = []
     try:
         params = {'limit': limit}
         if search:
             params['search'] = search
-        resp = requests.get('https://remotive.com/api/remote-jobs', params=params, headers=HEADERS, timeout=TIMEOUT)
+        resp = _get('remotive', 'https://remotive.com/api/remote-jobs', params=params)
         resp.raise_for_status()
         data = resp.json()
         for j in data.get('jobs', []):
@@ -143,7 +166,7 @@ def fetch_arbeitnow(limit=20):
     resp = None
     for url in urls:
         try:
-            r = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+            r = _get('arbeitnow', url)
             if r.status_code == 200:
                 resp = r
                 break
@@ -180,7 +203,7 @@ def fetch_arbeitnow(limit=20):
 def fetch_remoteok(limit=20):
     posts = []
     try:
-        resp = requests.get('https://remoteok.com/api', headers=HEADERS, timeout=TIMEOUT)
+        resp = _get('remoteok', 'https://remoteok.com/api')
         resp.raise_for_status()
         data = resp.json()
         jobs = [j for j in data if isinstance(j, dict) and j.get('id')]
@@ -221,7 +244,7 @@ def fetch_adzuna(app_id, app_key, query='developer', country='us', limit=20):
             'what': query,
             'content-type': 'application/json',
         }
-        resp = requests.get(url, params=params, headers=HEADERS, timeout=TIMEOUT)
+        resp = _get('adzuna', url, params=params)
         resp.raise_for_status()
         data = resp.json()
         for j in data.get('results', []):
@@ -0,0 +1,65 @@
+"""
+json_stream.py — Incremental JSON writer for large exports.
+
+Backups used to build every collection into lists and json.dumps the lot,
+peaking at several times the dataset size before the first byte went out.
+iter_json_object writes the same document shape piece by piece: values that
+are iterators (e.g. paginated collection cursors) become arrays written one
+row at a time, so memory stays bounded by a single page. encode_chunks turns
+any stream of text pieces (these, or the job board's TXT/CSV/NDJSON exports)
+into response-sized byte chunks.
+"""
+import json
+import zlib
+
+_ROW_INDENT = '\n    '
+
+
+def _is_plain(value):
+    return value is None or isinstance(value, (dict, list, tuple, str, int, float, bool))
+
+
+def iter_json_object(sections):
+    """
+    Yield the text of a JSON object built from ``(key, value)`` pairs.
+    Plain values are dumped whole; any other iterable is streamed as an array.
+    """
+    yield '{'
+    sep = '\n'
+    for key, value in sections:
+        yield f'{sep}  {json.dumps(key)}: '
+        sep = ',\n'
+        if _is_plain(value):
+            yield json.dumps(value, indent=2, default=str).replace('\n', '\n  ')
+            continue
+        yield '['
+        row_sep = _ROW_INDENT
+        for row in value:
+            yield row_sep + json.dumps(row, default=str)
+            row_sep = ',' + _ROW_INDENT
+        yield ']' if row_sep == _ROW_INDENT else '\n  ]'
+    yield '\n}\n'
+
+
+def encode_chunks(pieces, gzip=False, size=64 * 1024):
+    """Coalesce text pieces into ~``size`` byte chunks, optionally gzip-compressed."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if gzip else None
+    buf = []
+    n = 0
+    for piece in pieces:
+        buf.append(piece)
+        n += len(piece)
+        if n < size:
+            continue
+        data = ''.join(buf).encode('utf-8')
+        buf = []
+        n = 0
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    data = ''.join(buf).encode('utf-8')
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
@@ -0,0 +1,341 @@
+"""
+metrics.py — In-process metrics in the Prometheus text exposition format.
+
+A deliberately small subset of prometheus_client (counters, histograms and
+summaries with labels) so the app takes no extra dependency.
+
+Values are recorded in each worker process. gunicorn runs several workers
+behind one port and a scrape reaches an arbitrary one, so, like
+prometheus_client's multiprocess mode, every worker writes its values to
+METRICS_DIR (default instance/metrics/<pid>.json) every
+METRICS_FLUSH_SECONDS, and ``render`` sums the files of all workers. Files
+not updated for METRICS_STALE_SECONDS (exited workers) are deleted, which
+Prometheus sees as a counter reset.
+
+What is recorded, and where:
+  http_request_duration_seconds    every request (init_app), by blueprint/endpoint
+  data_layer_call_duration_seconds each data_layer read/write that reaches storage
+  firestore_rpc_duration_seconds   each Firestore RPC, by calling data_layer function
+  groq_request_duration_seconds    each Groq completion, by ai_engine function
+  groq_tokens_total                prompt/completion tokens, by ai_engine function
+  provider_request_duration_seconds  job_aggregator HTTP calls, by provider
+  clean_text_duration_seconds      job_aggregator.clean_text (count and sum only)
+"""
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(os.path.dirname(__file__), '..', 'instance', 'metrics')
+METRICS_FLUSH_SECONDS = 5
+METRICS_STALE_SECONDS = 10 * 60
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+# The data_layer / ai_engine function on whose behalf the current code runs,
+# so Firestore RPCs and Groq calls can be attributed to it
+data_layer_function = contextvars.ContextVar('data_layer_function', default='')
+ai_function = contextvars.ContextVar('ai_function', default='')
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _fmt(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def snapshot(self):
+        """This process's values as JSON-friendly ``[[labels, value], ...]``."""
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        lines += self._render_samples(sorted(values.items()))
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _merge(self, a, b):
+        return a + b
+
+    def _render_samples(self, items):
+        return [f'{self.name}{_labels(self.labelnames, k)} {_fmt(v)}' for k, v in items]
+
+
+class Summary(_Metric):
+    """Count and sum only — cheap enough for very hot functions."""
+    kind = 'summary'
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            count, total = self._values.get(key, (0, 0.0))
+            self._values[key] = (count + 1, total + value)
+
+    def _merge(self, a, b):
+        return (a[0] + b[0], a[1] + b[1])
+
+    def _render_samples(self, items):
+        lines = []
+        for k, (count, total) in items:
+            lines.append(f'{self.name}_count{_labels(self.labelnames, k)} {count}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, k)} {_fmt(total)}')
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][i] += 1
+            state[1] += value
+
+    def _merge(self, a, b):
+        if len(a[0]) != len(b[0]):
+            return a  # written by a build with different buckets
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1]]
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block; sets ``outcome`` to ok/error if that label exists."""
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            yield
+        except BaseException:
+            outcome = 'error'
+            raise
+        finally:
+            if 'outcome' in self.labelnames:
+                labels['outcome'] = outcome
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self, items):
+        lines = []
+        for k, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = 'le="' + _fmt(bound) + '"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, k, [le])} {cumulative}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, k)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, k)} {_fmt(total)}')
+        return lines
+
+
+def _dump():
+    """Write this process's values to METRICS_DIR/<pid>.json."""
+    data = {metric.name: metric.snapshot() for metric in _registry}
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f'{os.getpid()}.json')
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            _dump()
+        except OSError as e:
+            logger.debug('Could not write metrics: %s', e)
+
+
+def _collect():
+    """Values of every registered metric summed over all workers' files: ``{name: {labels: value}}``."""
+    _dump()
+    merged = {metric.name: {} for metric in _registry}
+    by_name = {metric.name: metric for metric in _registry}
+    now = time.time()
+    with os.scandir(METRICS_DIR) as it:
+        entries = [e for e in it if e.name.endswith('.json')]
+    for entry in entries:
+        try:
+            if now - entry.stat().st_mtime > METRICS_STALE_SECONDS:
+                os.remove(entry.path)
+                continue
+            with open(entry.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, samples in data.items():
+            metric = by_name.get(name)
+            if metric is None:
+                continue
+            values = merged[name]
+            for labels, value in samples:
+                key = tuple(labels)
+                values[key] = metric._merge(values[key], value) if key in values else value
+    return merged
+
+
+def render():
+    """All registered metrics, summed over workers, in the Prometheus text format (version 0.0.4)."""
+    try:
+        merged = _collect()
+    except OSError as e:
+        logger.warning('Metrics directory unavailable, reporting this worker only: %s', e)
+        merged = {}
+    lines = []
+    for metric in _registry:
+        lines += metric.render(merged.get(metric.name))
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# ── Metric definitions ────────────────────────────────────────────────────────
+
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Time to produce the response (streamed bodies: until headers).',
+    ('blueprint', 'endpoint', 'method', 'status'),
+)
+data_layer_duration = Histogram(
+    'data_layer_call_duration_seconds', 'data_layer calls that reached the storage backend.',
+    ('function', 'backend', 'outcome'),
+)
+data_layer_memo_hits = Counter(
+    'data_layer_memo_hits_total', 'data_layer reads answered from the per-request memo.', ('function',),
+)
+firestore_rpc_duration = Histogram(
+    'firestore_rpc_duration_seconds', 'Firestore RPCs by calling data_layer function and operation.',
+    ('function', 'op', 'outcome'),
+)
+groq_request_duration = Histogram(
+    'groq_request_duration_seconds', 'Groq chat completions by ai_engine function.',
+    ('function', 'model', 'outcome'), buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0),
+)
+groq_tokens = Counter(
+    'groq_tokens_total', 'Tokens reported by Groq, by ai_engine function.', ('function', 'model', 'kind'),
+)
+provider_request_duration = Histogram(
+    'provider_request_duration_seconds', 'job_aggregator provider HTTP requests.', ('provider', 'outcome'),
+)
+provider_errors = Counter(
+    'provider_errors_total', 'job_aggregator provider requests that failed or returned an HTTP error.',
+    ('provider',),
+)
+clean_text_duration = Summary(
+    'clean_text_duration_seconds', 'Time spent in job_aggregator.clean_text.', ('multiline',),
+)
+
+
+# ── Instrumentation helpers ───────────────────────────────────────────────────
+
+def scoped(var, name=None):
+    """Decorator: run the function with ``var`` set to its name (see data_layer_function)."""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if var.get():
+                # Already inside an instrumented call; attribute to the outermost one
+                return fn(*args, **kwargs)
+            token = var.set(label)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                var.reset(token)
+        return wrapper
+    return decorator
+
+
+def submit(executor, fn, *args, **kwargs):
+    """
+    ``executor.submit`` running ``fn`` in a copy of the caller's context, so
+    the labels set by ``scoped`` carry over into pool threads (which
+    otherwise start with empty context variables).
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def init_app(app):
+    """Record the latency of every request handled by ``app``."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_flusher():
+        # Started in the worker on first use: a thread started before gunicorn forks would not survive
+        global _flusher_pid
+        if _flusher_pid != os.getpid():
+            with _flusher_lock:
+                if _flusher_pid != os.getpid():
+                    threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+                    _flusher_pid = os.getpid()
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                blueprint=request.blueprint or '',
+                endpoint=request.endpoint or 'unmatched',
+                method=request.method,
+                status=response.status_code,
+            )
+        return response
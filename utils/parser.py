@@ -1,35 +1,272 @@
-import pdfplumber
-from docx import Document
+import hashlib
 import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import concurrent.futures
+from functools import lru_cache
 
+from utils.disk_cache import DiskCache
 
-def extract_text_from_pdf(file_bytes):
+logger = logging.getLogger(__name__)
+
+# Pages beyond this are ignored — no resume needs more, and it bounds worst-case work
+MAX_PDF_PAGES = 40
+# Wall-clock budget for one PDF; pages not extracted in time are dropped
+PDF_TIME_BUDGET = 8.0
+# Documents with at least this many pages are split across the process pool
+PARALLEL_MIN_PAGES = 8
+PDF_POOL_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# The PDF/DOCX libraries are imported on first use: together they add a few
+# hundred milliseconds to every worker boot, and most workers never parse a file.
+
+@lru_cache(maxsize=1)
+def _pdfium():
+    import pypdfium2
+    return pypdfium2
+
+
+@lru_cache(maxsize=1)
+def _pdfplumber():
+    import pdfplumber
+    return pdfplumber
+
+
+@lru_cache(maxsize=1)
+def _docx_document():
+    from docx import Document
+    return Document
+
+
+def _get_pool():
+    """Shared process pool for large PDFs (spawned lazily; 'spawn' is safe under threaded workers)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PDF_POOL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _retire_pool(pool):
+    """
+    Stop handing out ``pool``: the next caller gets a fresh one. Tasks already
+    running on it (possibly for other requests) are left to finish, after
+    which its processes exit. Used when a child crashed (the pool is broken)
+    or a task overran its budget (a slot may be stuck on a pathological page).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _needs_layout(text):
+    """pdfium returns nothing (or mojibake) for some font encodings; those pages go to pdfplumber."""
+    stripped = text.strip()
+    if not stripped:
+        return True
+    return stripped.count('\ufffd') > len(stripped) // 10
+
+
+def _is_bytes(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def _as_stream(source):
+    """
+    Return a readable, seekable binary stream positioned at the start.
+
+    Uploads are passed through as-is (werkzeug already spools large ones to a
+    temporary file), so parsers read from disk instead of a second in-memory
+    copy. Raw bytes are wrapped in a BytesIO, which shares the buffer.
+    """
+    if _is_bytes(source):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def _pdfium_pages(source, start, end, deadline=None):
+    """Extract pages [start, end) with pdfium. Returns [(index, text, needs_layout)]."""
+    out = []
+    pdf = _pdfium().PdfDocument(source if isinstance(source, str) else _as_stream(source))
     try:
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            text = ''
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + '\n'
-        return text.strip()
+        for i in range(start, min(end, len(pdf))):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            page = pdf[i]
+            try:
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_bounded().replace('\r\n', '\n').replace('\r', '\n')
+                finally:
+                    textpage.close()
+            finally:
+                page.close()
+            out.append((i, text, _needs_layout(text)))
+    finally:
+        pdf.close()
+    return out
+
+
+def _plumber_pages(source, indices, deadline):
+    """Layout-aware fallback for the given page indices."""
+    texts = {}
+    with _pdfplumber().open(_as_stream(source), pages=[i + 1 for i in indices]) as pdf:
+        for i, page in zip(indices, pdf.pages):
+            if time.monotonic() > deadline:
+                break
+            texts[i] = page.extract_text() or ''
+    return texts
+
+
+def _pool_extract(source, n_pages, deadline):
+    """Split pages across the process pool. Streams are handed over as a temp file path, not pickled bytes."""
+    tmp_path = None
+    if not _is_bytes(source):
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            shutil.copyfileobj(_as_stream(source), tmp, 1 << 20)
+            tmp_path = tmp.name
+    try:
+        arg = tmp_path or bytes(source)
+        step = -(-n_pages // PDF_POOL_WORKERS)
+        chunks = [(s, min(s + step, n_pages)) for s in range(0, n_pages, step)]
+        pool = _get_pool()
+        try:
+            # Children stop between pages at the same deadline (the monotonic clock is system-wide)
+            futures = [pool.submit(_pdfium_pages, arg, s, e, deadline) for s, e in chunks]
+        except concurrent.futures.BrokenExecutor:
+            _retire_pool(pool)
+            pool = _get_pool()
+            futures = [pool.submit(_pdfium_pages, arg, s, e, deadline) for s, e in chunks]
+        # A little past the deadline, so chunks that stopped at it can still report their pages
+        done, not_done = concurrent.futures.wait(futures, timeout=max(0.0, deadline - time.monotonic()) + 1.0)
+        if [f for f in not_done if not f.cancel()]:
+            logger.warning('PDF page extraction overran its time budget; retiring the process pool')
+            _retire_pool(pool)
+        results = []
+        for f in done:
+            try:
+                results.extend(f.result())
+            except concurrent.futures.BrokenExecutor:
+                # A child crashed (e.g. inside pdfium); its pages are missing
+                _retire_pool(pool)
+        return results
+    finally:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _extract_pdf(source):
+    """
+    Return ``(text, complete)``. ``complete`` is False when pages up to
+    MAX_PDF_PAGES were dropped (time budget, crashed child), so callers can
+    avoid caching a truncated result.
+    """
+    try:
+        deadline = time.monotonic() + PDF_TIME_BUDGET
+        pdf = _pdfium().PdfDocument(_as_stream(source))
+        try:
+            n_pages = len(pdf)
+        finally:
+            pdf.close()
+        if n_pages > MAX_PDF_PAGES:
+            logger.info('PDF has %d pages; extracting the first %d', n_pages, MAX_PDF_PAGES)
+            n_pages = MAX_PDF_PAGES
+
+        if n_pages >= PARALLEL_MIN_PAGES and PDF_POOL_WORKERS > 1:
+            results = _pool_extract(source, n_pages, deadline)
+        else:
+            results = _pdfium_pages(source, 0, n_pages, deadline)
+
+        pages = {i: text for i, text, _ in results}
+        layout = [i for i, _, needs in results if needs]
+        complete = len(pages) == n_pages
+        if layout:
+            retried = _plumber_pages(source, layout, deadline) if time.monotonic() < deadline else {}
+            pages.update(retried)
+            complete = complete and len(retried) == len(layout)
+        if not complete:
+            logger.warning('PDF extraction incomplete: %d of %d pages within the time budget', len(pages), n_pages)
+
+        parts = [pages[i].strip() for i in sorted(pages)]
+        return '\n'.join(p for p in parts if p).strip(), complete
     except Exception as e:
         raise ValueError(f"Failed to extract text from PDF: {str(e)}")
 
 
-def extract_text_from_docx(file_bytes):
+def extract_text_from_pdf(source):
+    """Extract text from a PDF given as bytes or a seekable binary stream."""
+    return _extract_pdf(source)[0]
+
+
+def extract_text_from_docx(source):
+    """Extract text from a DOCX given as bytes or a seekable binary stream."""
     try:
-        doc = Document(io.BytesIO(file_bytes))
+        doc = _docx_document()(_as_stream(source))
         text = '\n'.join([para.text for para in doc.paragraphs if para.text.strip()])
         return text.strip()
     except Exception as e:
         raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
 
 
-def extract_text(file_bytes, filename):
+# ── Extraction cache ──────────────────────────────────────────────────────────
+
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Bump when extraction output changes so stale cached text is not served
+_CACHE_VERSION = 1
+_cache = DiskCache(os.path.join(os.path.dirname(__file__), '..', 'instance', 'extract_cache'),
+                   CACHE_MAX_BYTES, '.txt')
+
+
+def _sha256(source):
+    if _is_bytes(source):
+        return hashlib.sha256(source).hexdigest()
+    h = hashlib.sha256()
+    stream = _as_stream(source)
+    for chunk in iter(lambda: stream.read(1 << 20), b''):
+        h.update(chunk)
+    stream.seek(0)
+    return h.hexdigest()
+
+
+def extract_text(source, filename):
+    """
+    Extract text from an uploaded PDF/DOCX. ``source`` may be bytes or a
+    seekable binary stream such as ``FileStorage.stream``.
+    """
     filename_lower = filename.lower()
     if filename_lower.endswith('.pdf'):
-        return extract_text_from_pdf(file_bytes)
+        kind, extractor = 'pdf', _extract_pdf
     elif filename_lower.endswith('.docx'):
-        return extract_text_from_docx(file_bytes)
+        kind, extractor = 'docx', lambda src: (extract_text_from_docx(src), True)
     else:
         raise ValueError("Unsupported file format. Please upload a PDF or DOCX file.")
+    key = f'{_sha256(source)}.{kind}.v{_CACHE_VERSION}'
+    cached = _cache.read_text(key)
+    if cached is not None:
+        return cached
+    text, complete = extractor(source)
+    # A partial extraction (load spike, crashed child) must not outlive this request
+    if text.strip() and complete:
+        try:
+            _cache.write(key, text)
+        except OSError as e:
+            logger.warning('extract cache write failed: %s', e)
+    return text
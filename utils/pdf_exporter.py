@@ -1,48 +1,186 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.enums import TA_LEFT
+"""
+pdf_exporter.py — ReportLab rendering for resumes, cover letters and job listings.
+
+Stylesheets and paragraph styles are built once per process and reused, and
+runs of consecutive text lines are merged into a single Paragraph (joined with
+<br/>) so a long document produces tens of flowables instead of thousands.
+Rendered resumes are additionally cached on disk (see cached_pdf), so a
+repeat download is a file send rather than a layout pass.
+"""
+from functools import lru_cache
+import hashlib
 import io
+import json
+import logging
+import os
+
+from utils.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# reportlab is imported on first render, not at module load — it is only
+# needed by export requests and would otherwise slow every worker boot.
+
+
+@lru_cache(maxsize=1)
+def _styles():
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_LEFT
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    base = getSampleStyleSheet()
+    return {
+        'doc_title': base['Title'],
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=base['Heading1'],
+            fontSize=18,
+            spaceAfter=20,
+        ),
+        'body': ParagraphStyle(
+            'CustomBody',
+            parent=base['Normal'],
+            fontSize=11,
+            leading=16,
+            alignment=TA_LEFT,
+        ),
+        'jb_title': ParagraphStyle(
+            'jb_title', parent=base['Heading1'],
+            textColor=colors.HexColor('#4F46E5'), fontSize=14, spaceAfter=4,
+        ),
+        'jb_meta': ParagraphStyle(
+            'jb_meta', parent=base['Normal'],
+            textColor=colors.HexColor('#475569'), fontSize=9, leading=13, spaceAfter=2,
+        ),
+        'jb_desc': ParagraphStyle(
+            'jb_desc', parent=base['Normal'],
+            fontSize=9, leading=13, spaceAfter=6,
+            textColor=colors.HexColor('#334155'),
+        ),
+    }
+
+
+@lru_cache(maxsize=1)
+def _layout():
+    """
+    Page geometry for each document kind, plus the listing rule colour. A fresh
+    SimpleDocTemplate is cheap; only these and the styles above are cached.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, letter
+    from reportlab.lib.units import inch, mm
+    return {
+        'resume': dict(pagesize=letter, rightMargin=inch, leftMargin=inch, topMargin=inch, bottomMargin=inch),
+        'listing': dict(pagesize=A4, leftMargin=20 * mm, rightMargin=20 * mm, topMargin=20 * mm, bottomMargin=20 * mm),
+        'rule_color': colors.HexColor('#E2E8F0'),
+        'mm': mm,
+    }
+
+
+# Longer runs are split: a huge Paragraph is re-wrapped on every page split
+MAX_LINES_PER_PARAGRAPH = 8
+
+
+def _escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _text_flowables(content, style):
+    """Merge runs of non-blank lines into Paragraphs of up to MAX_LINES_PER_PARAGRAPH lines; blank lines become spacers."""
+    from reportlab.platypus import Paragraph, Spacer
+    story = []
+    run = []
+    for line in content.split('\n'):
+        if line.strip():
+            run.append(_escape(line))
+            if len(run) >= MAX_LINES_PER_PARAGRAPH:
+                story.append(Paragraph('<br/>'.join(run), style))
+                run = []
+            continue
+        if run:
+            story.append(Paragraph('<br/>'.join(run), style))
+            run = []
+        story.append(Spacer(1, 6))
+    if run:
+        story.append(Paragraph('<br/>'.join(run), style))
+    return story
 
 
 def generate_pdf(title, content):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=inch,
-        leftMargin=inch,
-        topMargin=inch,
-        bottomMargin=inch
-    )
-
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=20,
-    )
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['Normal'],
-        fontSize=11,
-        leading=16,
-        alignment=TA_LEFT,
-    )
+    doc = SimpleDocTemplate(buffer, **_layout()['resume'])
+    styles = _styles()
 
     story = []
-    story.append(Paragraph(title, title_style))
+    story.append(Paragraph(title, styles['title']))
     story.append(Spacer(1, 12))
+    story.extend(_text_flowables(content, styles['body']))
 
-    for line in content.split('\n'):
-        if line.strip():
-            line_safe = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            story.append(Paragraph(line_safe, body_style))
-        else:
-            story.append(Spacer(1, 6))
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def generate_job_listings_pdf(posts, buffer=None):
+    """Render job posts (API dicts) as a PDF listing. Returns the buffer, rewound."""
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
+    buffer = buffer if buffer is not None else io.BytesIO()
+    layout = _layout()
+    mm = layout['mm']
+    doc = SimpleDocTemplate(buffer, **layout['listing'])
+    styles = _styles()
 
+    story = [Paragraph('Job Listings Export', styles['doc_title']), Spacer(1, 8 * mm)]
+    for p in posts:
+        story.append(Paragraph(_escape(p.get('title') or 'Untitled'), styles['jb_title']))
+        meta_parts = []
+        for label, key in (('Company', 'company'), ('Location', 'location'), ('Type', 'job_type'),
+                           ('Salary', 'salary'), ('Apply', 'apply_url')):
+            if p.get(key):
+                meta_parts.append(f'<b>{label}:</b> {_escape(str(p[key]))}')
+        tags = p.get('tags', [])
+        tags = ', '.join(tags) if isinstance(tags, list) else (tags or '')
+        if tags:
+            meta_parts.append(f'<b>Tags:</b> {_escape(tags)}')
+        if meta_parts:
+            story.append(Paragraph('<br/>'.join(meta_parts), styles['jb_meta']))
+        desc = (p.get('description') or p.get('original_description') or '').strip()
+        if desc:
+            story.append(Paragraph(_escape(desc[:800]), styles['jb_desc']))
+        story.append(HRFlowable(width='100%', thickness=0.5, color=layout['rule_color']))
+        story.append(Spacer(1, 5 * mm))
     doc.build(story)
     buffer.seek(0)
     return buffer
+
+
+# ── Rendered PDF cache ────────────────────────────────────────────────────────
+
+PDF_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# Bump when the layout above changes so stale renders are not served
+_PDF_CACHE_VERSION = 1
+_pdf_cache = DiskCache(os.path.join(os.path.dirname(__file__), '..', 'instance', 'pdf_cache'),
+                       PDF_CACHE_MAX_BYTES, '.pdf')
+
+
+def pdf_cache_key(*parts):
+    """Stable key (also usable as an ETag) for a document identified by ``parts``."""
+    payload = json.dumps([_PDF_CACHE_VERSION, *parts], default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def cached_pdf(key, title, content):
+    """
+    Return the rendered PDF for ``key`` as a file path, rendering it with
+    generate_pdf on a miss. If the cache directory is not writable the PDF is
+    returned as an in-memory buffer instead.
+    """
+    path = _pdf_cache.lookup(key)
+    if path is not None:
+        return path
+    buffer = generate_pdf(title, content)
+    try:
+        return _pdf_cache.write(key, buffer.getbuffer())
+    except OSError as e:
+        logger.warning('pdf cache write failed: %s', e)
+        return buffer
@@ -0,0 +1,199 @@
+"""
+profiler.py — Opt-in per-request profiling for admins.
+
+An admin session can profile any request by adding ``?_profile=1`` or the
+header ``X-Profile: 1``. The request then runs under cProfile while a
+sampling thread records the handling thread's stack every
+PROFILE_SAMPLE_INTERVAL seconds. Streamed responses are profiled until the
+body has been fully sent.
+
+Each profile is written to instance/profiles/ as three files sharing an id
+(returned in the ``X-Profile-Id`` response header):
+
+  <id>.prof    cProfile stats — ``python -m pstats`` or snakeviz
+  <id>.folded  collapsed stacks — flamegraph.pl or speedscope
+  <id>.json    metadata and the top functions, listed in the admin dashboard
+
+Only the newest PROFILE_KEEP profiles are kept.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), '..', 'instance', 'profiles')
+PROFILE_SAMPLE_INTERVAL = 0.002
+PROFILE_KEEP = 50
+PROFILE_TOP = 15
+
+_ID_RE = re.compile(r'^[A-Za-z0-9_.-]+$')
+KINDS = {'prof': 'application/octet-stream', 'folded': 'text/plain', 'json': 'application/json'}
+
+
+def valid_id(profile_id):
+    return bool(_ID_RE.match(profile_id or '')) and '..' not in profile_id
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class _Sampler(threading.Thread):
+    """Collects the collapsed stacks of one thread at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=1)
+
+
+class RequestProfile:
+    def __init__(self, method, path, endpoint):
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint or 'unmatched')
+        self.id = f'{stamp}-{name}-{secrets.token_hex(3)}'
+        self.meta = {'id': self.id, 'method': method, 'path': path, 'endpoint': endpoint,
+                     'created_at': datetime.utcnow().isoformat() + 'Z'}
+        self._profiler = cProfile.Profile()
+        self._sampler = _Sampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+        self._started = None
+        self._done = False
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+        self._profiler.enable()
+        return self
+
+    def stop(self, status=None):
+        """Stop profiling and write the files; safe to call more than once."""
+        if self._done:
+            return
+        self._done = True
+        self._profiler.disable()
+        self._sampler.stop()
+        self.meta.update(
+            status=status,
+            duration_ms=round((time.perf_counter() - self._started) * 1000, 1),
+            samples=sum(self._sampler.stacks.values()),
+        )
+        try:
+            self._write()
+        except Exception:
+            logger.exception('Could not save profile %s', self.id)
+
+    def _write(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, self.id)
+        self._profiler.dump_stats(base + '.prof')
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in self._sampler.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        top = sorted(stats.stats.items(), key=lambda kv: -kv[1][2])[:PROFILE_TOP]
+        self.meta['top'] = [
+            {'function': f'{func} ({os.path.basename(file)}:{line})', 'calls': nc,
+             'tottime_ms': round(tt * 1000, 2), 'cumtime_ms': round(ct * 1000, 2)}
+            for (file, line, func), (_cc, nc, tt, ct, _callers) in top
+        ]
+        tmp = base + '.json.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, base + '.json')
+        _prune()
+
+
+def _prune():
+    try:
+        metas = sorted((n for n in os.listdir(PROFILE_DIR) if n.endswith('.json')), reverse=True)
+    except FileNotFoundError:
+        return
+    for name in metas[PROFILE_KEEP:]:
+        base = os.path.join(PROFILE_DIR, name[:-len('.json')])
+        for kind in KINDS:
+            try:
+                os.remove(f'{base}.{kind}')
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(limit=PROFILE_KEEP):
+    """Metadata of the newest profiles, newest first."""
+    try:
+        names = sorted((n for n in os.listdir(PROFILE_DIR) if n.endswith('.json')), reverse=True)
+    except FileNotFoundError:
+        return []
+    out = []
+    for name in names[:limit]:
+        try:
+            with open(os.path.join(PROFILE_DIR, name), encoding='utf-8') as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def profile_path(profile_id, kind):
+    """Path of a stored profile file, or None if it does not exist."""
+    if kind not in KINDS or not valid_id(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f'{profile_id}.{kind}')
+    return path if os.path.isfile(path) else None
+
+
+def _requested(request):
+    flag = request.args.get('_profile') or request.headers.get('X-Profile') or ''
+    return flag.lower() in ('1', 'true', 'yes')
+
+
+def init_app(app):
+    """Profile requests that ask for it, when made by a logged-in admin."""
+    from flask import g, request, session
+
+    @app.before_request
+    def _start_profile():
+        if _requested(request) and session.get('admin_logged_in'):
+            g._profile = RequestProfile(request.method, request.path, request.endpoint).start()
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            response.headers['X-Profile-Id'] = profile.id
+            # Runs once the body is sent, so streamed responses are covered too
+            response.call_on_close(lambda: profile.stop(response.status_code))
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc):
+        # Unhandled errors skip after_request; never leave a profiler enabled
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            profile.stop(500)
@@ -0,0 +1,54 @@
+"""
+schemas.py — Pydantic models for structured (JSON) AI responses.
+
+Each model doubles as the schema sent to the provider and as the validator
+for what comes back, see ``ai_engine.ai_generate_json``.
+"""
+from pydantic import AliasChoices, BaseModel, Field, field_validator
+
+
+# Core fields are required so that an empty or unrelated JSON object fails
+# validation and gets repaired or regenerated instead of passing as a result.
+
+class MatchAnalysis(BaseModel):
+    score: float
+    missing_keywords: list[str]
+    suggestions: list[str] = Field(default_factory=list)
+
+    @field_validator('score')
+    @classmethod
+    def _clamp_score(cls, v):
+        return max(0.0, min(100.0, v))
+
+
+class JobAnalysis(BaseModel):
+    required_skills: list[str]
+    keywords: list[str]
+    experience_level: str = 'Not specified'
+    key_responsibilities: list[str] = Field(default_factory=list)
+
+
+class InterviewQuestion(BaseModel):
+    question: str
+    sample_answer: str = Field(
+        'No sample answer provided.',
+        validation_alias=AliasChoices('sample_answer', 'answer'),
+    )
+
+
+class InterviewQuestions(BaseModel):
+    questions: list[InterviewQuestion]
+
+
+class LinkedInProfile(BaseModel):
+    headline: str
+    about: str
+
+
+class RewrittenPost(BaseModel):
+    id: int
+    description: str
+
+
+class RewrittenPostBatch(BaseModel):
+    posts: list[RewrittenPost]
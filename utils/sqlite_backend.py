@@ -0,0 +1,223 @@
+"""
+sqlite_backend.py — Local SQLite storage backend.
+
+Each collection is a table of ``(id TEXT PRIMARY KEY, data TEXT)`` holding
+the document as JSON. Filters and ordering are json_extract expressions, and
+every field data_layer filters or sorts on has a matching expression index,
+so status/flag/external_id lookups and updated_at ordering never scan the
+table. Connections are per thread, in WAL mode, so readers never block on a
+writer and several gunicorn workers can share one file.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from utils.storage import BOOL_FIELDS, StorageBackend, doc_id_value
+
+# Expression indexes per collection; a tuple is a composite index
+_INDEXES = {
+    'job_posts': [
+        'status', 'featured', 'ai_rewritten', 'external_id', 'updated_at',
+        ('featured', 'updated_at'), ('status', 'updated_at'),
+    ],
+    'jobs': ['status', 'created_at'],
+    'resumes': ['created_at'],
+    'contact_messages': ['is_read', 'created_at'],
+    'content_reports': ['status', 'created_at'],
+}
+_NAME_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+# SQLite's default limit on bound parameters is 999
+_IN_CHUNK = 500
+
+
+def _name(value):
+    if not _NAME_RE.match(value):
+        raise ValueError(f'Invalid collection or field name: {value!r}')
+    return value
+
+
+def _expr(field):
+    e = f"json_extract(data, '$.{_name(field)}')"
+    return f'COALESCE({e}, 0)' if field in BOOL_FIELDS else e
+
+
+def _param(field, value):
+    return int(bool(value)) if field in BOOL_FIELDS else value
+
+
+def _row(doc_id, data):
+    d = json.loads(data)
+    d['id'] = doc_id_value(doc_id)
+    return d
+
+
+class SQLiteBackend(StorageBackend):
+    name = 'sqlite'
+    # Run on every new connection
+    _schema = (
+        'CREATE TABLE IF NOT EXISTS _counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._tables = set()
+        self._schema_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Autocommit; multi-statement writes open their own transaction
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in self._schema:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _txn(self):
+        conn = self._conn()
+        if conn.in_transaction:
+            # Nested: the outermost _txn commits or rolls back
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _table(self, collection):
+        """Quoted table name, creating the table and its indexes once per process."""
+        if collection not in self._tables:
+            with self._schema_lock:
+                if collection not in self._tables:
+                    conn = self._conn()
+                    conn.execute(
+                        f'CREATE TABLE IF NOT EXISTS "{_name(collection)}" '
+                        f'(id TEXT PRIMARY KEY, data TEXT NOT NULL)'
+                    )
+                    for index in _INDEXES.get(collection, ()):
+                        fields = index if isinstance(index, tuple) else (index,)
+                        conn.execute(
+                            f'CREATE INDEX IF NOT EXISTS "ix_{collection}_{"_".join(fields)}" '
+                            f'ON "{collection}" ({", ".join(_expr(f) for f in fields)})'
+                        )
+                    self._tables.add(collection)
+        return f'"{collection}"'
+
+    def _where_sql(self, where):
+        if not where:
+            return '', []
+        clauses = [f'{_expr(f)} = ?' for f in where]
+        return ' WHERE ' + ' AND '.join(clauses), [_param(f, v) for f, v in where.items()]
+
+    def ping(self):
+        self._conn().execute('SELECT 1').fetchone()
+
+    def next_id(self, collection):
+        row = self._conn().execute(
+            'INSERT INTO _counters (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1 RETURNING value',
+            (collection,),
+        ).fetchone()
+        return row[0]
+
+    def get(self, collection, doc_id):
+        row = self._conn().execute(
+            f'SELECT id, data FROM {self._table(collection)} WHERE id = ?', (str(doc_id),)
+        ).fetchone()
+        return _row(*row) if row else None
+
+    def get_many(self, collection, ids):
+        table = self._table(collection)
+        ids = [str(i) for i in ids]
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            marks = ', '.join('?' * len(chunk))
+            found = dict(self._conn().execute(
+                f'SELECT id, data FROM {table} WHERE id IN ({marks})', chunk
+            ).fetchall())
+            for doc_id in chunk:
+                if doc_id in found:
+                    yield _row(doc_id, found.pop(doc_id))
+
+    def set(self, collection, doc_id, data):
+        self._conn().execute(
+            f'INSERT OR REPLACE INTO {self._table(collection)} (id, data) VALUES (?, ?)',
+            (str(doc_id), json.dumps(data, default=str)),
+        )
+
+    def _set_sql(self, updates):
+        paths = ', '.join(f"'$.{_name(k)}', json(?)" for k in updates)
+        return f'data = json_set(data, {paths})', [json.dumps(v, default=str) for v in updates.values()]
+
+    def update(self, collection, doc_id, updates):
+        table = self._table(collection)
+        with self._txn() as conn:
+            if updates:
+                set_sql, params = self._set_sql(updates)
+                conn.execute(f'UPDATE {table} SET {set_sql} WHERE id = ?', params + [str(doc_id)])
+            row = conn.execute(f'SELECT id, data FROM {table} WHERE id = ?', (str(doc_id),)).fetchone()
+        return _row(*row) if row else None
+
+    def delete(self, collection, doc_id):
+        cur = self._conn().execute(f'DELETE FROM {self._table(collection)} WHERE id = ?', (str(doc_id),))
+        return cur.rowcount > 0
+
+    def delete_many(self, collection, ids):
+        table = self._table(collection)
+        with self._txn() as conn:
+            conn.executemany(f'DELETE FROM {table} WHERE id = ?', [(str(i),) for i in ids])
+
+    def update_many(self, collection, ids, updates):
+        table = self._table(collection)
+        set_sql, params = self._set_sql(updates)
+        with self._txn() as conn:
+            conn.executemany(f'UPDATE {table} SET {set_sql} WHERE id = ?', [params + [str(i)] for i in ids])
+
+    def query(self, collection, where=None, order_by=None, limit=None):
+        where_sql, params = self._where_sql(where)
+        sql = f'SELECT id, data FROM {self._table(collection)}{where_sql}'
+        if order_by:
+            sql += ' ORDER BY ' + ', '.join(f'{_expr(f)} {"DESC" if desc else "ASC"}' for f, desc in order_by)
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        return [_row(*r) for r in self._conn().execute(sql, params)]
+
+    def iter_pages(self, collection, where=None, page_size=200):
+        table = self._table(collection)
+        where_sql, params = self._where_sql(where)
+        cursor_sql = ' AND id > ?' if where_sql else ' WHERE id > ?'
+        last = ''
+        while True:
+            rows = self._conn().execute(
+                f'SELECT id, data FROM {table}{where_sql}{cursor_sql} ORDER BY id LIMIT ?',
+                params + [last, page_size],
+            ).fetchall()
+            for r in rows:
+                yield _row(*r)
+            if len(rows) < page_size:
+                return
+            last = rows[-1][0]
+
+    def count(self, collection, where=None):
+        where_sql, params = self._where_sql(where)
+        return self._conn().execute(
+            f'SELECT COUNT(*) FROM {self._table(collection)}{where_sql}', params
+        ).fetchone()[0]
+
+    def count_by(self, collection, field):
+        rows = self._conn().execute(
+            f'SELECT {_expr(field)}, COUNT(*) FROM {self._table(collection)} GROUP BY 1'
+        ).fetchall()
+        return {(bool(v) if field in BOOL_FIELDS else v): n for v, n in rows}
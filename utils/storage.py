@@ -0,0 +1,149 @@
+"""
+storage.py — Pluggable document-store backends for data_layer.
+
+data_layer keeps the domain logic (field defaults, normalisation, API
+formatting); a backend only stores JSON-like documents in named collections.
+Three backends ship with the app:
+
+  firestore    (default) Google Cloud Firestore via firebase_admin
+  sqlite       a local SQLite database in WAL mode — single-node deployments,
+               benchmarks and CI without network access
+  writebehind  the SQLite store, with changes pushed to Firestore in the
+               background (see utils.sync_manager)
+
+Select one with the STORAGE_BACKEND environment variable. SQLITE_STORAGE_PATH
+overrides the SQLite file (default instance/storage.db).
+"""
+import os
+import threading
+
+# Stored as booleans; a missing value counts as False when filtering and sorting
+BOOL_FIELDS = frozenset({'featured', 'ai_rewritten', 'is_read'})
+
+BACKENDS = ('firestore', 'sqlite', 'writebehind')
+_DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), '..', 'instance', 'storage.db')
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def doc_id_value(doc_id):
+    """Document ids are strings in storage; numeric ones are exposed as ints."""
+    doc_id = str(doc_id)
+    return int(doc_id) if doc_id.isdigit() else doc_id
+
+
+def field_value(doc, field):
+    value = doc.get(field)
+    if field in BOOL_FIELDS:
+        return bool(value)
+    return value
+
+
+def matches(doc, where):
+    return all(field_value(doc, f) == (bool(v) if f in BOOL_FIELDS else v) for f, v in (where or {}).items())
+
+
+def sort_docs(rows, order_by):
+    """Sort in place by [(field, descending), ...]; missing values sort first, as in SQL."""
+    for field, descending in reversed(order_by or ()):
+        rows.sort(key=lambda r: (field_value(r, field) is not None, field_value(r, field)), reverse=descending)
+    return rows
+
+
+class StorageBackend:
+    """
+    Interface every backend implements. Documents are plain dicts; returned
+    documents always carry their ``id``. ``where`` is a dict of equality
+    filters and ``order_by`` a list of ``(field, descending)`` pairs.
+    The counting and bulk methods have generic fallbacks built on the
+    primitives; backends override them where they can do better.
+    """
+    name = None
+
+    def ping(self):
+        """Raise if the store cannot be reached."""
+        raise NotImplementedError
+
+    def next_id(self, collection):
+        """Atomically allocate the next integer id for ``collection``."""
+        raise NotImplementedError
+
+    def get(self, collection, doc_id):
+        raise NotImplementedError
+
+    def set(self, collection, doc_id, data):
+        raise NotImplementedError
+
+    def update(self, collection, doc_id, updates):
+        """Merge ``updates`` into a document; return it, or None if it does not exist."""
+        raise NotImplementedError
+
+    def delete(self, collection, doc_id):
+        """Delete a document; return False if it did not exist."""
+        raise NotImplementedError
+
+    def query(self, collection, where=None, order_by=None, limit=None):
+        raise NotImplementedError
+
+    def iter_pages(self, collection, where=None, page_size=200):
+        """Yield matching documents in document-ID order, ``page_size`` per round trip."""
+        raise NotImplementedError
+
+    def get_many(self, collection, ids):
+        for doc_id in ids:
+            doc = self.get(collection, doc_id)
+            if doc is not None:
+                yield doc
+
+    def delete_many(self, collection, ids):
+        for doc_id in ids:
+            self.delete(collection, doc_id)
+
+    def update_many(self, collection, ids, updates):
+        for doc_id in ids:
+            self.update(collection, doc_id, updates)
+
+    def count(self, collection, where=None):
+        return len(self.query(collection, where=where))
+
+    def count_by(self, collection, field):
+        """Return ``{value: number of documents}`` for ``field``."""
+        counts = {}
+        for doc in self.query(collection):
+            value = field_value(doc, field)
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+
+def backend_name():
+    return (os.environ.get('STORAGE_BACKEND') or 'firestore').strip().lower()
+
+
+def get_backend():
+    """The process-wide backend selected by STORAGE_BACKEND (created on first use)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = backend_name()
+                if name == 'firestore':
+                    from utils.firestore_backend import FirestoreBackend
+                    _backend = FirestoreBackend()
+                elif name == 'sqlite':
+                    from utils.sqlite_backend import SQLiteBackend
+                    _backend = SQLiteBackend(os.environ.get('SQLITE_STORAGE_PATH') or _DEFAULT_SQLITE_PATH)
+                elif name == 'writebehind':
+                    from utils.sync_manager import WriteBehindBackend
+                    _backend = WriteBehindBackend(os.environ.get('SQLITE_STORAGE_PATH') or _DEFAULT_SQLITE_PATH)
+                else:
+                    raise ValueError(f'Unknown STORAGE_BACKEND {name!r}; expected one of {", ".join(BACKENDS)}')
+    return _backend
+
+
+def set_backend(backend):
+    """Install a backend instance directly (benchmarks, tooling). Returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
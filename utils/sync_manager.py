@@ -1,27 +1,473 @@
 """
-sync_manager.py — Stub. Firebase is now the sole database; no sync needed.
+sync_manager.py — Write-behind storage: a local SQLite store synced to Firestore.
+
+With STORAGE_BACKEND=writebehind every read and write goes to the local
+database (SQLITE_STORAGE_PATH), so request latency no longer includes a
+Firestore round trip. Each write also records the document in a ``_changes``
+table (one row per document, coalescing repeated writes), and a background
+worker pushes pending changes to Firestore in batches every
+SYNC_INTERVAL_SECONDS.
+
+Conflicts are resolved by ``updated_at``: when the Firestore copy of a
+document is newer than the local one (another instance wrote it), the remote
+version wins and replaces the local copy instead of being overwritten.
+Documents without ``updated_at`` are last-writer-wins. Deletes always win.
+
+On the first start the worker restores every collection from Firestore and
+raises the local id counters to the remote maximum. The restore commits one
+page at a time and records each finished collection, so a restart resumes
+where it stopped, and app startup never waits for it. Until it has completed,
+reads, writes and id allocation raise instead of running against an empty
+store (which would serve empty pages and hand out ids that already exist in
+Firestore). The admin sync routes call
+``full_push_to_firebase`` and ``restore_from_firebase`` directly.
 """
+import functools
+import json
+import logging
+import os
+import threading
+from datetime import datetime
 
+from utils.sqlite_backend import SQLiteBackend
 
-def firebase_available():
+logger = logging.getLogger(__name__)
+
+# Seconds between background pushes
+SYNC_INTERVAL = float(os.environ.get('SYNC_INTERVAL_SECONDS') or 5)
+# Changes per Firestore batch (Firestore rejects batches over 500 writes)
+SYNC_BATCH_SIZE = 200
+# Documents restored per local transaction
+RESTORE_PAGE_SIZE = 500
+# Collections restored from Firestore and covered by a full push
+SYNC_COLLECTIONS = ('resumes', 'jobs', 'contact_messages', 'job_posts', 'content_reports', 'settings')
+
+_worker = None
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+_state_lock = threading.Lock()
+_state = {
+    'last_push_at': None, 'last_restore_at': None, 'last_error': None,
+    'pushed': 0, 'deleted': 0, 'conflicts': 0,
+}
+
+
+def _now():
+    return datetime.utcnow().isoformat()
+
+
+def _record(**changes):
+    with _state_lock:
+        for k, v in changes.items():
+            if k in ('pushed', 'deleted', 'conflicts'):
+                _state[k] += v
+            else:
+                _state[k] = v
+
+
+def _remote_newer(remote, local):
+    r, l = (remote or {}).get('updated_at'), (local or {}).get('updated_at')
+    return bool(r and l and str(r) > str(l))
+
+
+def _after_restore(name):
+    """Wrap a SQLiteBackend method so it raises until the first restore has completed."""
+    method = getattr(SQLiteBackend, name)
+
+    @functools.wraps(method)
+    def gated(self, *args, **kwargs):
+        self.require_restored()
+        return method(self, *args, **kwargs)
+    return gated
+
+
+class WriteBehindBackend(SQLiteBackend):
+    """SQLiteBackend that records every write in ``_changes`` for the sync worker."""
+    name = 'writebehind'
+    _schema = SQLiteBackend._schema + (
+        'CREATE TABLE IF NOT EXISTS _changes (collection TEXT NOT NULL, doc_id TEXT NOT NULL, '
+        'op TEXT NOT NULL, seq INTEGER NOT NULL, PRIMARY KEY (collection, doc_id))',
+        'CREATE TABLE IF NOT EXISTS _sync_meta (key TEXT PRIMARY KEY, value TEXT)',
+    )
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._restored = False
+
+    def require_restored(self):
+        if not self._restored:
+            if self.meta('restored_at') is None:
+                raise RuntimeError('The local store is still being restored from Firestore; try again shortly.')
+            self._restored = True
+
+    next_id = _after_restore('next_id')
+    get = _after_restore('get')
+    get_many = _after_restore('get_many')
+    query = _after_restore('query')
+    iter_pages = _after_restore('iter_pages')
+    count = _after_restore('count')
+    count_by = _after_restore('count_by')
+
+    def _track(self, conn, collection, ids, op):
+        conn.executemany(
+            'INSERT INTO _changes (collection, doc_id, op, seq) '
+            'VALUES (?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM _changes)) '
+            'ON CONFLICT(collection, doc_id) DO UPDATE SET op = excluded.op, seq = excluded.seq',
+            [(collection, str(i), op) for i in ids],
+        )
+        _ensure_worker(self)
+
+    def set(self, collection, doc_id, data):
+        self.require_restored()
+        with self._txn() as conn:
+            super().set(collection, doc_id, data)
+            self._track(conn, collection, [doc_id], 'set')
+
+    def update(self, collection, doc_id, updates):
+        self.require_restored()
+        with self._txn() as conn:
+            doc = super().update(collection, doc_id, updates)
+            if doc is not None:
+                self._track(conn, collection, [doc_id], 'set')
+        return doc
+
+    def delete(self, collection, doc_id):
+        self.require_restored()
+        with self._txn() as conn:
+            found = super().delete(collection, doc_id)
+            if found:
+                self._track(conn, collection, [doc_id], 'delete')
+        return found
+
+    def delete_many(self, collection, ids):
+        self.require_restored()
+        ids = list(ids)
+        with self._txn() as conn:
+            super().delete_many(collection, ids)
+            self._track(conn, collection, ids, 'delete')
+
+    def update_many(self, collection, ids, updates):
+        self.require_restored()
+        ids = list(ids)
+        with self._txn() as conn:
+            super().update_many(collection, ids, updates)
+            self._track(conn, collection, ids, 'set')
+
+    # ── Sync plumbing (not part of the StorageBackend interface) ─────────────
+
+    def meta(self, key):
+        row = self._conn().execute('SELECT value FROM _sync_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self._conn().execute(
+            'INSERT INTO _sync_meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value', (key, value),
+        )
+
+    def pending_count(self):
+        return self._conn().execute('SELECT COUNT(*) FROM _changes').fetchone()[0]
+
+    def pending(self, limit):
+        return self._conn().execute(
+            'SELECT collection, doc_id, op, seq FROM _changes ORDER BY seq LIMIT ?', (limit,)
+        ).fetchall()
+
+    def has_pending(self, collection, doc_id):
+        return self._conn().execute(
+            'SELECT 1 FROM _changes WHERE collection = ? AND doc_id = ?', (collection, str(doc_id))
+        ).fetchone() is not None
+
+    def clear_pending(self, rows):
+        """Drop pushed changes, unless the document was written again in the meantime."""
+        with self._txn() as conn:
+            conn.executemany(
+                'DELETE FROM _changes WHERE collection = ? AND doc_id = ? AND seq = ?',
+                [(c, d, s) for c, d, _op, s in rows],
+            )
+
+    def raw(self, collection, doc_id):
+        """The stored document exactly as written (no ``id`` added), or None."""
+        row = self._conn().execute(
+            f'SELECT data FROM {self._table(collection)} WHERE id = ?', (str(doc_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def store_untracked(self, collection, doc_id, data):
+        """Write a document that came from Firestore without queueing it for a push."""
+        SQLiteBackend.set(self, collection, doc_id, data)
+
+    def store_remote(self, collection, doc_id, seq, data):
+        """
+        Replace a document with its newer Firestore copy, but only if its queued
+        change is still the one read at ``seq``. Returns True if it was replaced.
+        """
+        with self._txn() as conn:
+            row = conn.execute(
+                'SELECT seq FROM _changes WHERE collection = ? AND doc_id = ?', (collection, str(doc_id))
+            ).fetchone()
+            if row is None or row[0] != seq:
+                return False
+            SQLiteBackend.set(self, collection, doc_id, data)
+            return True
+
+    def counter(self, collection):
+        row = self._conn().execute('SELECT value FROM _counters WHERE name = ?', (collection,)).fetchone()
+        return row[0] if row else 0
+
+    def raise_counter(self, collection, value):
+        self._conn().execute(
+            'INSERT INTO _counters (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)',
+            (collection, int(value)),
+        )
+
+    def track_all(self, collections):
+        """Queue every local document of ``collections`` for a push; return how many."""
+        total = 0
+        for collection in collections:
+            table = self._table(collection)
+            with self._txn() as conn:
+                ids = [r[0] for r in conn.execute(f'SELECT id FROM {table}')]
+                self._track(conn, collection, ids, 'set')
+            total += len(ids)
+        return total
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+
+def _active_backend():
+    from utils.storage import get_backend
+    backend = get_backend()
+    return backend if isinstance(backend, WriteBehindBackend) else None
+
+
+def _ensure_worker(backend):
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, args=(backend,), name='sync-worker', daemon=True)
+            _worker.start()
+
+
+def initial_restore(backend):
+    """
+    Restore the local store from Firestore unless that has been done before,
+    skipping collections a previous, interrupted attempt already finished.
+    Returns True if this call completed the restore.
+    """
+    if backend.meta('restored_at') is not None:
+        return False
+    restore_from_firebase(backend=backend, resume=True)
+    logger.info('Local store restored from Firestore.')
     return True
 
 
+def _run(backend):
+    while True:
+        try:
+            initial_restore(backend)
+            while push_pending(backend) == SYNC_BATCH_SIZE:
+                pass
+        except Exception as e:
+            # Changes stay queued; the next tick retries
+            _record(last_error=str(e))
+            logger.warning('Firestore sync failed: %s', e)
+        _wake.wait(SYNC_INTERVAL)
+        _wake.clear()
+
+
+def start_worker():
+    """
+    Start the background sync worker if the write-behind backend is active.
+    On the first start the worker restores the local store before syncing;
+    requests fail fast (see ``require_restored``) until it has.
+    """
+    backend = _active_backend()
+    if backend is not None:
+        _ensure_worker(backend)
+    return backend is not None
+
+
+def push_pending(backend=None, limit=SYNC_BATCH_SIZE):
+    """
+    Push up to ``limit`` queued changes to Firestore in one batch. Returns the
+    number of changes processed (pushed, deleted or resolved in favour of
+    the remote copy).
+    """
+    backend = backend or _active_backend()
+    if backend is None:
+        return 0
+    rows = backend.pending(limit)
+    if not rows:
+        return 0
+
+    from utils.firestore_manager import get_firestore_client
+    db = get_firestore_client()
+    local = {(c, d): backend.raw(c, d) for c, d, op, _s in rows if op == 'set'}
+    refs = {key: db.collection(key[0]).document(key[1]) for key, doc in local.items() if doc is not None}
+    remote = {}
+    if refs:
+        by_path = {ref.path: key for key, ref in refs.items()}
+        for snap in db.get_all(list(refs.values())):
+            if snap.exists:
+                remote[by_path[snap.reference.path]] = snap.to_dict()
+
+    collections = {c for c, _d, _op, _s in rows}
+    counter_refs = {c: db.collection('_counters').document(c) for c in collections if c != 'settings'}
+    remote_counters = {}
+    if counter_refs:
+        for snap in db.get_all(list(counter_refs.values())):
+            if snap.exists:
+                remote_counters[snap.id] = int((snap.to_dict() or {}).get('value') or 0)
+
+    batch = db.batch()
+    pushed = deleted = conflicts = 0
+    for collection, doc_id, op, seq in rows:
+        key = (collection, doc_id)
+        if op == 'delete':
+            batch.delete(db.collection(collection).document(doc_id))
+            deleted += 1
+        elif key in refs:
+            if _remote_newer(remote.get(key), local[key]):
+                # A local edit made since pending() was read stays queued and is
+                # resolved on the next push instead of being overwritten here
+                if backend.store_remote(collection, doc_id, seq, remote[key]):
+                    conflicts += 1
+            else:
+                batch.set(refs[key], local[key])
+                pushed += 1
+    for collection, ref in counter_refs.items():
+        value = backend.counter(collection)
+        if value > remote_counters.get(collection, 0):
+            batch.set(ref, {'value': value})
+        elif remote_counters.get(collection, 0) > value:
+            backend.raise_counter(collection, remote_counters[collection])
+    batch.commit()
+
+    backend.clear_pending(rows)
+    _record(last_push_at=_now(), last_error=None, pushed=pushed, deleted=deleted, conflicts=conflicts)
+    if conflicts:
+        logger.info('Firestore sync kept %d newer remote document(s)', conflicts)
+    return len(rows)
+
+
+# ── Public API (admin routes) ─────────────────────────────────────────────────
+
+def firebase_available():
+    from utils.firestore_manager import is_firebase_available
+    return is_firebase_available()
+
+
 def push_record(collection, record_dict):
-    pass
+    """Queue an existing local document for the next push."""
+    backend = _active_backend()
+    if backend is not None and record_dict.get('id') is not None:
+        with backend._txn() as conn:
+            backend._track(conn, collection, [record_dict['id']], 'set')
 
 
 def delete_record(collection, doc_id):
-    pass
+    backend = _active_backend()
+    if backend is not None:
+        with backend._txn() as conn:
+            backend._track(conn, collection, [doc_id], 'delete')
 
 
 def push_setting(key, value):
-    pass
+    push_record('settings', {'id': key, 'key': key, 'value': value})
+
+
+def flush(backend=None):
+    """Push every queued change now; return how many were processed."""
+    backend = backend or _active_backend()
+    total = 0
+    while True:
+        n = push_pending(backend)
+        total += n
+        if n < SYNC_BATCH_SIZE:
+            return total
 
 
 def full_push_to_firebase(app=None):
-    pass
+    """Queue every local document and push them all. Returns the number pushed."""
+    backend = _active_backend()
+    if backend is None:
+        return 0
+    backend.track_all(SYNC_COLLECTIONS)
+    return flush(backend)
+
+
+def _store_page(backend, collection, page):
+    """Write one page of remote documents in a single local transaction; return how many were stored."""
+    stored = 0
+    with backend._txn():
+        for doc_id, doc in page:
+            if backend.has_pending(collection, doc_id):
+                continue
+            backend.store_untracked(collection, doc_id, doc)
+            stored += 1
+    return stored
+
+
+def restore_from_firebase(app=None, backend=None, resume=False):
+    """
+    Copy every synced collection from Firestore into the local store, one
+    page per transaction. Documents with a queued local change are left
+    alone; the next push resolves them by updated_at. With ``resume=True``
+    collections finished by an earlier, interrupted restore are skipped.
+    Returns the number of documents restored.
+    """
+    backend = backend or _active_backend()
+    if backend is None:
+        return 0
+    from utils.firestore_backend import FirestoreBackend
+    remote = FirestoreBackend()
+    restored = 0
+    for collection in SYNC_COLLECTIONS:
+        marker = f'restored:{collection}'
+        if resume and backend.meta(marker) is not None:
+            continue
+        max_id = 0
+        page = []
+        for doc in remote.iter_pages(collection, page_size=RESTORE_PAGE_SIZE):
+            doc_id = doc.pop('id')
+            if collection != 'settings':
+                # Stored documents carry their own id; settings are keyed by name
+                doc['id'] = doc_id
+                if isinstance(doc_id, int):
+                    max_id = max(max_id, doc_id)
+            page.append((doc_id, doc))
+            if len(page) >= RESTORE_PAGE_SIZE:
+                restored += _store_page(backend, collection, page)
+                page = []
+        restored += _store_page(backend, collection, page)
+        if collection != 'settings':
+            counter = remote.get('_counters', collection) or {}
+            backend.raise_counter(collection, max(max_id, int(counter.get('value') or 0)))
+        backend.set_meta(marker, _now())
+    backend.set_meta('restored_at', _now())
+    _record(last_restore_at=_now(), last_error=None)
+    return restored
+
+
+def sync_status():
+    backend = _active_backend()
+    with _state_lock:
+        status = dict(_state)
+    status.update({
+        'enabled': backend is not None,
+        'interval_s': SYNC_INTERVAL,
+        'worker_alive': bool(_worker and _worker.is_alive()),
+        'pending': backend.pending_count() if backend is not None else 0,
+    })
+    if backend is not None and status['last_restore_at'] is None:
+        status['last_restore_at'] = backend.meta('restored_at')
+    return status
 
 
-def restore_from_firebase(app=None):
-    pass
+def wake():
+    """Ask the worker to push now instead of waiting for the next tick."""
+    _wake.set()